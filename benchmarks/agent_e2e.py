@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark: replay a JSONL workload through UnifiedCustomerSupportAgent.
+
+Each line of the workload is {"email": ..., "request": ...}. Requests run at a
+fixed concurrency against the offline stub backend (or any registered backend)
+and the run reports throughput, latency percentiles, a per-phase breakdown
+(plan, tools, synthesis; llm for the time in model turns with
+--tool-calling) and memory use.
+
+    python -m benchmarks.agent_e2e --concurrency 16 --repeat 20 \
+        --plan-latency lognormal:0.4,0.3 --synthesis-latency uniform:0.3,0.8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+from llm_backends import BACKENDS, create_backend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+from tracing import JSONLinesExporter, tracer
+
+DEFAULT_WORKLOAD = os.path.join(os.path.dirname(__file__), "workload.jsonl")
+PHASES = ("plan", "tools", "synthesis", "llm")
+
+
+def load_workload(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def describe(samples) -> str:
+    if not samples:
+        return "n/a"
+    mean = sum(samples) / len(samples)
+    return " | ".join(f"{label} {value * 1000:8.1f} ms" for label, value in
+                      (("mean", mean), ("p50", percentile(samples, 0.5)), ("p90", percentile(samples, 0.9)), ("p99", percentile(samples, 0.99))))
+
+
+async def replay(agent: UnifiedCustomerSupportAgent, workload, concurrency: int):
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    latencies, phases = [], {phase: [] for phase in PHASES}
+
+    async def worker():
+        while not queue.empty():
+            item = queue.get_nowait()
+            timings = {}
+            start = time.perf_counter()
+            await agent.handle_request(item["email"], item["request"], timings=timings)
+            latencies.append(time.perf_counter() - start)
+            for phase in PHASES:
+                if phase in timings:
+                    phases[phase].append(timings[phase])
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, phases
+
+
+async def run(args):
+    workload = load_workload(args.workload) * args.repeat
+    backend_options = {}
+    if args.backend == "stub":
+        backend_options = {"plan_latency": args.plan_latency, "synthesis_latency": args.synthesis_latency, "seed": args.seed,
+                           "prompt_cache_min_tokens": args.prompt_cache_min_tokens}
+
+    set_verbose(args.verbose)
+    tracer.sample_rate = args.trace_sample
+    if args.trace_file:
+        tracer.exporter = JSONLinesExporter(args.trace_file)
+    if args.trace_memory:
+        tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = UnifiedCustomerSupportAgent(create_backend(args.backend, **backend_options), tool_calling=args.tool_calling)
+        if args.no_plan_cache:
+            agent.plan_cache.cache.max_entries = 0
+        if args.no_result_cache:
+            for cache in agent.mcp_client.result_cache.caches.values():
+                cache.max_entries = 0
+        await agent.startup()
+        try:
+            start = time.perf_counter()
+            latencies, phases = await replay(agent, workload, args.concurrency)
+            elapsed = time.perf_counter() - start
+        finally:
+            await agent.shutdown()
+
+    print(f"{len(workload)} requests | backend {args.backend} | concurrency {args.concurrency}")
+    print(f"wall time {elapsed:.2f}s | throughput {len(workload) / elapsed:.1f} req/s")
+    print(f"{'end-to-end':10} {describe(latencies)}")
+    for phase in PHASES:
+        if phases[phase]:
+            print(f"{phase:10} {describe(phases[phase])}")
+    print(f"plan cache {agent.plan_cache.stats()}")
+    print(f"llm usage  {agent.llm.usage.snapshot()}")
+    print(f"mcp client {agent.mcp_client.stats()}")
+    print(f"prefetch   {agent.plan_executor.prefetcher.stats()}")
+    if tracer.enabled:
+        print(f"tracing    sample rate {tracer.sample_rate} | {len(tracer.buffer)} spans buffered")
+    print(f"max RSS    {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+    if args.trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"traced     current {current / 1024:.1f} KiB | peak {peak / 1024:.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--repeat", type=int, default=10, help="Replay the workload this many times")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="stub")
+    parser.add_argument("--plan-latency", default="fixed:0.05", help="Stub latency spec, e.g. uniform:0.2,0.6")
+    parser.add_argument("--synthesis-latency", default="fixed:0.05", help="Stub latency spec, e.g. lognormal:0.5,0.3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prompt-cache-min-tokens", type=int, default=1024, help="Smallest prompt the stub treats as prefix-cacheable")
+    parser.add_argument("--tool-calling", action="store_true", help="Answer with native tool calling instead of plan-then-synthesize")
+    parser.add_argument("--no-plan-cache", action="store_true")
+    parser.add_argument("--no-result-cache", action="store_true", help="Disable MCPClient's read-only tool result cache")
+    parser.add_argument("--verbose", action="store_true", help="Keep the per-call console dumps on (as in the CLI)")
+    parser.add_argument("--trace-sample", type=float, default=0.0, help="Fraction of requests to trace")
+    parser.add_argument("--trace-file", help="Export spans as JSON lines to this file")
+    parser.add_argument("--trace-memory", action="store_true", help="Track Python allocations with tracemalloc (slower)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
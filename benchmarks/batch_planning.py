@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Batch planning benchmark: one planning call per request vs one per batch.
+
+Replays benchmarks/workload.jsonl through handle_request (one planning round-trip
+per request, run at --concurrency) and through handle_requests_batch (one planning
+round-trip per --batch-size requests), with the plan cache off so every request
+needs a plan. Reports wall-clock throughput and requests per 1k LLM tokens.
+
+    python -m benchmarks.batch_planning --repeat 20 --batch-size 16 --plan-latency lognormal:0.8,0.3
+
+The stub charges one plan latency per call whatever its size, so the wall-clock
+gain is an upper bound; the token numbers follow the prompts actually sent.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.agent_e2e import DEFAULT_WORKLOAD, load_workload
+from llm_backends import create_backend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+
+async def run_mode(workload, args, batched: bool):
+    agent = UnifiedCustomerSupportAgent(create_backend("stub", plan_latency=args.plan_latency,
+                                                      synthesis_latency=args.synthesis_latency, seed=args.seed))
+    agent.plan_cache.cache.max_entries = 0
+    await agent.startup()
+    try:
+        start = time.perf_counter()
+        if batched:
+            await agent.handle_requests_batch([(item["email"], item["request"]) for item in workload], batch_size=args.batch_size)
+        else:
+            queue = list(reversed(workload))
+
+            async def worker():
+                while queue:
+                    item = queue.pop()
+                    await agent.handle_request(item["email"], item["request"])
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await agent.shutdown()
+    return elapsed, agent.llm.usage.snapshot()
+
+
+async def run(args):
+    workload = load_workload(args.workload) * args.repeat
+    set_verbose(False)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["one at a time"] = await run_mode(workload, args, batched=False)
+        results[f"batch of {args.batch_size}"] = await run_mode(workload, args, batched=True)
+
+    print(f"{len(workload)} requests | plan latency {args.plan_latency} | synthesis latency {args.synthesis_latency}")
+    for label, (elapsed, usage) in results.items():
+        print(f"{label:14} {elapsed:6.2f}s | {len(workload) / elapsed:7.1f} req/s | {usage['requests']:5} LLM calls | "
+              f"{usage['prompt_tokens']:8} prompt + {usage['completion_tokens']:7} completion tokens | "
+              f"{len(workload) * 1000 / usage['total_tokens']:6.2f} req per 1k tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--repeat", type=int, default=4, help="Replay the workload this many times")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests on the one-at-a-time path")
+    parser.add_argument("--plan-latency", default="fixed:0.2", help="Stub latency spec, e.g. uniform:0.2,0.6")
+    parser.add_argument("--synthesis-latency", default="fixed:0.05", help="Stub latency spec, e.g. lognormal:0.5,0.3")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
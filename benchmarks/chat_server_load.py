@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Load test for chat_server.ChatServer with a stubbed LLM backend.
+
+Starts the server on localhost with an agent whose LLM calls just sleep for
+`--llm-latency` seconds and return a canned plan/answer, then opens
+`--sessions` concurrent sessions that each send `--messages` messages.
+Reports throughput, p50/p99 latency and how many requests were shed (503).
+
+    python -m benchmarks.chat_server_load --sessions 300 --messages 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+
+from chat_server import ChatServer
+from llm_backends import StubBackend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+DEMO_EMAILS = ["john@email.com", "sarah@email.com", "mike@email.com", "lisa@email.com", "alex@email.com"]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection per session; httpx's pool gets slow with hundreds of connections."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, port: int):
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def post(self, path: str, payload):
+        body = json.dumps(payload).encode()
+        self.writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(head.split(" ", 2)[1])
+        length = next(int(line.split(":", 1)[1]) for line in head.split("\r\n") if line.lower().startswith("content-length:"))
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_session(port: int, index: int, messages: int, latencies, failures):
+    connection = await Connection.open(port)
+    try:
+        status, body = await connection.post("/sessions", {"email": DEMO_EMAILS[index % len(DEMO_EMAILS)]})
+        if status != 201:
+            failures[status] = failures.get(status, 0) + 1
+            return
+        for n in range(messages):
+            start = time.perf_counter()
+            status, _ = await connection.post(f"/sessions/{body['session_id']}/messages", {"message": f"Where is my order? ({n})"})
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures[status] = failures.get(status, 0) + 1
+    finally:
+        connection.close()
+
+
+async def run(args):
+    set_verbose(False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = UnifiedCustomerSupportAgent(StubBackend(latency=args.llm_latency))
+        server = ChatServer(agent, port=0, max_concurrent=args.max_concurrent, max_queued=args.max_queued)
+        await server.start()
+    latencies, failures = [], {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(run_session(server.port, i, args.messages, latencies, failures) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    health = server.stats()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await server.shutdown()
+
+    print(f"{args.sessions} sessions x {args.messages} messages, LLM latency {args.llm_latency * 1000:.0f} ms, max_concurrent {args.max_concurrent}")
+    print(f"completed {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)")
+    if latencies:
+        print(f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms | p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"rejected: {failures or 'none'} | server stats: {health}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--max-concurrent", type=int, default=64)
+    parser.add_argument("--max-queued", type=int, default=1024)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
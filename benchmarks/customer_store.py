@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Lookup throughput of CustomerStore over a large synthetic catalogue.
+
+Builds N synthetic Shopify and Stripe customers (one order and one charge
+each), times index construction, then measures lookups/sec for every index
+and compares against the old linear next(...) scan on a small sample.
+
+    python -m benchmarks.customer_store --customers 1000000
+"""
+
+import argparse
+import random
+import time
+
+from customer_store import CustomerStore
+
+
+def build_catalogue(count: int):
+    shopify, stripe = [], []
+    for i in range(count):
+        email = f"user{i}@example.com"
+        shopify.append({"id": f"customer_{i}", "email": email, "first_name": "User", "last_name": str(i),
+                        "orders": [{"order_number": str(100000 + i), "id": f"order_{i}", "status": "delivered"}]})
+        stripe.append({"id": f"cus_{i}", "email": email, "payment_methods": [],
+                       "charges": [{"id": f"ch_{i}", "amount": 1000, "currency": "usd", "status": "succeeded"}]})
+    return {"shopify": {"customers": shopify}, "stripe": {"customers": stripe}}
+
+
+def measure(label: str, lookup, keys):
+    start = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:28} {len(keys) / elapsed:>14,.0f} lookups/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--scans", type=int, default=20, help="Linear scans to time for the baseline")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = build_catalogue(args.customers)
+    print(f"Generated {args.customers:,} customers in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    store = CustomerStore(data)
+    print(f"Built indexes in {time.perf_counter() - start:.2f}s")
+
+    ids = [random.randrange(args.customers) for _ in range(args.lookups)]
+    print("Indexed lookups:")
+    measure("email -> customer", store.find_customer, [f"user{i}@example.com" for i in ids])
+    measure("customer id -> customer", store.get_customer, [f"customer_{i}" for i in ids])
+    measure("order number -> order", store.find_order, [str(100000 + i) for i in ids])
+    measure("email -> payment customer", store.find_payment_customer, [f"user{i}@example.com" for i in ids])
+    measure("charge id -> charge", store.get_charge, [f"ch_{i}" for i in ids])
+
+    customers = data["shopify"]["customers"]
+    print("Linear scan baseline:")
+    measure("email -> customer", lambda email: next((c for c in customers if c["email"] == email), None),
+            [f"user{i}@example.com" for i in ids[:args.scans]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Email delivery: one provider request per send_order_update vs the batched background queue.
+
+"direct" awaits a single-recipient mail/send request inside every tool call, as the
+old synchronous path would against a real provider. "queued" is EmailMCPServer as
+shipped: the tool call only enqueues, and the worker sends batched personalizations.
+Both use LocalSink with --provider-latency per request. Reports tool-call latency
+(the part the customer's request waits for) and emails/s until everything is delivered.
+
+    python -m benchmarks.email_queue --emails 20000 --concurrency 256 --provider-latency 0.15
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.agent_e2e import percentile
+from email_queue import EmailQueue, LocalSink
+from mcp_agent import EmailMCPServer, set_verbose
+
+
+class DirectEmailServer:
+    """send_order_update that waits for its own provider request."""
+
+    def __init__(self, sink: LocalSink):
+        self.sink = sink
+        self.ids = 0
+
+    async def handle_tool_call(self, tool_name, args):
+        self.ids += 1
+        job = {"message_id": f"msg_{self.ids}", "to": args["to"], "subject": f"Order Update - {args['order_number']}",
+               "body": f"Hi {args['customer_name']}! Your order {args['order_number']} has been updated.",
+               "template_id": "d-order_update", "template_data": {"customer_name": args["customer_name"], "order_number": args["order_number"]}}
+        await self.sink.send(EmailQueue.build_request([job]), [job])
+        return {"result": {"email_id": job["message_id"]}}
+
+
+async def drive(server, args):
+    remaining = iter(range(args.emails))
+    latencies = []
+
+    async def caller():
+        for i in remaining:
+            started = time.perf_counter()
+            await server.handle_tool_call("send_order_update", {"to": f"customer{i}@example.com", "customer_name": "Sam", "order_number": str(1000 + i)})
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(caller() for _ in range(args.concurrency)))
+    return latencies
+
+
+async def run(args):
+    set_verbose(False)
+    results = {}
+    direct_sink = LocalSink(latency=args.provider_latency)
+    start = time.perf_counter()
+    latencies = await drive(DirectEmailServer(direct_sink), args)
+    results["direct"] = (latencies, time.perf_counter() - start, direct_sink)
+
+    queued_sink = LocalSink(latency=args.provider_latency)
+    server = EmailMCPServer(EmailQueue(queued_sink, max_batch=args.batch_size, flush_interval=args.flush_interval))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        latencies = await drive(server, args)
+        await server.queue.flush()
+    results["queued"] = (latencies, time.perf_counter() - start, queued_sink)
+    stats = server.queue.stats()
+    await server.aclose()
+
+    print(f"{args.emails} emails | concurrency {args.concurrency} | provider latency {args.provider_latency * 1000:.0f} ms/request")
+    for label, (latencies, elapsed, sink) in results.items():
+        print(f"{label:7} {args.emails / elapsed:9.0f} emails/s | {sink.requests:6} provider requests | "
+              f"tool call mean {sum(latencies) / len(latencies) * 1e6:9.1f} us | p99 {percentile(latencies, 0.99) * 1e6:9.1f} us")
+    print(f"queue   {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--provider-latency", type=float, default=0.1, help="Seconds per provider request")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Personalizations per request")
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Compare a fresh httpx.AsyncClient per call against the pooled SimpleOpenAIClient.
+
+Runs a local OpenAI-compatible stub server and counts how many TCP connections
+each strategy opens. The stub speaks plain HTTP, so the numbers only include
+the TCP handshake; against api.openai.com every new connection also pays TLS.
+
+    python -m benchmarks.http_pool --calls 200
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.openai_stub import StubOpenAIServer
+from llm_backends import SimpleOpenAIClient
+
+async def per_call_client(base_url: str, calls: int) -> float:
+    # The previous behaviour: a new AsyncClient (and connection) for every request
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.1}
+    start = time.perf_counter()
+    for _ in range(calls):
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(f"{base_url}/chat/completions", json=payload)
+            response.json()
+    return time.perf_counter() - start
+
+
+async def pooled_client(base_url: str, calls: int) -> float:
+    client = SimpleOpenAIClient("stub-key", base_url=base_url, http2=False)
+    await client.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await client.chat_completions_create("stub", [{"role": "user", "content": "hi"}])
+        return time.perf_counter() - start
+    finally:
+        await client.aclose()
+
+
+async def run(calls: int, latency: float):
+    for label, strategy in (("per-call client", per_call_client), ("pooled client", pooled_client)):
+        server = StubOpenAIServer(latency)
+        base_url = await server.start()
+        try:
+            elapsed = await strategy(base_url, calls)
+        finally:
+            await server.stop()
+        print(f"{label:16} {calls} calls in {elapsed:.3f}s | {elapsed / calls * 1000:.2f} ms/call | {server.connections} connections opened")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency per request in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Scaling benchmark: MCP tool calls sharded over 1..N worker processes.
+
+Concurrent callers look up find_customer and get_customer_payments for many
+distinct customer emails, so calls spread across shards. By default the workers
+keep their per-call console logging on (sent to /dev/null), as a stand-in for the
+server-side work that competes for the agent's GIL when everything runs in one process.
+
+    python -m benchmarks.mcp_pool --max-workers 8 --calls 20000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+from customer_store import CustomerStore
+from mcp_agent import create_servers, mock_data, set_verbose
+from mcp_pool import MCPWorkerPool
+
+TOOLS = (("shopify-server", "find_customer"), ("stripe-server", "get_customer_payments"))
+
+
+async def drive(servers, args) -> float:
+    emails = [f"customer{i}@example.com" for i in range(args.customers)]
+    remaining = iter(range(args.calls))
+
+    async def caller():
+        for i in remaining:
+            server_name, tool_name = TOOLS[i % len(TOOLS)]
+            await servers[server_name].handle_tool_call(tool_name, {"email": emails[i % len(emails)]})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(args.concurrency)))
+    return time.perf_counter() - start
+
+
+async def run(args):
+    set_verbose(not args.quiet_servers)
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = await drive(create_servers(CustomerStore(mock_data)), args)
+    print(f"{args.calls} calls | {args.customers} customers | concurrency {args.concurrency} | {os.cpu_count()} CPUs")
+    print(f"{'in-process':12} {args.calls / elapsed:9.0f} calls/s")
+
+    env = dict(os.environ, MCP_VERBOSE="0" if args.quiet_servers else "1")
+    counts = sorted({1, *(n for n in (2, 4, 8, 16, 32) if n < args.max_workers), args.max_workers})
+    baseline = None
+    for workers in counts:
+        pool = MCPWorkerPool(workers, env=env, stderr=asyncio.subprocess.DEVNULL, health_interval=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await pool.start()
+        try:
+            elapsed = await drive(pool.servers(), args)
+        finally:
+            await pool.aclose()
+        throughput = args.calls / elapsed
+        baseline = baseline or throughput
+        calls = pool.stats()["calls"]
+        print(f"{workers:2} worker{'s' if workers > 1 else ' '}   {throughput:9.0f} calls/s | speedup {throughput / baseline:4.2f}x | "
+              f"busiest shard {max(calls) / max(sum(calls), 1):5.1%} of calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quiet-servers", action="store_true", help="Turn off the workers' per-call console logging")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
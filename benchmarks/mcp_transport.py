@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""MCP call overhead: in-process servers vs JSON-RPC over stdio and a Unix socket.
+
+For each transport it times sequential find_customer calls (one round-trip at a
+time), the same calls pipelined on one connection, and JSON-RPC batches.
+
+    python -m benchmarks.mcp_transport --calls 5000 --batch-size 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.agent_e2e import percentile
+from customer_store import CustomerStore
+from mcp_agent import create_servers, mock_data, set_verbose
+from mcp_transport import connect_stdio, connect_unix, remote_servers
+
+ARGS = {"email": "john@email.com"}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def start_unix_server(path: str, env):
+    process = await asyncio.create_subprocess_exec(sys.executable, "-m", "mcp_transport", "--unix", path,
+                                                   cwd=REPO_ROOT, env=env, stderr=asyncio.subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            return process, await connect_unix(path)
+        except OSError:
+            await asyncio.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Unix socket server did not start")
+
+
+async def measure(label: str, server, connection, args):
+    latencies = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        await server.handle_tool_call("find_customer", ARGS)
+        latencies.append(time.perf_counter() - start)
+    sequential = sum(latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(server.handle_tool_call("find_customer", ARGS) for _ in range(args.calls)))
+    pipelined = time.perf_counter() - start
+
+    line = f"{label:11} sequential {args.calls / sequential:9.0f} calls/s | pipelined {args.calls / pipelined:9.0f} calls/s"
+    if connection is not None:
+        call = ("tools/call", {"name": "find_customer", "arguments": ARGS, "_meta": {"server": "shopify-server"}})
+        start = time.perf_counter()
+        for _ in range(args.calls // args.batch_size):
+            await connection.batch([call] * args.batch_size)
+        line += f" | batch of {args.batch_size} {args.calls // args.batch_size * args.batch_size / (time.perf_counter() - start):9.0f} calls/s"
+    print(line)
+    print(f"{'':11} round-trip mean {sequential / args.calls * 1e6:7.1f} us | p50 {percentile(latencies, 0.5) * 1e6:7.1f} us | "
+          f"p99 {percentile(latencies, 0.99) * 1e6:7.1f} us")
+
+
+async def run(args):
+    set_verbose(False)
+    env = dict(os.environ, MCP_VERBOSE="0")
+    print(f"{args.calls} find_customer calls per mode")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        local = create_servers(CustomerStore(mock_data))["shopify-server"]
+    await measure("in-process", local, None, args)
+
+    connection = await connect_stdio(env=env)
+    try:
+        await measure("stdio", (await remote_servers(connection))["shopify-server"], connection, args)
+    finally:
+        await connection.aclose()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process, connection = await start_unix_server(os.path.join(tmp, "mcp.sock"), env)
+        try:
+            await measure("unix socket", (await remote_servers(connection))["shopify-server"], connection, args)
+        finally:
+            await connection.aclose()
+            process.terminate()
+            await process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Minimal OpenAI-compatible HTTP/1.1 server for local benchmarks.
+
+Answers every POST to /chat/completions with a fixed completion. Requests with
+"stream": true get the same content back as server-sent events, one token per
+event, with `token_delay` seconds between tokens.
+"""
+
+import asyncio
+import json
+
+
+class StubOpenAIServer:
+    def __init__(self, latency: float = 0.0, content: str = "ok", token_delay: float = 0.0):
+        self.latency = latency
+        self.content = content
+        self.token_delay = token_delay
+        self.connections = 0
+        self._server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                payload = json.loads(await reader.readexactly(length)) if length else {}
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if payload.get("stream"):
+                    await self._write_stream(writer)
+                else:
+                    await self._write_completion(writer)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write_completion(self, writer):
+        if self.token_delay:
+            await asyncio.sleep(self.token_delay * len(self.content.split()))
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": self.content}}]}).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+
+    async def _write_stream(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        tokens = [token + " " for token in self.content.split()]
+        for token in tokens:
+            event = json.dumps({"choices": [{"index": 0, "delta": {"content": token}}]})
+            self._write_chunk(writer, f"data: {event}\n\n".encode())
+            await writer.drain()
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
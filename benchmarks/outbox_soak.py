@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Soak test: resident memory while millions of emails go through LocalSink into each outbox.
+
+"list" is the old unbounded sent_emails list, "memory" the MemoryOutbox ring and
+"sqlite" the ring plus SQLiteOutbox history (rotated at --max-history rows). Each
+store runs in its own process, so their RSS does not mix. The report shows RSS
+at ten checkpoints, the send rate, the longest single send (how long the event loop
+was held), and a by_recipient() lookup time at the end.
+
+    python -m benchmarks.outbox_soak --sends 1000000
+
+The "list" run grows by roughly 50 MiB per 100k sends; leave it out with --stores memory,sqlite for longer soaks.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from email_queue import LocalSink
+from outbox import MemoryOutbox, SQLiteOutbox
+
+STORES = ("list", "memory", "sqlite")
+
+
+def rss_mib() -> float:
+    """Current resident set size (peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def soak(args, directory: str):
+    if args.store == "list":
+        outbox = []
+    elif args.store == "memory":
+        outbox = MemoryOutbox(args.capacity)
+    else:
+        outbox = SQLiteOutbox(os.path.join(directory, "outbox.db"), args.capacity, max_history=args.max_history)
+    sink = LocalSink(outbox)
+    checkpoints = []
+    worst = 0.0
+    start = time.perf_counter()
+    for offset in range(0, args.sends, args.batch):
+        jobs = [{"message_id": f"msg_{i}", "to": f"customer{i % args.recipients}@example.com", "subject": f"Order Update - {i}",
+                 "body": f"Hi Sam! Your order {i} has been updated."} for i in range(offset, min(offset + args.batch, args.sends))]
+        sent = time.perf_counter()
+        await sink.send({}, jobs)
+        worst = max(worst, time.perf_counter() - sent)
+        if (offset + args.batch) % (args.sends // 10) < args.batch:
+            checkpoints.append(rss_mib())
+    await sink.aclose()
+    elapsed = time.perf_counter() - start
+
+    lookup = "n/a"
+    if args.store != "list":
+        started = time.perf_counter()
+        found = outbox.by_recipient("customer42@example.com", limit=20)
+        lookup = f"{(time.perf_counter() - started) * 1e6:.0f} us for {len(found)} emails"
+    size = ""
+    if args.store == "sqlite":
+        size = f" | history {outbox.history_size()} rows, {os.path.getsize(outbox.path) / 2 ** 20:.1f} MiB on disk, {outbox.rotations} rotations"
+        outbox.close()
+    print(f"{args.store:7} {args.sends / elapsed:9.0f} sends/s | worst send {worst * 1000:6.1f} ms | RSS MiB " + " ".join(f"{value:6.1f}" for value in checkpoints))
+    print(f"{'':7} by_recipient {lookup}{size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=1_000_000)
+    parser.add_argument("--stores", default=",".join(STORES), help="Comma-separated stores to compare")
+    parser.add_argument("--store", choices=STORES, help="Run one store in this process (default: each in a subprocess)")
+    parser.add_argument("--capacity", type=int, default=1000, help="Ring size")
+    parser.add_argument("--max-history", type=int, default=200_000, help="SQLite rows kept after rotation")
+    parser.add_argument("--recipients", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1000, help="Emails per sink request, as the queue batches them")
+    args = parser.parse_args()
+
+    if args.store:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(soak(args, directory))
+        return
+    print(f"{args.sends} sends | ring {args.capacity} | sqlite history {args.max_history} rows", flush=True)
+    for store in args.stores.split(","):
+        subprocess.run([sys.executable, "-m", "benchmarks.outbox_soak", *sys.argv[1:], "--store", store], check=True)
+
+
+if __name__ == "__main__":
+    main()
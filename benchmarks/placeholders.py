@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: placeholder resolution over large plans, legacy if-chain vs compiled programs.
+
+"legacy" is the previous implementation: a regex scan of every argument to infer
+dependencies, then, per step, a dict of the results it depends on and the
+five-name if-chain over a copy of its arguments. "compiled" is
+placeholders.compile_plan() followed by StepProgram.resolve() per step. Plans repeat
+the stub's five-step pattern (lookups, action, email) up to each --steps size.
+"resolve only" reuses programs compiled once, which is the per-step cost while a plan runs.
+
+    python -m benchmarks.placeholders --steps 5,500,50000
+"""
+
+import argparse
+import re
+import time
+
+from customer_store import CustomerStore
+from mcp_agent import mock_data
+from placeholders import compile_plan
+
+LEGACY_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+LEGACY_SOURCES = {
+    "customer_name": ("shopify-server.find_customer",),
+    "customer_id": ("shopify-server.find_customer",),
+    "order_number": ("shopify-server.get_order_status", "shopify-server.find_customer"),
+    "order_id": ("shopify-server.get_order_status", "shopify-server.find_customer"),
+    "charge_id": ("stripe-server.get_customer_payments",),
+}
+
+
+def legacy_dependencies(tool_plan):
+    dependencies, latest = [], {}
+    for index, step in enumerate(tool_plan):
+        needed = set()
+        for key, value in step["args"].items():
+            if isinstance(value, str):
+                needed.update(name for name in LEGACY_PATTERN.findall(value) if name in LEGACY_SOURCES)
+                if key in ("order_number", "order_id", "customer_id") and value in ("unknown", "ORDER_NUMBER_PLACEHOLDER"):
+                    needed.add(key)
+        dependencies.append({latest[tool] for name in needed for tool in LEGACY_SOURCES[name] if tool in latest})
+        latest[step["tool"]] = index
+    return dependencies
+
+
+def legacy_resolve(args, execution_results):
+    resolved = args.copy()
+    customer = execution_results.get("shopify-server.find_customer")
+    if resolved.get("customer_name") == "{{customer_name}}":
+        resolved["customer_name"] = customer.get("first_name", "Valued Customer") if customer else "Valued Customer"
+    if resolved.get("order_number") in ("{{order_number}}", "unknown", "ORDER_NUMBER_PLACEHOLDER"):
+        order = execution_results.get("shopify-server.get_order_status")
+        if order:
+            resolved["order_number"] = order.get("order_number", "Unknown")
+        elif customer and customer.get("orders"):
+            resolved["order_number"] = customer["orders"][0].get("order_number", "Unknown")
+        else:
+            resolved["order_number"] = "General Inquiry"
+    if resolved.get("order_id") in ("{{order_id}}", "unknown", "ORDER_NUMBER_PLACEHOLDER"):
+        order = execution_results.get("shopify-server.get_order_status")
+        if order:
+            resolved["order_id"] = order.get("id", "unknown")
+        elif customer and customer.get("orders"):
+            resolved["order_id"] = customer["orders"][0].get("id", "unknown")
+        else:
+            resolved["order_id"] = "unknown"
+    if resolved.get("customer_id") in ("{{customer_id}}", "unknown", "ORDER_NUMBER_PLACEHOLDER"):
+        resolved["customer_id"] = customer.get("id", "unknown") if customer else "unknown"
+    if resolved.get("charge_id") == "{{charge_id}}":
+        payment_data = execution_results.get("stripe-server.get_customer_payments")
+        if payment_data and payment_data.get("charges"):
+            resolved["charge_id"] = payment_data["charges"][0].get("id", "unknown")
+        else:
+            resolved["charge_id"] = "unknown"
+    return resolved
+
+
+def build_plan(repeats: int, email: str):
+    pattern = [
+        {"tool": "shopify-server.find_customer", "args": {"email": email}},
+        {"tool": "shopify-server.get_order_status", "args": {"order_number": "{{order_number}}", "customer_email": email}},
+        {"tool": "stripe-server.get_customer_payments", "args": {"email": email}},
+        {"tool": "action-server.process_refund", "args": {"charge_id": "{{charge_id}}", "reason": "requested_by_customer"}},
+        {"tool": "email-server.send_order_update", "args": {"to": email, "customer_name": "{{customer_name}}", "order_number": "{{order_number}}"}},
+    ]
+    return [dict(step) for _ in range(repeats) for step in pattern]
+
+
+def run_legacy(tool_plan, results):
+    dependencies = legacy_dependencies(tool_plan)
+    return [legacy_resolve(step["args"], {tool_plan[d]["tool"]: results[d] for d in sorted(dependencies[index])})
+            for index, step in enumerate(tool_plan)]
+
+
+def run_compiled(tool_plan, results):
+    return [program.resolve(results) for program in compile_plan(tool_plan)]
+
+
+def bench(tool_plan, results, rounds: int):
+    assert run_legacy(tool_plan, results) == run_compiled(tool_plan, results)
+    print(f"{len(tool_plan)}-step plan | {rounds} rounds")
+    timings = {}
+    for label, run in (("legacy", run_legacy), ("compiled", run_compiled)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            run(tool_plan, results)
+        timings[label] = (time.perf_counter() - start) / rounds
+        print(f"  {label:14} {timings[label] * 1000:9.3f} ms/plan | {timings[label] / len(tool_plan) * 1e6:6.2f} us/step")
+
+    programs = compile_plan(tool_plan)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for program in programs:
+            program.resolve(results)
+    resolve_only = (time.perf_counter() - start) / rounds
+    print(f"  {'resolve only':14} {resolve_only * 1000:9.3f} ms/plan | {resolve_only / len(tool_plan) * 1e6:6.2f} us/step")
+    print(f"  compiled vs legacy: {timings['legacy'] / timings['compiled']:.2f}x end to end, {timings['legacy'] / resolve_only:.2f}x resolve only")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", default="5,500,5000", help="Comma-separated plan lengths")
+    parser.add_argument("--work", type=int, default=200_000, help="Steps resolved per variant and plan length")
+    args = parser.parse_args()
+
+    store = CustomerStore(mock_data)
+    email = "alex@email.com"
+    lookups = {"shopify-server.find_customer": store.find_customer(email),
+               "shopify-server.get_order_status": store.find_order("1005", customer_email=email),
+               "stripe-server.get_customer_payments": {"charges": store.find_payment_customer(email)["charges"]}}
+    for steps in (int(n) for n in args.steps.split(",")):
+        tool_plan = build_plan(max(1, steps // 5), email)
+        results = [lookups.get(step["tool"], {"success": True}) for step in tool_plan]
+        bench(tool_plan, results, max(1, args.work // len(tool_plan)))
+
+
+if __name__ == "__main__":
+    main()
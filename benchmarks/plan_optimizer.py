@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Plan optimizer: steps removed per plan, and the tool calls that saves, over a replayed workload.
+
+The stub backend writes clean plans, so this injects the faults real LLM plans
+show, each with probability --fault-rate per plan:
+- a repeated customer or payment lookup
+- a tool that does not exist
+- an action with a required argument missing
+- an action whose {{...}} reference names a step that never ran
+- a second, conflicting action
+
+The run replays the workload with the optimizer off and then on. The plan
+cache, result cache and prefetch are off, so every request plans and every call
+reaches the client. It reports the steps removed per plan by reason, tool calls
+per request (client calls, and server calls after coalescing), failed steps and
+latency. Conflicting actions are valid plans, so they are counted but kept.
+
+    python -m benchmarks.plan_optimizer --fault-rate 0.5 --tool-latency fixed:0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+from collections import Counter
+
+from benchmarks.agent_e2e import DEFAULT_WORKLOAD, describe, load_workload, replay
+from benchmarks.prefetch import add_latency
+from llm_backends import STUB_ACTIONS, LatencyModel, create_backend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+
+def add_faults(plan_steps, rate: float, seed: int):
+    """Wrap StubBackend._plan_steps so that its plans carry the faults above."""
+    rng = random.Random(seed)
+
+    def noisy(email, request):
+        steps = plan_steps(email, request)
+        action = len(steps) - 2
+        if rng.random() < rate:
+            steps.insert(action, dict(steps[rng.choice((0, 2))], reasoning="Look up the customer again"))
+        if rng.random() < rate:
+            steps.insert(1, {"tool": "shopify-server.get_tracking_info", "args": {"email": email}, "reasoning": "Check the carrier tracking"})
+        if rng.random() < rate:
+            steps.insert(-1, {"tool": "action-server.upgrade_shipping", "args": {"order_id": "{{order_id}}"}, "reasoning": "Upgrade shipping"})
+        if rng.random() < rate:
+            steps.insert(-1, {"tool": "action-server.apply_credit", "args": {"customer_id": "{{get_loyalty_account.customer_id}}", "amount": "$5"},
+                              "reasoning": "Apply a loyalty credit"})
+        if rng.random() < rate:
+            steps.insert(-1, rng.choice(STUB_ACTIONS)[1])
+        return steps
+
+    return noisy
+
+
+async def run_mode(workload, args, optimize: bool):
+    llm = create_backend("stub", plan_latency=args.plan_latency, synthesis_latency=args.synthesis_latency, seed=args.seed)
+    llm._plan_steps = add_faults(llm._plan_steps, args.fault_rate, args.seed)
+    agent = UnifiedCustomerSupportAgent(llm)
+    agent.optimize_plans = optimize
+    agent.speculative_prefetch = False
+    agent.plan_cache.cache.max_entries = 0
+    for cache in agent.mcp_client.result_cache.caches.values():
+        cache.max_entries = 0
+
+    server_calls = Counter()
+    latency = LatencyModel(args.tool_latency, args.seed)
+    for name, server in agent.mcp_client.servers.items():
+        add_latency(server, latency)
+        handle_tool_call = server.handle_tool_call
+
+        async def counted(tool_name, tool_args, name=name, handle_tool_call=handle_tool_call):
+            server_calls[name] += 1
+            return await handle_tool_call(tool_name, tool_args)
+
+        server.handle_tool_call = counted
+
+    removed_per_plan = Counter()
+    optimize_plan = agent.plan_optimizer.optimize_positions
+
+    def record(tool_plan):
+        optimized, removed, positions, programs = optimize_plan(tool_plan)
+        removed_per_plan[sum(removed.values())] += 1
+        return optimized, removed, positions, programs
+
+    agent.plan_optimizer.optimize_positions = record
+
+    failed = []
+    execute = agent.plan_executor.execute
+
+    async def counted_execute(tool_plan, prefetched=None, programs=None):
+        results = await execute(tool_plan, prefetched, programs)
+        failed.append(sum(isinstance(result, dict) and "error" in result for result in results.values()))
+        return results
+
+    agent.plan_executor.execute = counted_execute
+
+    await agent.startup()
+    try:
+        start = time.perf_counter()
+        latencies, phases = await replay(agent, workload, args.concurrency)
+        elapsed = time.perf_counter() - start
+        client_calls = agent.mcp_client.calls
+    finally:
+        await agent.shutdown()
+    return {"elapsed": elapsed, "latencies": latencies, "tools": phases["tools"], "client_calls": client_calls,
+            "server_calls": sum(server_calls.values()), "failed": sum(failed), "removed_per_plan": removed_per_plan,
+            "stats": agent.plan_optimizer.stats()}
+
+
+async def run(args):
+    workload = load_workload(args.workload) * args.repeat
+    set_verbose(False)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["optimizer off"] = await run_mode(workload, args, optimize=False)
+        results["optimizer on"] = await run_mode(workload, args, optimize=True)
+
+    print(f"{len(workload)} requests | fault rate {args.fault_rate} | concurrency {args.concurrency} | tool latency {args.tool_latency}")
+    for label, result in results.items():
+        count = len(workload)
+        print(f"{label:14} {count / result['elapsed']:7.1f} req/s | {result['client_calls'] / count:5.2f} tool calls/request "
+              f"({result['server_calls'] / count:5.2f} reaching servers) | {result['failed'] / count:5.2f} failed steps/request")
+        print(f"  end-to-end {describe(result['latencies'])}")
+        print(f"  tools      {describe(result['tools'])}")
+
+    result = results["optimizer on"]
+    stats = result["stats"]
+    print(f"steps removed  {stats['steps_in'] - stats['steps_out']} of {stats['steps_in']} ({stats['removed_per_plan']:.2f} per plan) | "
+          + ", ".join(f"{reason} {count}" for reason, count in stats["removed"].items()))
+    print("per plan       " + " | ".join(f"{removed} removed: {plans} plans" for removed, plans in sorted(result["removed_per_plan"].items())))
+    print(f"kept as written {stats['unchanged']} of {stats['plans']} plans")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--repeat", type=int, default=4, help="Replay the workload this many times")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fault-rate", type=float, default=0.3, help="Chance of each injected fault per plan")
+    parser.add_argument("--plan-latency", default="fixed:0.05", help="Stub latency spec for the planning call")
+    parser.add_argument("--synthesis-latency", default="fixed:0.05", help="Stub latency spec for the answer")
+    parser.add_argument("--tool-latency", default="fixed:0.02", help="Latency spec added to every MCP server call")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Planning prompt size and build cost: pretty-printed JSON catalogue vs the compact, precomputed prefixes.
+
+The legacy prompt re-serialized the tool catalogue with json.dumps(indent=2) on
+every request and put the request in the middle, so no two prompts shared a long
+prefix. The current prompt is a static prefix compiled once plus the request at the end:
+"compact" is the one sent to backends without prefix caching, "cached" adds the
+worked examples sent to backends with it (LLMBackend.supports_prompt_cache).
+Token counts come from tiktoken when it is installed, else the len/4 heuristic.
+"uncached" is what a provider with automatic prefix caching still bills at the full
+rate once the prefix is warm: it caches prompts of at least 1024 tokens, and only
+whole 128-token blocks of the shared prefix.
+
+    python -m benchmarks.planning_prompt
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.agent_e2e import DEFAULT_WORKLOAD, load_workload
+from llm_backends import count_tokens
+from mcp_agent import CACHED_PLANNING_PROMPT_PREFIX, PLANNING_GUIDELINES, PLANNING_PROMPT_PREFIX, PLANNING_SYSTEM_PROMPT, TOOL_CATALOG
+
+
+def legacy_prompt(customer_email: str, request: str) -> str:
+    return f"""You are a proactive customer support AI agent with the power to take immediate action. Analyze this customer request and plan which tools to use.
+
+Available tools: {json.dumps(TOOL_CATALOG, indent=2)}
+
+Customer request: "{request}"
+Customer email: {customer_email}
+
+{PLANNING_GUIDELINES}
+
+Respond with a JSON array of tool plans in this exact format:
+[{{"tool": "server-name.tool_name", "args": {{"param1": "value1"}}, "reasoning": "Why you chose this tool and what action you're taking"}}]"""
+
+
+def compact_prompt(customer_email: str, request: str) -> str:
+    return f"""{PLANNING_PROMPT_PREFIX}Customer request: "{request}"
+Customer email: {customer_email}"""
+
+
+def cached_prompt(customer_email: str, request: str) -> str:
+    return f"""{CACHED_PLANNING_PROMPT_PREFIX}Customer request: "{request}"
+Customer email: {customer_email}"""
+
+
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK = 128
+
+
+def shared_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--iterations", type=int, default=20000, help="Prompt builds to time per variant")
+    args = parser.parse_args()
+    workload = [(item["email"], item["request"]) for item in load_workload(args.workload)]
+    system_tokens = count_tokens(PLANNING_SYSTEM_PROMPT)
+
+    print(f"{len(workload)} workload requests | system prompt {system_tokens} tokens (sent with every variant)")
+    results = {}
+    for label, build in (("legacy", legacy_prompt), ("compact", compact_prompt), ("cached", cached_prompt)):
+        prompts = [build(email, request) for email, request in workload]
+        tokens = sum(count_tokens(p) for p in prompts) / len(prompts)
+        prefix = min(shared_prefix(prompts[0], p) for p in prompts[1:])
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            build(*workload[i % len(workload)])
+        build_us = (time.perf_counter() - start) / args.iterations * 1e6
+        shared = system_tokens + count_tokens(prompts[0][:prefix])
+        cacheable = shared // PROMPT_CACHE_BLOCK * PROMPT_CACHE_BLOCK if shared >= PROMPT_CACHE_MIN_TOKENS else 0
+        uncached = system_tokens + tokens - cacheable
+        results[label] = (system_tokens + tokens, uncached)
+        print(f"{label:8} {tokens:7.1f} tokens/request | {shared:5} tokens shared by every prompt | {uncached:7.1f} uncached | build {build_us:6.2f} us")
+
+    for label, cached in (("compact", False), ("cached", True)):
+        legacy = results["legacy"][1 if cached else 0]
+        saved = legacy - results[label][1 if cached else 0]
+        billing = "uncached input tokens, with prefix caching" if cached else "input tokens, without prefix caching"
+        print(f"{label:8} saves {saved:7.1f} {billing} ({saved / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Speculative prefetch: customer lookups started during planning vs after it.
+
+Replays the workload with and without agent.speculative_prefetch. Every MCP
+server call sleeps for --tool-latency to stand in for the Shopify and Stripe
+APIs. The plan cache and the tool result cache are off, so every request plans
+and every lookup reaches a server. Reports end-to-end latency, the prefetch hit
+ratio and the lookup latency hidden behind the planning call.
+
+    python -m benchmarks.prefetch --plan-latency lognormal:0.6,0.3 --tool-latency uniform:0.05,0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.agent_e2e import DEFAULT_WORKLOAD, describe, load_workload, replay
+from llm_backends import LatencyModel, create_backend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+
+def add_latency(server, latency: LatencyModel):
+    handle_tool_call = server.handle_tool_call
+
+    async def delayed(tool_name, args):
+        await asyncio.sleep(latency.sample())
+        return await handle_tool_call(tool_name, args)
+
+    server.handle_tool_call = delayed
+
+
+async def run_mode(workload, args, prefetch: bool):
+    agent = UnifiedCustomerSupportAgent(create_backend("stub", plan_latency=args.plan_latency, synthesis_latency=args.synthesis_latency,
+                                                       seed=args.seed))
+    agent.speculative_prefetch = prefetch
+    agent.plan_cache.cache.max_entries = 0
+    for cache in agent.mcp_client.result_cache.caches.values():
+        cache.max_entries = 0
+    latency = LatencyModel(args.tool_latency, args.seed)
+    for server in agent.mcp_client.servers.values():
+        add_latency(server, latency)
+    await agent.startup()
+    try:
+        start = time.perf_counter()
+        latencies, phases = await replay(agent, workload, args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await agent.shutdown()
+    return elapsed, latencies, phases["tools"], agent.plan_executor.prefetcher.stats()
+
+
+async def run(args):
+    workload = load_workload(args.workload) * args.repeat
+    set_verbose(False)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["no prefetch"] = await run_mode(workload, args, prefetch=False)
+        results["prefetch"] = await run_mode(workload, args, prefetch=True)
+
+    print(f"{len(workload)} requests | concurrency {args.concurrency} | plan latency {args.plan_latency} | tool latency {args.tool_latency}")
+    for label, (elapsed, latencies, tools, stats) in results.items():
+        print(f"{label:12} {len(workload) / elapsed:7.1f} req/s")
+        print(f"  end-to-end {describe(latencies)}")
+        print(f"  tools      {describe(tools)}")
+    stats = results["prefetch"][3]
+    print(f"prefetch     {stats['hits']}/{stats['launched']} lookups used ({stats['hit_ratio']:.0%}), {stats['wasted']} discarded | "
+          f"{stats['saved_seconds'] / len(workload) * 1000:.1f} ms of lookup time per request overlapped with planning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--repeat", type=int, default=4, help="Replay the workload this many times")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--plan-latency", default="fixed:0.2", help="Stub latency spec for the planning call")
+    parser.add_argument("--synthesis-latency", default="fixed:0.2", help="Stub latency spec for the answer")
+    parser.add_argument("--tool-latency", default="fixed:0.1", help="Latency spec added to every MCP server call")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Time-to-first-token vs. total latency for buffered and streamed completions.
+
+Uses the local OpenAI stub, which emits one token every `--token-delay`
+seconds, so the numbers isolate how long the user waits before seeing text.
+
+    python -m benchmarks.streaming --tokens 100 --token-delay 0.01
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.openai_stub import StubOpenAIServer
+from llm_backends import SimpleOpenAIClient
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+async def buffered(client: SimpleOpenAIClient):
+    start = time.perf_counter()
+    response = await client.chat_completions_create("stub", MESSAGES)
+    response["choices"][0]["message"]["content"]
+    total = time.perf_counter() - start
+    return total, total
+
+
+async def streamed(client: SimpleOpenAIClient):
+    start = time.perf_counter()
+    first = None
+    async for _ in client.chat_completions_stream("stub", MESSAGES):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def run(tokens: int, token_delay: float, runs: int):
+    server = StubOpenAIServer(content=" ".join(f"tok{i}" for i in range(tokens)), token_delay=token_delay)
+    base_url = await server.start()
+    client = SimpleOpenAIClient("stub-key", base_url=base_url, http2=False)
+    try:
+        for label, mode in (("buffered", buffered), ("streamed", streamed)):
+            samples = [await mode(client) for _ in range(runs)]
+            ttft = sum(s[0] for s in samples) / runs
+            total = sum(s[1] for s in samples) / runs
+            print(f"{label:9} first token {ttft * 1000:8.1f} ms | total {total * 1000:8.1f} ms")
+    finally:
+        await client.aclose()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.tokens, args.token_delay, args.runs))
+
+
+if __name__ == "__main__":
+    main()
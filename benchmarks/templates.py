@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Template rendering: compiled renderers vs naive str.replace and per-call regex.
+
+"str.replace" substitutes every {{name}} with a replace() call per value on each
+render, "regex" re-scans the template with re.sub on each render, "compiled" is
+TemplateRegistry.render() and "compiled bulk" is render_many() over all rows.
+Renders the demo's order_update template (subject and body) and a longer
+campaign template with more placeholders.
+
+    python -m benchmarks.templates --rows 200000
+"""
+
+import argparse
+import time
+
+from mcp_agent import mock_data
+from templates import PLACEHOLDER_PATTERN, TemplateRegistry
+
+CAMPAIGN = {
+    "subject": "{{customer_name}}, your {{product}} order {{order_number}} is on its way",
+    "body": ("Hi {{customer_name}},\n\nGood news: order {{order_number}} ({{product}}) shipped on {{shipped_date}} via {{carrier}}. "
+             "Track it with {{tracking}}. It should arrive by {{expected_delivery}}.\n\nAs a thank-you we've added {{credit}} "
+             "in store credit to your account {{customer_id}}.\n\nQuestions? Reply to this email and quote {{order_number}}."),
+}
+
+
+def naive_replace(template, values):
+    rendered = {}
+    for part, text in template.items():
+        for name, value in values.items():
+            text = text.replace("{{" + name + "}}", str(value))
+        rendered[part] = text
+    return rendered
+
+
+def regex_sub(template, values):
+    return {part: PLACEHOLDER_PATTERN.sub(lambda m: str(values[m.group(1)]), text) for part, text in template.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="Recipients rendered per variant")
+    args = parser.parse_args()
+
+    source = {"order_update": mock_data["email"]["templates"]["order_update"], "campaign": CAMPAIGN}
+    registry = TemplateRegistry(source)
+    for name, template in source.items():
+        fields = registry.get(name).fields
+        rows = [{field: f"{field}-{i}" for field in fields} for i in range(args.rows)]
+        assert naive_replace(template, rows[0]) == regex_sub(template, rows[0]) == registry.render(name, rows[0])
+        variants = (
+            ("str.replace", lambda: [naive_replace(template, row) for row in rows]),
+            ("regex", lambda: [regex_sub(template, row) for row in rows]),
+            ("compiled", lambda: [registry.render(name, row) for row in rows]),
+            ("compiled bulk", lambda: registry.render_many(name, rows)),
+        )
+        print(f"{name} ({len(fields)} placeholders, {sum(len(text) for text in template.values())} chars)")
+        baseline = None
+        for label, run in variants:
+            start = time.perf_counter()
+            run()
+            rate = args.rows / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"  {label:14} {rate:10.0f} renders/s | {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Two-phase planning vs native tool calling: LLM round-trips, latency and tokens per request.
+
+The two-phase flow makes a planning call, runs the plan, then makes a synthesis
+call. Tool-calling mode keeps one conversation: the model asks for tools, the
+agent runs each turn's calls in parallel and sends the results back until the
+model answers. The plan cache is off so every two-phase request plans.
+
+    python -m benchmarks.tool_calling --plan-latency lognormal:0.6,0.3 --synthesis-latency lognormal:0.8,0.3
+
+The stub needs three tool-calling turns (lookups; order status, action and
+email; answer) because its action arguments come from the lookups. A model
+that fills them in from the placeholders it already knows can get away with two.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.agent_e2e import DEFAULT_WORKLOAD, describe, load_workload, replay
+from llm_backends import create_backend
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+
+async def run_mode(workload, args, tool_calling: bool):
+    agent = UnifiedCustomerSupportAgent(create_backend("stub", plan_latency=args.plan_latency, synthesis_latency=args.synthesis_latency,
+                                                       seed=args.seed), tool_calling=tool_calling)
+    agent.plan_cache.cache.max_entries = 0
+    await agent.startup()
+    try:
+        start = time.perf_counter()
+        latencies, _ = await replay(agent, workload, args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        await agent.shutdown()
+    return elapsed, latencies, agent.llm.usage.snapshot(), agent.mcp_client.calls
+
+
+async def run(args):
+    workload = load_workload(args.workload) * args.repeat
+    set_verbose(False)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["two-phase"] = await run_mode(workload, args, tool_calling=False)
+        results["tool calling"] = await run_mode(workload, args, tool_calling=True)
+
+    print(f"{len(workload)} requests | concurrency {args.concurrency} | plan latency {args.plan_latency} | synthesis latency {args.synthesis_latency}")
+    for label, (elapsed, latencies, usage, tool_calls) in results.items():
+        print(f"{label:12} {len(workload) / elapsed:7.1f} req/s | {usage['requests'] / len(workload):4.2f} LLM round-trips/request | "
+              f"{tool_calls / len(workload):4.2f} tool calls/request | "
+              f"{usage['prompt_tokens'] / len(workload):7.1f} prompt ({usage['cached_ratio']:4.0%} cached) + "
+              f"{usage['completion_tokens'] / len(workload):5.1f} completion tokens/request")
+        print(f"{'':12} {describe(latencies)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--repeat", type=int, default=4, help="Replay the workload this many times")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--plan-latency", default="fixed:0.2", help="Stub latency spec for planning and tool-calling turns")
+    parser.add_argument("--synthesis-latency", default="fixed:0.2", help="Stub latency spec for the answer")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
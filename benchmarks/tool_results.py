@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: JSON text round-trips vs structured tool results.
+
+"text round-trip" is the old path: the server json.dumps its result into a text
+item, the executor json.loads it back, and synthesis json.dumps it into the prompt.
+"structured" is the new path: tool_result() keeps the payload, the executor
+reads it with tool_payload(), and the only encode is the one made for the
+prompt. Reports CPU time per call and transient peak memory per call.
+
+    python -m benchmarks.tool_results --iterations 200000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from customer_store import CustomerStore
+from mcp_agent import mock_data
+from tool_results import tool_payload, tool_result
+
+
+def text_round_trip(payload):
+    result = {"content": [{"type": "text", "text": json.dumps(payload)}]}
+    parsed = json.loads(result["content"][0]["text"])
+    return json.dumps(parsed)
+
+
+def structured(payload):
+    result = tool_result(payload)
+    return json.dumps(tool_payload(result))
+
+
+def peak_bytes(fn, payload) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(payload)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    store = CustomerStore(mock_data)
+    customer = store.find_customer("john@email.com")
+    payloads = {
+        "find_customer": customer,
+        "get_order_status": store.find_order("1001", customer_email="john@email.com"),
+        "get_customer_payments": {key: store.find_payment_customer("john@email.com")[key] for key in ("payment_methods", "charges")},
+    }
+
+    for tool, payload in payloads.items():
+        print(f"{tool} ({len(json.dumps(payload))} bytes of JSON)")
+        timings = {}
+        for label, fn in (("text round-trip", text_round_trip), ("structured", structured)):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                fn(payload)
+            timings[label] = (time.perf_counter() - start) / args.iterations
+            print(f"  {label:16} {timings[label] * 1e6:6.2f} us/call | peak {peak_bytes(fn, payload):6} bytes/call")
+        print(f"  speedup {timings['text round-trip'] / timings['structured']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
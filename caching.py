@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+CUSTOMER_EMAIL_PLACEHOLDER = "{{customer_email}}"
+PLACEHOLDER_PATTERN = re.compile(r"\{\{[^{}]*\}\}")
+
+# Literal arguments that stand for "fill this in" rather than a value (see placeholders.py)
+SENTINEL_VALUES = ("unknown", "ORDER_NUMBER_PLACEHOLDER")
+
+# Fields whose values identify a customer's records; cached tool results are
+# tagged with them so a write to that customer can find and drop them
+CUSTOMER_TAG_FIELDS = ("email", "customer_email", "to", "id", "customer_id", "order_id", "order_number", "charge_id")
+
+# Arguments that name a customer or one of their records. A literal here is only reusable when it
+# is the customer's own email or quoted in the request; other arguments (reason, amount, new_method,
+# tier, payment_method, ...) are policy, the same for everyone asking the same thing.
+IDENTIFYING_ARGS = frozenset(CUSTOMER_TAG_FIELDS + ("customer_name", "name", "first_name", "last_name", "original_order"))
+
+# Record fields whose values identify a customer; a plan literal equal to one of them was copied
+# from a lookup result (see customer_values())
+CUSTOMER_VALUE_FIELDS = CUSTOMER_TAG_FIELDS + ("first_name", "last_name", "name", "product", "tracking", "last4", "description")
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and self.clock() - entry[1] < self.ttl
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, stored_at = entry
+        if self.clock() - stored_at >= self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, stored_at: Optional[float] = None):
+        self._entries[key] = (value, self.clock() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._entries.clear()
+
+    def items(self):
+        """(key, value, stored_at) for every live entry, least recently used first."""
+        now = self.clock()
+        return [(key, value, stored_at) for key, (value, stored_at) in self._entries.items() if now - stored_at < self.ttl]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _replace_strings(value: Any, old: str, new: str) -> Any:
+    if isinstance(value, str):
+        return value.replace(old, new)
+    if isinstance(value, dict):
+        return {k: _replace_strings(v, old, new) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_strings(v, old, new) for v in value]
+    return value
+
+
+class PlanCache:
+    """Caches parsed tool plans by normalized request intent.
+
+    The customer email is abstracted into {{customer_email}} both in the key and
+    in the stored plan, so the same question from different customers shares
+    one entry. With `path` set, entries are reloaded on startup and written to a
+    JSON file off the event loop, at most once per `save_delay` seconds;
+    aclose() writes whatever is still pending.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600.0, path: Optional[str] = None, save_delay: float = 1.0):
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.path = path
+        self.save_delay = save_delay
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_lock = asyncio.Lock()
+        if path:
+            self._load()
+
+    @staticmethod
+    def normalize(request: str, customer_email: str) -> str:
+        text = request.lower().replace(customer_email.lower(), CUSTOMER_EMAIL_PLACEHOLDER)
+        text = EMAIL_PATTERN.sub(CUSTOMER_EMAIL_PLACEHOLDER, text)
+        text = re.sub(r"[^\w{}#\s]", " ", text)
+        return " ".join(text.split())
+
+    def get(self, request: str, customer_email: str) -> Optional[List[Dict[str, Any]]]:
+        plan = self.cache.get(self.normalize(request, customer_email))
+        if plan is None:
+            return None
+        return _replace_strings(plan, CUSTOMER_EMAIL_PLACEHOLDER, customer_email)
+
+    @staticmethod
+    def is_reusable(request: str, customer_email: str, tool_plan: List[Dict[str, Any]], customer_values: Iterable[str] = ()) -> bool:
+        """True if no argument would identify this customer when the plan is replayed for another one.
+
+        A literal is rejected in an identifying argument (IDENTIFYING_ARGS), or anywhere if it is
+        another email or one of `customer_values`, the identifying values of this customer's
+        records. Those literals are allowed when they are the customer's own email, a {{...}}
+        reference or quoted in the request. Policy literals ("express", "$10") are kept.
+        """
+        request = request.lower()
+        customer_email = customer_email.lower()
+        customer_values = {value.lower() for value in customer_values}
+        for step in tool_plan:
+            for key, value in (step.get("args") or {}).items():
+                if value is None or isinstance(value, bool):
+                    continue
+                if not isinstance(value, (str, int, float)):
+                    return False
+                text = str(value).strip().lower()
+                if not text or text in SENTINEL_VALUES or text == customer_email or text in request:
+                    continue
+                if "{{" in text and not PLACEHOLDER_PATTERN.sub("", text).strip():
+                    continue
+                if key in IDENTIFYING_ARGS or EMAIL_PATTERN.search(text) or text in customer_values:
+                    return False
+        return True
+
+    def put(self, request: str, customer_email: str, tool_plan: List[Dict[str, Any]], customer_values: Iterable[str] = ()):
+        if not self.is_reusable(request, customer_email, tool_plan, customer_values):
+            return
+        template = _replace_strings(tool_plan, customer_email, CUSTOMER_EMAIL_PLACEHOLDER)
+        self.cache.set(self.normalize(request, customer_email), template)
+        if self.path:
+            self._schedule_save()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in entries:
+            if self.cache.clock() - entry["stored_at"] < self.cache.ttl:
+                self.cache.set(entry["key"], entry["plan"], stored_at=entry["stored_at"])
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        return [{"key": key, "plan": plan, "stored_at": stored_at} for key, plan, stored_at in self.cache.items()]
+
+    def _schedule_save(self):
+        if self._save_task is not None:
+            # The pending save will include this entry
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save(self._entries())
+            return
+        self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        self._save_task = None
+        async with self._save_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._save, self._entries())
+
+    async def aclose(self):
+        pending, self._save_task = self._save_task, None
+        if pending is not None:
+            pending.cancel()
+        # Also waits for a save already being written
+        async with self._save_lock:
+            if pending is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self._save, self._entries())
+
+    def _save(self, entries: List[Dict[str, Any]]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def customer_values(value: Any, values: Optional[Set[str]] = None) -> Set[str]:
+    """Collect the values of CUSTOMER_VALUE_FIELDS found anywhere in a customer's records."""
+    if values is None:
+        values = set()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in CUSTOMER_VALUE_FIELDS and isinstance(item, (str, int)) and not isinstance(item, bool) and item != "":
+                values.add(str(item).lower())
+            else:
+                customer_values(item, values)
+    elif isinstance(value, list):
+        for item in value:
+            customer_values(item, values)
+    return values
+
+
+def customer_tags(value: Any, tags: Optional[Set[str]] = None) -> Set[str]:
+    """Collect the identifying values (see CUSTOMER_TAG_FIELDS) found anywhere in tool args or results."""
+    if tags is None:
+        tags = set()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in CUSTOMER_TAG_FIELDS and isinstance(item, (str, int)) and item != "":
+                tags.add(str(item).lower())
+            else:
+                customer_tags(item, tags)
+    elif isinstance(value, list):
+        for item in value:
+            customer_tags(item, tags)
+    return tags
+
+
+class ToolResultCache:
+    """Read-through cache for read-only tool results: one bounded LRU with its own TTL per tool.
+
+    Entries are tagged with the customer identifiers in their args and results.
+    invalidate() widens the identifiers a write touched to the owning customer's
+    email (learned from earlier results) and drops every entry carrying any of
+    them, so a credit applied to customer_001 also evicts john@email.com's
+    payment history. A read that was in flight when one of its tags was
+    invalidated is not stored.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 1024):
+        self.caches = {tool: TTLCache(max_entries=max_entries, ttl=ttl) for tool, ttl in ttls.items()}
+        self.generation = 0
+        self.invalidations = 0
+        self._tagged: Dict[str, Set[Tuple[str, str]]] = {}
+        self._owners: Dict[str, str] = {}
+        self._invalidated_at: Dict[str, int] = {}
+        self._pruned_at = 0
+        self._prune_at = 4 * max(max_entries, 1) * max(len(self.caches), 1)
+
+    def cacheable(self, tool: str) -> bool:
+        return tool in self.caches
+
+    def get(self, tool: str, key: str) -> Optional[Any]:
+        return self.caches[tool].get(key)
+
+    def _widen(self, tags: Iterable[str]) -> Set[str]:
+        tags = set(tags)
+        return tags | {self._owners[tag] for tag in tags if tag in self._owners}
+
+    def put(self, tool: str, key: str, result: Any, tags: Set[str], since: int):
+        """Store `result` unless one of its tags was invalidated after generation `since`."""
+        emails = {tag for tag in tags if EMAIL_PATTERN.fullmatch(tag)}
+        if len(emails) == 1:
+            owner = next(iter(emails))
+            for tag in tags:
+                self._owners[tag] = owner
+        tags = self._widen(tags)
+        if since < self._pruned_at or any(self._invalidated_at.get(tag, -1) > since for tag in tags):
+            return
+        self.caches[tool].set(key, result)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add((tool, key))
+        if len(self._tagged) + len(self._owners) > self._prune_at:
+            self._prune()
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        self.generation += 1
+        dropped = 0
+        for tag in self._widen(tags):
+            self._invalidated_at[tag] = self.generation
+            for tool, key in self._tagged.pop(tag, ()):
+                if self.caches[tool].pop(key) is not None:
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def _prune(self):
+        """Forget tags whose entries have all been evicted or expired."""
+        live = {tool: {key for key, _, _ in cache.items()} for tool, cache in self.caches.items()}
+        self._tagged = {tag: keys for tag, keys in ((tag, {k for k in keys if k[1] in live[k[0]]}) for tag, keys in self._tagged.items()) if keys}
+        self._owners = {tag: owner for tag, owner in self._owners.items() if tag in self._tagged or owner in self._tagged}
+        # Invalidation history goes too, so reads started before this point are not stored
+        self._invalidated_at = {}
+        self._pruned_at = self.generation
+        self._prune_at = max(self._prune_at, 2 * (len(self._tagged) + len(self._owners)))
+
+    def stats(self) -> Dict[str, Any]:
+        per_tool = {tool: cache.stats() for tool, cache in self.caches.items()}
+        hits = sum(s["hits"] for s in per_tool.values())
+        lookups = hits + sum(s["misses"] for s in per_tool.values())
+        return {"hits": hits, "misses": lookups - hits, "hit_ratio": hits / lookups if lookups else 0.0,
+                "evictions": sum(s["evictions"] for s in per_tool.values()), "invalidations": self.invalidations, "tools": per_tool}
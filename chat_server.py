@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""HTTP front-end that serves many customer sessions concurrently.
+
+Endpoints (JSON in, JSON out):
+    POST   /sessions                  {"email": "..."}   -> {"session_id": "..."}
+    POST   /sessions/<id>/messages    {"message": "..."} -> {"response": "...", "latency": 1.23}
+    DELETE /sessions/<id>
+    GET    /health
+
+Every message drives UnifiedCustomerSupportAgent.handle_request. At most
+`max_concurrent` requests run at once; up to `max_queued` more wait for a slot
+and anything beyond that is rejected with 503 so clients back off instead of
+piling up. Messages within one session are handled in order. Sessions idle
+for longer than `session_ttl` seconds are closed, so abandoned ones do not
+count against `max_sessions` forever.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_backends import BACKENDS, UsageCounters, create_backend, global_usage, usage_scope
+from mcp_agent import UnifiedCustomerSupportAgent, set_verbose
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChatSession:
+    def __init__(self, email: str, max_history: int):
+        self.id = uuid.uuid4().hex
+        self.email = email
+        self.history: List[Dict[str, str]] = []
+        self.max_history = max_history
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.usage = UsageCounters()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def record(self, message: str, response: str):
+        self.history.append({"message": message, "response": response})
+        del self.history[:-self.max_history]
+        self.last_active = time.monotonic()
+
+
+class ChatServer:
+    def __init__(self, agent, host: str = "127.0.0.1", port: int = 8080, max_concurrent: int = 64,
+                 max_queued: int = 256, max_sessions: int = 10000, max_history: int = 20, session_ttl: float = 1800.0):
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.max_queued = max_queued
+        self.max_sessions = max_sessions
+        self.max_history = max_history
+        self.session_ttl = session_ttl
+        self.sessions: Dict[str, ChatSession] = {}
+        self._swept_at = time.monotonic()
+        self.expired = 0
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._queued = 0
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = False
+        self._server = None
+        self._connections = set()
+        self.rejected = 0
+        self.completed = 0
+
+    async def start(self):
+        await self.agent.startup()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"✅ Chat server listening on http://{self.host}:{self.port}")
+
+    async def shutdown(self, timeout: float = 30.0):
+        """Stop accepting work, let in-flight requests finish, then release the agent."""
+        self._draining = True
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Shutdown timeout with {self._in_flight} requests still running")
+        for writer in list(self._connections):
+            writer.close()
+        await self.agent.shutdown()
+        print("👋 Chat server stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self.sessions), "expired_sessions": self.expired, "in_flight": self._in_flight, "queued": self._queued,
+                "completed": self.completed, "rejected": self.rejected, "draining": self._draining, "llm_usage": global_usage.snapshot()}
+
+    # --- HTTP plumbing ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while not self._draining:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as error:
+                    await self._write_response(writer, error.status, {"error": error.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, payload = await self._route(method, path, body)
+                except HTTPError as error:
+                    status, payload = error.status, {"error": error.message}
+                await self._write_response(writer, status, payload, keep_alive and not self._draining)
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Any, bool]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Headers too large")
+        if len(head) > MAX_HEADER_BYTES:
+            raise HTTPError(413, "Headers too large")
+
+        request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        try:
+            method, path, version = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Body too large")
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except asyncio.IncompleteReadError:
+                raise HTTPError(400, "Body shorter than Content-Length")
+            except ValueError:
+                raise HTTPError(400, "Body must be JSON")
+
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method, path, body, keep_alive
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(payload).encode()
+        headers = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", "Content-Type: application/json",
+                   f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: Any) -> Tuple[int, Dict[str, Any]]:
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+
+        if parts == ["health"] and method == "GET":
+            return 200, self.stats()
+
+        if parts == ["sessions"] and method == "POST":
+            return self._create_session(body)
+
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self.sessions.get(parts[1])
+            if session is None:
+                raise HTTPError(404, "Unknown session")
+            session.touch()
+            if len(parts) == 2 and method == "DELETE":
+                del self.sessions[session.id]
+                return 200, {"closed": session.id}
+            if parts[2:] == ["messages"] and method == "POST":
+                return await self._handle_message(session, body)
+            if parts[2:] == ["messages"] and method == "GET":
+                return 200, {"session_id": session.id, "email": session.email, "history": session.history, "usage": session.usage.snapshot()}
+            raise HTTPError(405, "Method not allowed")
+
+        raise HTTPError(404, "Not found")
+
+    # --- Sessions ---
+
+    def _expire_sessions(self):
+        """Close sessions idle for longer than session_ttl; ones with a message in progress are kept."""
+        now = time.monotonic()
+        self._swept_at = now
+        for session in [s for s in self.sessions.values() if now - s.last_active > self.session_ttl and not s.lock.locked()]:
+            del self.sessions[session.id]
+            self.expired += 1
+
+    def _create_session(self, body: Any) -> Tuple[int, Dict[str, Any]]:
+        if self._draining:
+            raise HTTPError(503, "Server is shutting down")
+        if not isinstance(body, dict) or not body.get("email"):
+            raise HTTPError(400, "'email' is required")
+        # Sweep at capacity, and otherwise a few times per TTL so idle sessions do not pile up
+        if len(self.sessions) >= self.max_sessions or time.monotonic() - self._swept_at >= min(60.0, self.session_ttl / 10):
+            self._expire_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise HTTPError(503, "Too many open sessions")
+        session = ChatSession(body["email"], self.max_history)
+        self.sessions[session.id] = session
+        return 201, {"session_id": session.id, "email": session.email}
+
+    async def _handle_message(self, session: ChatSession, body: Any) -> Tuple[int, Dict[str, Any]]:
+        if not isinstance(body, dict) or not str(body.get("message", "")).strip():
+            raise HTTPError(400, "'message' is required")
+        if self._draining:
+            raise HTTPError(503, "Server is shutting down")
+        # Backpressure: refuse instead of queueing without bound once every slot is busy
+        if self._slots.locked() and self._queued >= self.max_queued:
+            self.rejected += 1
+            raise HTTPError(503, "Server busy, retry later")
+
+        message = str(body["message"]).strip()
+        started = time.perf_counter()
+        self._queued += 1
+        waiting = True
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            async with session.lock, self._slots:
+                self._queued -= 1
+                waiting = False
+                with usage_scope(session.usage):
+                    response = await self.agent.handle_request(session.email, message)
+        finally:
+            if waiting:
+                self._queued -= 1
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.set()
+
+        session.record(message, response)
+        self.completed += 1
+        return 200, {"session_id": session.id, "response": response, "latency": time.perf_counter() - started}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Serve the customer support agent over HTTP")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=os.getenv("LLM_BACKEND", "openai"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrent", type=int, default=64)
+    parser.add_argument("--max-queued", type=int, default=256)
+    parser.add_argument("--session-ttl", type=float, default=1800.0, help="Close sessions idle for this many seconds")
+    parser.add_argument("--verbose", action="store_true", help="Print every MCP/API request and response")
+    args = parser.parse_args()
+    set_verbose(args.verbose)
+
+    server = ChatServer(UnifiedCustomerSupportAgent(create_backend(args.backend)), args.host, args.port, args.max_concurrent, args.max_queued,
+                        session_ttl=args.session_ttl)
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
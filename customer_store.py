@@ -0,0 +1,114 @@
+from typing import Any, Dict, Optional, Tuple
+
+
+class CustomerStore:
+    """Hash-indexed access to the Shopify and Stripe customer records in mock_data.
+
+    The store wraps the existing lists (records are shared, not copied) and keeps
+    its indexes consistent as long as mutations go through the methods below.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.shopify_customers = data["shopify"]["customers"]
+        self.stripe_customers = data["stripe"]["customers"]
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        self._shopify_by_email: Dict[str, Dict[str, Any]] = {}
+        self._shopify_by_id: Dict[str, Dict[str, Any]] = {}
+        # (customer id, order number) -> order; order numbers are only unique per customer
+        self._orders: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._orders_by_number: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._stripe_by_email: Dict[str, Dict[str, Any]] = {}
+        self._stripe_by_id: Dict[str, Dict[str, Any]] = {}
+        self._charges_by_id: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        for customer in self.shopify_customers:
+            self._index_shopify_customer(customer)
+        for customer in self.stripe_customers:
+            self._index_stripe_customer(customer)
+
+    def _index_shopify_customer(self, customer: Dict[str, Any]):
+        # First record wins on duplicate emails, matching the old next(...) scans
+        self._shopify_by_email.setdefault(customer["email"], customer)
+        self._shopify_by_id[customer["id"]] = customer
+        for order in customer.get("orders", []):
+            self._index_order(customer, order)
+
+    def _index_order(self, customer: Dict[str, Any], order: Dict[str, Any]):
+        # First order wins on duplicate numbers, as the old scans returned it
+        self._orders.setdefault((customer["id"], order["order_number"]), order)
+        self._orders_by_number.setdefault(order["order_number"], (customer, order))
+
+    def _index_stripe_customer(self, customer: Dict[str, Any]):
+        self._stripe_by_email.setdefault(customer["email"], customer)
+        self._stripe_by_id[customer["id"]] = customer
+        for charge in customer.get("charges", []):
+            self._charges_by_id[charge["id"]] = (customer, charge)
+
+    # --- Lookups ---
+
+    def find_customer(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._shopify_by_email.get(email)
+
+    def get_customer(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        return self._shopify_by_id.get(customer_id)
+
+    def find_order(self, order_number: str, customer_email: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The customer's order with this number; without an email, the first order with it."""
+        if customer_email is None:
+            entry = self._orders_by_number.get(order_number)
+            return entry[1] if entry else None
+        customer = self._shopify_by_email.get(customer_email)
+        if customer is None:
+            return None
+        return self._orders.get((customer["id"], order_number))
+
+    def find_payment_customer(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._stripe_by_email.get(email)
+
+    def get_payment_customer(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        return self._stripe_by_id.get(customer_id)
+
+    def get_charge(self, charge_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._charges_by_id.get(charge_id)
+        return entry[1] if entry else None
+
+    # --- Mutations ---
+
+    def add_customer(self, customer: Dict[str, Any]):
+        if customer["id"] in self._shopify_by_id:
+            raise ValueError(f"Customer already exists: {customer['id']}")
+        customer.setdefault("orders", [])
+        self.shopify_customers.append(customer)
+        self._index_shopify_customer(customer)
+
+    def add_order(self, customer_id: str, order: Dict[str, Any]):
+        customer = self._shopify_by_id.get(customer_id)
+        if customer is None:
+            raise ValueError(f"Customer not found: {customer_id}")
+        if (customer_id, order["order_number"]) in self._orders:
+            raise ValueError(f"Order already exists: {order['order_number']}")
+        customer["orders"].append(order)
+        self._index_order(customer, order)
+
+    def add_payment_customer(self, customer: Dict[str, Any]):
+        if customer["id"] in self._stripe_by_id:
+            raise ValueError(f"Payment customer already exists: {customer['id']}")
+        customer.setdefault("payment_methods", [])
+        customer.setdefault("charges", [])
+        self.stripe_customers.append(customer)
+        self._index_stripe_customer(customer)
+
+    def add_charge(self, payment_customer_id: str, charge: Dict[str, Any]):
+        customer = self._stripe_by_id.get(payment_customer_id)
+        if customer is None:
+            raise ValueError(f"Payment customer not found: {payment_customer_id}")
+        customer["charges"].append(charge)
+        self._charges_by_id[charge["id"]] = (customer, charge)
+
+    def change_email(self, old_email: str, new_email: str):
+        for index in (self._shopify_by_email, self._stripe_by_email):
+            customer = index.pop(old_email, None)
+            if customer is not None:
+                customer["email"] = new_email
+                index[new_email] = customer
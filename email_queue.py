@@ -0,0 +1,183 @@
+"""Asynchronous outbound email queue with SendGrid-style batched delivery.
+
+EmailQueue.enqueue() records a job and returns its message id straight away, so
+the customer's request never waits on the mail provider. A background worker
+gathers jobs until `max_batch` are waiting or `flush_interval` seconds have
+passed since the first one. Each flush becomes one mail/send request per
+template, with one `personalizations` entry per recipient. Failed requests are
+retried with exponential backoff and jitter.
+
+Sinks perform the delivery: LocalSink appends the rendered emails to an outbox
+(the demo's mock_data sent_emails, see outbox.py) or a plain list, and
+SendGridSink POSTs to the SendGrid v3 API.
+"""
+
+import asyncio
+import itertools
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# SendGrid accepts at most 1000 personalizations per mail/send request
+MAX_PERSONALIZATIONS = 1000
+
+
+class LocalSink:
+    """Delivers into an outbox or list. `latency` simulates the provider round-trip and
+    `fail_first` makes that many requests fail, to exercise retries. The outbox can be
+    attached after construction (EmailMCPServer.start()); until then a list is used."""
+
+    def __init__(self, outbox: Optional[Any] = None, latency: float = 0.0, fail_first: int = 0):
+        self.outbox = outbox
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+
+    async def send(self, request: Dict[str, Any], jobs: List[Dict[str, Any]]):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            raise ConnectionError("Simulated mail provider failure")
+        sent_at = datetime.now().isoformat()
+        if self.outbox is None:
+            self.outbox = []
+        self.outbox.extend([{"to": job["to"], "subject": job["subject"], "body": job["body"], "message_id": job["message_id"], "sent_at": sent_at}
+                            for job in jobs])
+
+    async def aclose(self):
+        if hasattr(self.outbox, "flush"):
+            # Waits for the outbox's writer thread, so not on the event loop
+            await asyncio.to_thread(self.outbox.flush)
+
+
+class SendGridSink:
+    """POSTs batches to SendGrid's v3 mail/send endpoint over one pooled client."""
+
+    def __init__(self, api_key: str, sender: str, base_url: str = "https://api.sendgrid.com/v3", timeout: float = 30.0):
+        self.api_key = api_key
+        self.sender = sender
+        self.base_url = base_url
+        self.timeout = timeout
+        self._client = None
+
+    async def send(self, request: Dict[str, Any], jobs: List[Dict[str, Any]]):
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, headers={"Authorization": f"Bearer {self.api_key}"}, timeout=self.timeout)
+        response = await self._client.post("/mail/send", json={**request, "from": {"email": self.sender}})
+        if response.status_code >= 300:
+            raise ConnectionError(f"SendGrid error: {response.status_code} - {response.text}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class EmailQueue:
+    def __init__(self, sink, max_batch: int = MAX_PERSONALIZATIONS, flush_interval: float = 0.05, max_retries: int = 5,
+                 backoff: float = 0.1, max_backoff: float = 5.0):
+        self.sink = sink
+        self.max_batch = min(max_batch, MAX_PERSONALIZATIONS)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._ids = itertools.count(1)
+        self._prefix = f"msg_{os.getpid():x}{int(time.time() * 1000):x}"
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.retries = 0
+
+    def enqueue(self, to: str, subject: str, body: str, template_id: str, template_data: Dict[str, Any]) -> str:
+        """Queue one email and return its message id; must be called from the event loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        message_id = f"{self._prefix}_{next(self._ids)}"
+        self._queue.put_nowait({"message_id": message_id, "to": to, "subject": subject, "body": body,
+                                "template_id": template_id, "template_data": template_data})
+        self.enqueued += 1
+        return message_id
+
+    async def _run(self):
+        while True:
+            jobs = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(jobs) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        jobs.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    jobs.append(self._queue.get_nowait())
+            try:
+                await self._deliver(jobs)
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    @staticmethod
+    def build_request(jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One mail/send body for jobs sharing a template."""
+        return {"template_id": jobs[0]["template_id"],
+                "personalizations": [{"to": [{"email": job["to"]}], "dynamic_template_data": job["template_data"],
+                                      "custom_args": {"message_id": job["message_id"]}} for job in jobs]}
+
+    async def _deliver(self, jobs: List[Dict[str, Any]]):
+        by_template: Dict[str, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            by_template.setdefault(job["template_id"], []).append(job)
+        await asyncio.gather(*(self._send_with_retry(self.build_request(group), group) for group in by_template.values()))
+
+    async def _send_with_retry(self, request: Dict[str, Any], jobs: List[Dict[str, Any]]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.sink.send(request, jobs)
+                self.batches += 1
+                self.sent += len(jobs)
+                return
+            except Exception as error:
+                if attempt == self.max_retries:
+                    print(f"❌ Email batch of {len(jobs)} dropped after {attempt + 1} attempts: {error}")
+                    self.failed += len(jobs)
+                    return
+                self.retries += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def flush(self):
+        """Wait until every queued email has been delivered or dropped."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def aclose(self):
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._queue = None
+        if hasattr(self.sink, "aclose"):
+            await self.sink.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enqueued": self.enqueued, "sent": self.sent, "failed": self.failed, "pending": self.enqueued - self.sent - self.failed,
+                "batches": self.batches, "retries": self.retries, "mean_batch": self.sent / self.batches if self.batches else 0.0}
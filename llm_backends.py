@@ -0,0 +1,570 @@
+"""LLM backends for the customer support agent.
+
+Every backend exposes the same interface (complete, stream, batch and token
+accounting) so the agent core never cares which provider it is talking to.
+Backends register themselves by name and are picked at startup with
+create_backend(), e.g. from the --backend flag or the LLM_BACKEND env var.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+
+def get_env_var(key: str, default: str = None) -> str:
+    value = os.getenv(key)
+    if value is None:
+        if default is not None:
+            return str(default)
+        raise ValueError(f"Missing required environment variable: {key}")
+    return str(value)
+
+
+class SimpleOpenAIClient:
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1", max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0, http2: bool = True, timeout: float = 30.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections, keepalive_expiry=keepalive_expiry)
+        self.http2 = http2
+        self.timeout = timeout
+        self._client = None
+
+    async def start(self):
+        # One long-lived, pooled client so planning and synthesis calls reuse warm TCP/TLS connections
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout
+            )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def chat_completions_create(self, model: str, messages: List[Dict], temperature: float = 0.1, prompt_cache_key: Optional[str] = None,
+                                      tools: Optional[List[Dict]] = None):
+        if self._client is None:
+            await self.start()
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if prompt_cache_key:
+            # Routes requests sharing a prefix to the same cache shard
+            payload["prompt_cache_key"] = prompt_cache_key
+        if tools:
+            payload["tools"] = tools
+            payload["parallel_tool_calls"] = True
+        
+        response = await self._client.post("/chat/completions", json=payload)
+        
+        if response.status_code != 200:
+            print(f"❌ OpenAI API error: {response.status_code} - {response.text}")
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        
+        return response.json()
+
+    async def chat_completions_stream(self, model: str, messages: List[Dict], temperature: float = 0.1, usage: Optional[Dict[str, Any]] = None,
+                                      prompt_cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield content deltas from a server-sent-events completion (stream=true).
+
+        If `usage` is given it is filled from the final chunk's token usage.
+        """
+        if self._client is None:
+            await self.start()
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if prompt_cache_key:
+            payload["prompt_cache_key"] = prompt_cache_key
+
+        async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors="replace")
+                print(f"❌ OpenAI API error: {response.status_code} - {body}")
+                raise Exception(f"OpenAI API error: {response.status_code} - {body}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if usage is not None and chunk.get("usage"):
+                    usage.update(chunk["usage"])
+                if chunk.get("choices"):
+                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+
+class ReplicateLLMClient:
+    TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+
+    def __init__(self, base_url: str = "https://api.replicate.com/v1", max_connections: int = 100,
+                 max_keepalive_connections: int = 20, poll_interval: float = 0.5, timeout: float = 60.0):
+        self.model = "ibm-granite/granite-3.3-8b-instruct"
+        self.api_token = get_env_var("REPLICATE_API_TOKEN")
+        self.base_url = base_url
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._client = None
+
+    async def start(self):
+        # Talk to the predictions API directly so waiting on a prediction never ties up a thread
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_token}", "Content-Type": "application/json"},
+                limits=self.limits,
+                timeout=self.timeout
+            )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _build_input(self, messages: list, temperature: float) -> Dict[str, Any]:
+        prompt = "\n".join([m["content"] for m in messages])
+        return {
+            "prompt": prompt,
+            "max_new_tokens": 2000,
+            "min_tokens": 200,
+            "temperature": temperature,
+            "presence_penalty": 0,
+            "frequency_penalty": 0,
+        }
+
+    async def _create_prediction(self, input_data: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        if self._client is None:
+            await self.start()
+        # "Prefer: wait" lets short generations finish within the create call itself
+        headers = {} if stream else {"Prefer": "wait"}
+        response = await self._client.post(f"/models/{self.model}/predictions", json={"input": input_data, "stream": stream}, headers=headers)
+        if response.status_code not in (200, 201):
+            print(f"❌ Replicate API error: {response.status_code} - {response.text}")
+            raise Exception(f"Replicate API error: {response.status_code} - {response.text}")
+        return response.json()
+
+    async def chat_completions_create(self, messages: list, temperature: float = 0.1):
+        prediction = await self._create_prediction(self._build_input(messages, temperature), stream=False)
+        while prediction["status"] not in self.TERMINAL_STATUSES:
+            await asyncio.sleep(self.poll_interval)
+            response = await self._client.get(prediction["urls"]["get"])
+            response.raise_for_status()
+            prediction = response.json()
+        if prediction["status"] != "succeeded":
+            raise Exception(f"Replicate prediction {prediction['status']}: {prediction.get('error')}")
+        output = prediction["output"]
+        if isinstance(output, list):
+            output = "".join(output)
+        metrics = prediction.get("metrics") or {}
+        usage = {"prompt_tokens": metrics.get("input_token_count", 0), "completion_tokens": metrics.get("output_token_count", 0)}
+        return {"choices": [{"message": {"content": output}}], "usage": usage}
+
+    async def chat_completions_stream(self, messages: list, temperature: float = 0.1) -> AsyncIterator[str]:
+        prediction = await self._create_prediction(self._build_input(messages, temperature), stream=True)
+        stream_url = prediction["urls"]["stream"]
+        async with self._client.stream("GET", stream_url, headers={"Accept": "text/event-stream", "Cache-Control": "no-store"}) as response:
+            response.raise_for_status()
+            event, data = "message", []
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    value = line[len("data:"):]
+                    data.append(value[1:] if value.startswith(" ") else value)
+                elif not line:
+                    text = "\n".join(data)
+                    if event == "output" and text:
+                        yield text
+                    elif event == "error":
+                        raise Exception(f"Replicate stream error: {text}")
+                    elif event == "done":
+                        break
+                    event, data = "message", []
+
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> int:
+    """Prompt tokens served from the provider's prefix cache (OpenAI: prompt_tokens_details.cached_tokens)."""
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens", 0) or usage.get("cached_tokens", 0) or 0
+
+
+class UsageCounters:
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, usage: Optional[Dict[str, Any]]):
+        self.requests += 1
+        if usage:
+            self.prompt_tokens += usage.get("prompt_tokens", 0) or 0
+            self.cached_tokens += cached_prompt_tokens(usage)
+            self.completion_tokens += usage.get("completion_tokens", 0) or 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "prompt_tokens": self.prompt_tokens, "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens, "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "cached_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0}
+
+
+# Usage across every backend in the process, plus an optional per-session tally set with usage_scope()
+global_usage = UsageCounters()
+_session_usage: contextvars.ContextVar = contextvars.ContextVar("session_usage", default=None)
+
+
+@contextlib.contextmanager
+def usage_scope(counters: UsageCounters):
+    """Also credit LLM usage recorded inside this block (and tasks started from it) to `counters`."""
+    token = _session_usage.set(counters)
+    try:
+        yield counters
+    finally:
+        _session_usage.reset(token)
+
+
+class LLMBackend:
+    """Interface the agent talks to. Responses use the OpenAI chat-completion shape."""
+
+    name = "base"
+    display_name = "LLM"
+    supports_tools = False
+    # Whether the provider caches repeated prompt prefixes, so a longer static prefix is cheap
+    supports_prompt_cache = False
+
+    def __init__(self):
+        self.usage = UsageCounters()
+
+    def record_usage(self, usage: Optional[Dict[str, Any]]):
+        self.usage.record(usage)
+        global_usage.record(usage)
+        session = _session_usage.get()
+        if session is not None:
+            session.record(usage)
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> AsyncIterator[str]:
+        # Backends without native streaming deliver the whole answer as one chunk
+        response = await self.complete(messages, temperature)
+        yield response["choices"][0]["message"]["content"]
+
+    async def batch(self, requests: List[List[Dict[str, str]]], temperature: float = 0.1) -> List[Dict[str, Any]]:
+        return list(await asyncio.gather(*(self.complete(messages, temperature) for messages in requests)))
+
+    async def complete_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], temperature: float = 0.1) -> Dict[str, Any]:
+        """One turn with native function calling; the reply message carries either "tool_calls" or the final content."""
+        raise NotImplementedError(f"{self.display_name} does not support native tool calling")
+
+
+BACKENDS: Dict[str, Callable[..., LLMBackend]] = {}
+
+
+def register_backend(name: str):
+    def decorator(factory):
+        BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+def create_backend(name: str, **kwargs) -> LLMBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name} (available: {', '.join(sorted(BACKENDS))})")
+    return BACKENDS[name](**kwargs)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose and JSON
+    return max(1, len(text) // 4)
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Exact token count with tiktoken (gpt-4o's encoding) when it is installed, else estimate_tokens."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # Not installed, or the encoding file could not be fetched
+            _encoding = False
+    return len(_encoding.encode(text)) if _encoding else estimate_tokens(text)
+
+
+@register_backend("openai")
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+    display_name = "OpenAI"
+    supports_tools = True
+    supports_prompt_cache = True
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini", prompt_cache_key: Optional[str] = "mcp-agent", **client_options):
+        super().__init__()
+        api_key = api_key or get_env_var("OPENAI_API_KEY")
+        self.model = model
+        self.prompt_cache_key = prompt_cache_key
+        self.client = SimpleOpenAIClient(api_key, **client_options)
+
+    async def start(self):
+        await self.client.start()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> Dict[str, Any]:
+        response = await self.client.chat_completions_create(model=self.model, messages=messages, temperature=temperature, prompt_cache_key=self.prompt_cache_key)
+        self.record_usage(response.get("usage"))
+        return response
+
+    async def complete_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], temperature: float = 0.1) -> Dict[str, Any]:
+        response = await self.client.chat_completions_create(model=self.model, messages=messages, temperature=temperature,
+                                                              prompt_cache_key=self.prompt_cache_key, tools=tools)
+        self.record_usage(response.get("usage"))
+        return response
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> AsyncIterator[str]:
+        usage: Dict[str, Any] = {}
+        async for chunk in self.client.chat_completions_stream(model=self.model, messages=messages, temperature=temperature, usage=usage,
+                                                               prompt_cache_key=self.prompt_cache_key):
+            yield chunk
+        self.record_usage(usage)
+
+
+@register_backend("granite")
+class ReplicateBackend(LLMBackend):
+    name = "granite"
+    display_name = "Granite"
+
+    def __init__(self, **client_options):
+        super().__init__()
+        self.client = ReplicateLLMClient(**client_options)
+
+    async def start(self):
+        await self.client.start()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> Dict[str, Any]:
+        response = await self.client.chat_completions_create(messages=messages, temperature=temperature)
+        content = response["choices"][0]["message"]["content"]
+        if not isinstance(content, str):
+            response["choices"][0]["message"]["content"] = str(content)
+        self.record_usage(response.get("usage"))
+        return response
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> AsyncIterator[str]:
+        # The prediction stream carries no token counts, so estimate them
+        prompt = "\n".join(m["content"] for m in messages)
+        generated = 0
+        async for chunk in self.client.chat_completions_stream(messages=messages, temperature=temperature):
+            generated += len(chunk)
+            yield chunk
+        self.record_usage({"prompt_tokens": estimate_tokens(prompt), "completion_tokens": max(1, generated // 4)})
+
+
+class LatencyModel:
+    """Samples simulated latencies (seconds) from a spec string.
+
+    Specs: "0.2" or "fixed:0.2", "uniform:LOW,HIGH", "normal:MEAN,STDDEV",
+    "lognormal:MEDIAN,SIGMA". Negative samples are clamped to zero.
+    """
+
+    def __init__(self, spec: Any = 0.0, seed: Optional[int] = None):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(":")
+        if not params:
+            kind, params = "fixed", kind
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",")]
+        self.random = random.Random(seed)
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = self.random.uniform(self.params[0], self.params[1])
+        elif self.kind == "normal":
+            value = self.random.gauss(self.params[0], self.params[1])
+        else:
+            value = self.random.lognormvariate(math.log(self.params[0]), self.params[1])
+        return max(0.0, value)
+
+
+# Canned actions for the stub planner, picked by keywords in the customer request
+STUB_ACTIONS = [
+    (("refund", "cancel", "money back"), {"tool": "action-server.process_refund", "args": {"charge_id": "{{charge_id}}", "reason": "requested_by_customer"}, "reasoning": "Refund the cancelled order"}),
+    (("payment", "card", "declined", "charge"), {"tool": "action-server.retry_payment", "args": {"customer_id": "{{customer_id}}", "payment_method": "backup_card"}, "reasoning": "Retry the failed payment"}),
+    (("late", "delay", "slow", "shipping"), {"tool": "action-server.upgrade_shipping", "args": {"order_id": "{{order_id}}", "new_method": "express"}, "reasoning": "Upgrade the delayed shipment"}),
+    (("lost", "missing", "never arrived", "stolen"), {"tool": "action-server.ship_replacement", "args": {"customer_id": "{{customer_id}}", "product": "original item"}, "reasoning": "Ship a replacement"}),
+]
+STUB_DEFAULT_ACTION = {"tool": "action-server.apply_credit", "args": {"customer_id": "{{customer_id}}", "amount": "$10", "reason": "proactive_service"}, "reasoning": "Apply proactive service credit"}
+
+
+@register_backend("stub")
+class StubBackend(LLMBackend):
+    """Offline, deterministic backend: canned plans and answers after a simulated delay.
+
+    Plans pick their action from keywords in the request, and batch planning prompts
+    get one plan per request id. `plan_latency` and `synthesis_latency` take
+    LatencyModel specs (`latency` sets both); a batch planning call costs one plan
+    latency sample regardless of its size. Usage reports cached prompt tokens the
+    way OpenAI's automatic prefix caching would (prompts of at least
+    `prompt_cache_min_tokens`, matched in 128-token blocks).
+
+    In tool-calling mode it asks for the whole plan in one turn, with {{...}}
+    references between dependent calls, then answers; the tool turn costs a plan
+    latency sample, the answer a synthesis sample.
+    """
+
+    name = "stub"
+    display_name = "Stub LLM"
+    supports_tools = True
+    supports_prompt_cache = True
+
+    def __init__(self, latency: Any = 0.0, plan_latency: Any = None, synthesis_latency: Any = None, seed: Optional[int] = 0,
+                 prompt_cache_min_tokens: int = 1024):
+        super().__init__()
+        self.plan_latency = LatencyModel(latency if plan_latency is None else plan_latency, seed)
+        self.synthesis_latency = LatencyModel(latency if synthesis_latency is None else synthesis_latency, None if seed is None else seed + 1)
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self._seen_prefixes = set()
+
+    def _cached_tokens(self, prompt: str) -> int:
+        """Emulate provider prefix caching: long prompts reuse previously seen prefixes in 128-token blocks."""
+        if estimate_tokens(prompt) < self.prompt_cache_min_tokens:
+            return 0
+        if len(self._seen_prefixes) > 100000:
+            self._seen_prefixes.clear()
+        block = 128 * 4
+        digest = hashlib.blake2b(digest_size=16)
+        cached, matching = 0, True
+        for end in range(block, len(prompt) + 1, block):
+            digest.update(prompt[end - block:end].encode())
+            key = digest.copy().digest()
+            if matching and key in self._seen_prefixes:
+                cached = end
+            else:
+                matching = False
+                self._seen_prefixes.add(key)
+        return cached // 4
+
+    @staticmethod
+    def _is_planning(messages: List[Dict[str, str]]) -> bool:
+        return "JSON array" in messages[-1]["content"]
+
+    @staticmethod
+    def _is_batch_planning(messages: List[Dict[str, str]]) -> bool:
+        return "JSON object mapping every request id" in messages[-1]["content"]
+
+    @staticmethod
+    def _plan_steps(email: str, request: str) -> List[Dict[str, Any]]:
+        request = request.lower()
+        action = next((a for keywords, a in STUB_ACTIONS if any(k in request for k in keywords)), STUB_DEFAULT_ACTION)
+        return [
+            {"tool": "shopify-server.find_customer", "args": {"email": email}, "reasoning": "Look up customer information"},
+            {"tool": "shopify-server.get_order_status", "args": {"order_number": "{{order_number}}", "customer_email": email}, "reasoning": "Check the order status"},
+            {"tool": "stripe-server.get_customer_payments", "args": {"email": email}, "reasoning": "Check payment status"},
+            action,
+            {"tool": "email-server.send_order_update", "args": {"to": email, "customer_name": "{{customer_name}}", "order_number": "{{order_number}}"}, "reasoning": "Send email confirmation"}
+        ]
+
+    def _plan(self, prompt: str) -> str:
+        email_match = re.search(r"Customer email: (\S+)", prompt)
+        request_match = re.search(r'Customer request: "(.*)"', prompt)
+        email = email_match.group(1) if email_match else "unknown"
+        request = request_match.group(1) if request_match else ""
+        return f"```json\n{json.dumps(self._plan_steps(email, request))}\n```"
+
+    def _plan_batch(self, prompt: str) -> str:
+        requests_match = re.search(r"^Requests: (\[.*\])$", prompt, re.MULTILINE)
+        items = json.loads(requests_match.group(1)) if requests_match else []
+        plans = {item["id"]: self._plan_steps(item["customer_email"], item["request"]) for item in items}
+        return f"```json\n{json.dumps(plans)}\n```"
+
+    @staticmethod
+    def _synthesize(prompt: str) -> str:
+        return "I've immediately taken care of this for you. Consider it done - you'll receive a confirmation email shortly with all the details."
+
+    def _tool_calls(self, messages: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """The next turn's calls given the conversation so far, or None once it is time to answer."""
+        if any(m["role"] == "assistant" and m.get("tool_calls") for m in messages):
+            return None
+        request = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+        email_match = re.search(r"Customer email: (\S+)", request)
+        request_match = re.search(r'Customer request: "(.*)"', request)
+        email = email_match.group(1) if email_match else "unknown"
+        steps = self._plan_steps(email, request_match.group(1) if request_match else "")
+        # Every call in the first turn, dependent arguments as {{...}} references
+        return [{"id": f"call_{i}", "type": "function", "function": {"name": step["tool"].replace(".", "__"), "arguments": json.dumps(step["args"])}}
+                for i, step in enumerate(steps)]
+
+    async def complete_with_tools(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], temperature: float = 0.1) -> Dict[str, Any]:
+        calls = self._tool_calls(messages)
+        delay = (self.plan_latency if calls else self.synthesis_latency).sample()
+        if delay:
+            await asyncio.sleep(delay)
+        if calls:
+            message = {"role": "assistant", "content": None, "tool_calls": calls}
+            completion = json.dumps(calls)
+        else:
+            message = {"role": "assistant", "content": self._synthesize("")}
+            completion = message["content"]
+        prompt_text = json.dumps(tools) + json.dumps(messages)
+        usage = {"prompt_tokens": estimate_tokens(prompt_text), "completion_tokens": estimate_tokens(completion),
+                 "prompt_tokens_details": {"cached_tokens": self._cached_tokens(prompt_text)}}
+        self.record_usage(usage)
+        return {"choices": [{"message": message, "finish_reason": "tool_calls" if calls else "stop"}], "usage": usage}
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float = 0.1) -> Dict[str, Any]:
+        batch = self._is_batch_planning(messages)
+        planning = batch or self._is_planning(messages)
+        delay = (self.plan_latency if planning else self.synthesis_latency).sample()
+        if delay:
+            await asyncio.sleep(delay)
+        prompt = messages[-1]["content"]
+        content = self._plan_batch(prompt) if batch else self._plan(prompt) if planning else self._synthesize(prompt)
+        prompt_text = "".join(m["content"] for m in messages)
+        usage = {"prompt_tokens": estimate_tokens(prompt_text), "completion_tokens": estimate_tokens(content),
+                 "prompt_tokens_details": {"cached_tokens": self._cached_tokens(prompt_text)}}
+        self.record_usage(usage)
+        return {"choices": [{"message": {"role": "assistant", "content": content}}], "usage": usage}
@@ -0,0 +1,1161 @@
+#!/usr/bin/env python3
+
+import json
+import asyncio
+import logging
+from typing import Dict, List, Any, AsyncIterator, Optional, Set, Tuple
+import os
+import time
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+from caching import PlanCache, ToolResultCache, customer_tags, customer_values
+from customer_store import CustomerStore
+from email_queue import EmailQueue, LocalSink
+from outbox import create_outbox
+from templates import TemplateRegistry
+from llm_backends import BACKENDS, LLMBackend, create_backend
+from mcp_pool import MCPWorkerPool
+from mcp_transport import JSONRPCConnection, connect, remote_servers
+import plan_executor
+from plan_executor import PlanExecutor
+from plan_optimizer import PlanOptimizer
+from placeholders import StepProgram, compile_plan
+from tool_results import tool_payload, tool_result
+from tracing import tracer
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Setup minimal logging
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+# Console dumps of every MCP/API request and response. Handy in the interactive demo, but pure
+# overhead on the hot path of a server, so they can be switched off with MCP_VERBOSE=0 or set_verbose(False).
+VERBOSE = os.getenv("MCP_VERBOSE", "1") != "0"
+
+def set_verbose(enabled: bool):
+    global VERBOSE
+    VERBOSE = enabled
+    plan_executor.VERBOSE = enabled
+
+def log_summary(title: str, data: Any):
+    print(f"\n🔍 {title}")
+    print("-" * 50)
+    if isinstance(data, dict):
+        if "execution_plan" in data:
+            for i, step in enumerate(data["execution_plan"], 1):
+                print(f"  {i}. {step['tool']} - {step['reasoning']}")
+        elif "jsonrpc" in data:
+            method = data.get("params", {}).get("name", data.get("method", "unknown"))
+            print(f"  Method: {method}")
+            if "arguments" in data.get("params", {}):
+                print(f"  Args: {data['params']['arguments']}")
+        elif "result" in data or "error" in data:
+            if "error" in data:
+                print(f"  Error: {data['error']['message']}")
+            else:
+                try:
+                    parsed = tool_payload(data["result"])
+                    if isinstance(parsed, dict) and len(parsed) <= 3:
+                        print(f"  Result: {parsed}")
+                    else:
+                        print(f"  Result: {type(parsed).__name__}")
+                except:
+                    print("  Result: unparseable")
+        else:
+            if "method" in data and "url" in data:
+                print(f"  {data['method']} {data['url']}")
+                if "params" in data:
+                    print(f"  Params: {data['params']}")
+            elif "status" in data:
+                print(f"  Status: {data['status']}")
+                if "body" in data and isinstance(data["body"], dict):
+                    print(f"  Data: {data['body']}")
+    else:
+        print(f"  {data}")
+    print("-" * 50)
+
+# Mock data with realistic customer support scenarios
+mock_data = {
+    "shopify": {
+        "customers": [
+            {
+                "id": "customer_001", "email": "john@email.com", "first_name": "John", "last_name": "Smith",
+                "orders": [{"order_number": "1001", "id": "order_001", "status": "delivered", "product": "Wireless Headphones", "amount": 179.99, "tracking": "1Z999AA1234567890", "shipped_date": "2024-05-20", "delivered_date": "2024-05-22"}]
+            },
+            {
+                "id": "customer_002", "email": "sarah@email.com", "first_name": "Sarah", "last_name": "Johnson",
+                "orders": [{"order_number": "1002", "id": "order_002", "status": "shipping_delayed", "product": "Smart Watch", "amount": 299.99, "tracking": "1Z999BB9876543210", "shipped_date": "2024-05-25", "expected_delivery": "2024-06-10", "delay_reason": "Weather conditions affecting shipping hub"}]
+            },
+            {
+                "id": "customer_003", "email": "mike@email.com", "first_name": "Mike", "last_name": "Brown",
+                "orders": [{"order_number": "1003", "id": "order_003", "status": "payment_failed", "product": "Gaming Laptop", "amount": 1299.99, "tracking": None, "payment_retry_url": "https://checkout.company.com/retry/1003"}]
+            },
+            {
+                "id": "customer_004", "email": "lisa@email.com", "first_name": "Lisa", "last_name": "Davis",
+                "orders": [{"order_number": "1004", "id": "order_004", "status": "lost_in_transit", "product": "Bluetooth Speaker", "amount": 89.99, "tracking": "1Z999CC5432167890", "shipped_date": "2024-05-18", "last_tracking_update": "Package departed carrier facility - May 20, 2024"}]
+            },
+            {
+                "id": "customer_005", "email": "alex@email.com", "first_name": "Alex", "last_name": "Wilson",
+                "orders": [{"order_number": "1005", "id": "order_005", "status": "cancelled_by_customer", "product": "Meta Glasses", "amount": 349.99, "cancelled_date": "2024-05-23", "refund_status": "processing"}]
+            }
+        ]
+    },
+    "stripe": {
+        "customers": [
+            {"id": "cus_001", "email": "john@email.com", "payment_methods": [{"id": "pm_001", "type": "card", "last4": "4242", "brand": "visa", "status": "active"}], "charges": [{"id": "ch_001", "amount": 17999, "currency": "usd", "status": "succeeded", "description": "Order #1001", "created": "2024-05-20"}]},
+            {"id": "cus_002", "email": "sarah@email.com", "payment_methods": [{"id": "pm_002", "type": "card", "last4": "5555", "brand": "mastercard", "status": "active"}], "charges": [{"id": "ch_002", "amount": 29999, "currency": "usd", "status": "succeeded", "description": "Order #1002", "created": "2024-05-25"}]},
+            {"id": "cus_003", "email": "mike@email.com", "payment_methods": [{"id": "pm_003", "type": "card", "last4": "1234", "brand": "visa", "status": "expired"}], "charges": [{"id": "ch_003", "amount": 129999, "currency": "usd", "status": "failed", "description": "Order #1003", "failure_code": "card_declined", "failure_message": "Your card was declined.", "created": "2024-05-28"}]},
+            {"id": "cus_004", "email": "lisa@email.com", "payment_methods": [{"id": "pm_004", "type": "card", "last4": "9999", "brand": "amex", "status": "active"}], "charges": [{"id": "ch_004", "amount": 8999, "currency": "usd", "status": "succeeded", "description": "Order #1004", "created": "2024-05-18"}]},
+            {"id": "cus_005", "email": "alex@email.com", "payment_methods": [{"id": "pm_005", "type": "card", "last4": "7777", "brand": "visa", "status": "active"}], "charges": [{"id": "ch_005", "amount": 14999, "currency": "usd", "status": "refunded", "description": "Order #1005", "refunded": True, "refund_amount": 14999, "created": "2024-05-23"}]}
+        ]
+    },
+    "email": {"templates": {"order_update": {"subject": "Order Update for {{customer_name}}", "body": "Hi {{customer_name}}! Your order {{order_number}} has been updated."}}, "sent_emails": None}
+}
+
+def open_outbox():
+    """This process's sent-email outbox, created on first call (OUTBOX_PATH adds SQLite history).
+
+    Only EmailMCPServer.start() calls it, so only the process that delivers the email opens the
+    database; pool workers that do not host the email server, and a parent whose email server is
+    remote, never do.
+    """
+    if mock_data["email"]["sent_emails"] is None:
+        mock_data["email"]["sent_emails"] = create_outbox(os.getenv("OUTBOX_PATH"))
+    return mock_data["email"]["sent_emails"]
+
+class ShopifyMCPServer:
+    def __init__(self, store: CustomerStore):
+        self.name = "shopify-server"
+        self.read_only_tools = {"find_customer", "get_order_status"}
+        self.store = store
+        self.version = "1.0.0"
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = f"req_{datetime.now().timestamp()}"
+        mcp_request = {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": tool_name, "arguments": args}, "id": request_id}
+        if VERBOSE:
+            log_summary(f"[{self.name}] MCP REQUEST", mcp_request)
+        
+        response = {"jsonrpc": "2.0", "id": request_id, "result": None}
+
+        try:
+            if tool_name == "find_customer":
+                api_request = {"method": "GET", "url": f"https://{self.name}.myshopify.com/admin/api/2023-01/customers.json", "params": {"email": args["email"]}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                customer = self.store.find_customer(args["email"])
+                api_response = {"status": 200 if customer else 404, "body": {"customers": [customer] if customer else [], "count": 1 if customer else 0}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(customer)
+
+            elif tool_name == "get_order_status":
+                api_request = {"method": "GET", "url": f"https://{self.name}.myshopify.com/admin/api/2023-01/orders.json", "params": {"name": args["order_number"], "email": args["customer_email"]}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                order = self.store.find_order(args["order_number"], customer_email=args["customer_email"])
+                
+                api_response = {"status": 200 if order else 404, "body": {"orders": [order] if order else [], "count": 1 if order else 0}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(order)
+
+            else:
+                raise ValueError(f"Unknown tool: {tool_name}")
+
+        except Exception as error:
+            response["error"] = {"code": -32603, "message": "Internal error", "data": str(error)}
+
+        return response
+
+class StripeMCPServer:
+    def __init__(self, store: CustomerStore):
+        self.name = "stripe-server"
+        self.read_only_tools = {"get_customer_payments"}
+        self.store = store
+        self.version = "1.0.0"
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = f"req_{datetime.now().timestamp()}"
+        mcp_request = {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": tool_name, "arguments": args}, "id": request_id}
+        if VERBOSE:
+            log_summary(f"[{self.name}] MCP REQUEST", mcp_request)
+
+        response = {"jsonrpc": "2.0", "id": request_id, "result": None}
+
+        try:
+            if tool_name == "get_customer_payments":
+                api_request = {"method": "GET", "url": "https://api.stripe.com/v1/customers/search", "params": {"query": f"email:'{args['email']}'", "expand": ["data.payment_methods", "data.charges"]}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                customer = self.store.find_payment_customer(args["email"])
+                payment_data = {"payment_methods": customer["payment_methods"] if customer else [], "charges": customer["charges"] if customer else []}
+                
+                api_response = {"status": 200, "body": {"object": "customer", "payment_methods": payment_data["payment_methods"], "charges": {"object": "list", "data": payment_data["charges"]}}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(payment_data)
+
+            else:
+                raise ValueError(f"Unknown tool: {tool_name}")
+
+        except Exception as error:
+            response["error"] = {"code": -32603, "message": "Internal error", "data": str(error)}
+
+        return response
+
+class ActionMCPServer:
+    def __init__(self):
+        self.name = "action-server"
+        self.read_only_tools = set()
+        self.version = "1.0.0"
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = f"req_{datetime.now().timestamp()}"
+        mcp_request = {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": tool_name, "arguments": args}, "id": request_id}
+        if VERBOSE:
+            log_summary(f"[{self.name}] MCP REQUEST", mcp_request)
+
+        response = {"jsonrpc": "2.0", "id": request_id, "result": None}
+
+        try:
+            if tool_name == "process_refund":
+                api_request = {"method": "POST", "url": "https://api.stripe.com/v1/refunds", "body": {"charge": args["charge_id"], "amount": args.get("amount"), "reason": args.get("reason", "requested_by_customer")}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                refund_result = {"refund_id": f"re_{datetime.now().timestamp()}", "amount": args.get("amount", "full"), "status": "processing", "estimated_arrival": "1-2 business days", "expedited": args.get("expedite", False)}
+                api_response = {"status": 200, "body": {"object": "refund", "status": "succeeded", **refund_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(refund_result)
+
+            elif tool_name == "retry_payment":
+                api_request = {"method": "POST", "url": "https://api.stripe.com/v1/payment_intents", "body": {"customer": args["customer_id"], "payment_method": args.get("payment_method"), "confirm": True}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                payment_result = {"payment_id": f"pi_{datetime.now().timestamp()}", "status": "succeeded", "payment_method": args.get("payment_method", "backup_card"), "amount_charged": args.get("amount"), "discount_applied": args.get("discount", 0)}
+                api_response = {"status": 200, "body": {"object": "payment_intent", "status": "succeeded", **payment_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(payment_result)
+
+            elif tool_name == "upgrade_shipping":
+                api_request = {"method": "PUT", "url": f"https://api.shopify.com/orders/{args['order_id']}/shipping", "body": {"shipping_method": args["new_method"], "cost_adjustment": 0}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                shipping_result = {"order_id": args["order_id"], "old_method": args.get("old_method", "standard"), "new_method": args["new_method"], "cost_difference": "waived", "new_delivery_date": args.get("new_delivery_date", "2-3 business days")}
+                api_response = {"status": 200, "body": {"success": True, **shipping_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(shipping_result)
+
+            elif tool_name == "ship_replacement":
+                api_request = {"method": "POST", "url": "https://api.shopify.com/orders", "body": {"customer_id": args["customer_id"], "product": args["product"], "shipping_method": "overnight", "reason": args.get("reason", "lost_package")}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                replacement_result = {"new_order_id": f"repl_{datetime.now().timestamp()}", "original_order": args.get("original_order"), "product": args["product"], "shipping_method": "overnight", "tracking_number": f"1Z999REP{datetime.now().strftime('%Y%m%d')}", "estimated_delivery": "tomorrow by 10 AM"}
+                api_response = {"status": 201, "body": {"success": True, **replacement_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(replacement_result)
+
+            elif tool_name == "apply_credit":
+                api_request = {"method": "POST", "url": "https://api.shopify.com/customers/store_credit", "body": {"customer_id": args["customer_id"], "amount": args["amount"], "reason": args.get("reason", "service_recovery")}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                credit_result = {"credit_id": f"cr_{datetime.now().timestamp()}", "customer_id": args["customer_id"], "amount": args["amount"], "type": args.get("type", "service_credit"), "expires": args.get("expires", "1 year"), "available_immediately": True}
+                api_response = {"status": 200, "body": {"success": True, **credit_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(credit_result)
+
+            elif tool_name == "enable_vip_status":
+                api_request = {"method": "PUT", "url": f"https://api.shopify.com/customers/{args['customer_id']}/vip", "body": {"vip_tier": args.get("tier", "gold"), "benefits": ["priority_support", "free_shipping", "early_access"]}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+                
+                vip_result = {"customer_id": args["customer_id"], "vip_tier": args.get("tier", "gold"), "benefits": ["Priority support", "Free shipping on all orders", "Early access to new products"], "effective_immediately": True, "welcome_bonus": "20% off next order"}
+                api_response = {"status": 200, "body": {"success": True, **vip_result}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result(vip_result)
+
+            else:
+                raise ValueError(f"Unknown tool: {tool_name}")
+
+        except Exception as error:
+            response["error"] = {"code": -32603, "message": "Internal error", "data": str(error)}
+
+        return response
+
+class EmailMCPServer:
+    def __init__(self, queue: Optional[EmailQueue] = None, templates: Optional[TemplateRegistry] = None):
+        self.name = "email-server"
+        self.read_only_tools = set()
+        self.version = "1.0.0"
+        # Delivery happens in the background; the tool call only waits for the job to be queued
+        self.queue = queue or EmailQueue(LocalSink())
+        self.templates = templates or TemplateRegistry(mock_data["email"]["templates"])
+
+    async def start(self):
+        """Attach the process outbox to a LocalSink that has none; opening it may touch the disk, so off the loop."""
+        sink = self.queue.sink
+        if isinstance(sink, LocalSink) and sink.outbox is None:
+            sink.outbox = await asyncio.to_thread(open_outbox)
+
+    async def aclose(self):
+        await self.queue.aclose()
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = f"req_{datetime.now().timestamp()}"
+        mcp_request = {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": tool_name, "arguments": args}, "id": request_id}
+        if VERBOSE:
+            log_summary(f"[{self.name}] MCP REQUEST", mcp_request)
+        
+        response = {"jsonrpc": "2.0", "id": request_id, "result": None}
+
+        try:
+            if tool_name == "send_order_update":
+                api_request = {"method": "POST", "url": "https://api.sendgrid.com/v3/mail/send", "body": {"personalizations": [{"to": [{"email": args["to"]}], "dynamic_template_data": {"customer_name": args["customer_name"], "order_number": args["order_number"]}}], "template_id": "d-order_update"}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API REQUEST", api_request)
+
+                template_data = {"customer_name": args["customer_name"], "order_number": args["order_number"]}
+                email = self.templates.render("order_update", template_data)
+                message_id = self.queue.enqueue(args["to"], email["subject"], email["body"], "d-order_update", template_data)
+                
+                api_response = {"status": 202, "body": {"message": "Order update email queued for delivery", "message_id": message_id}}
+                if VERBOSE:
+                    log_summary(f"[{self.name}] API RESPONSE", api_response)
+                
+                response["result"] = tool_result({"success": True, "email_id": message_id, "message": "Order update email queued for delivery"})
+
+            else:
+                raise ValueError(f"Unknown tool: {tool_name}")
+
+        except Exception as error:
+            response["error"] = {"code": -32603, "message": "Internal error", "data": str(error)}
+
+        return response
+
+# How long (seconds) MCPClient may serve each read-only tool's result from its cache
+RESULT_CACHE_TTLS = {"shopify-server.find_customer": 300.0, "shopify-server.get_order_status": 30.0, "stripe-server.get_customer_payments": 60.0}
+
+def create_servers(store: CustomerStore, email_queue: Optional[EmailQueue] = None) -> Dict[str, Any]:
+    return {"shopify-server": ShopifyMCPServer(store), "stripe-server": StripeMCPServer(store), "email-server": EmailMCPServer(email_queue),
+            "action-server": ActionMCPServer()}
+
+class MCPClient:
+    def __init__(self, result_cache_size: int = 1024, transport: Optional[str] = None):
+        self.store = CustomerStore(mock_data)
+        self.email_queue = EmailQueue(LocalSink())
+        self.servers = create_servers(self.store, self.email_queue)
+        # "stdio", "unix:PATH" or "tcp:HOST:PORT" moves the servers out of process (see mcp_transport.py);
+        # "pool" or "pool:N" shards them over N worker processes (see mcp_pool.py)
+        self.transport = transport if transport is not None else os.getenv("MCP_TRANSPORT")
+        self.pool: Optional[MCPWorkerPool] = None
+        self._connections: List[JSONRPCConnection] = []
+        self.result_cache = ToolResultCache(RESULT_CACHE_TTLS, max_entries=result_cache_size)
+        # Single-flight: identical read-only calls already running share one backend request
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def start(self):
+        if self.transport and self.transport != "inprocess":
+            if self.transport.split(":", 1)[0] == "pool":
+                _, _, workers = self.transport.partition(":")
+                self.pool = MCPWorkerPool(int(workers) if workers else None)
+                await self.pool.start()
+                self.servers.update(self.pool.servers())
+            else:
+                await self.attach(await connect(self.transport))
+        # The outbox belongs to whichever process runs the email server: open it here only if that is us
+        email_server = self.servers.get("email-server")
+        if isinstance(email_server, EmailMCPServer):
+            await email_server.start()
+
+    async def attach(self, connection: JSONRPCConnection):
+        """Route calls for every server hosted behind `connection` over it instead of in-process."""
+        self.servers.update(await remote_servers(connection))
+        self._connections.append(connection)
+
+    async def aclose(self):
+        for connection in self._connections:
+            await connection.aclose()
+        self._connections.clear()
+        if self.pool is not None:
+            await self.pool.aclose()
+        await self.email_queue.aclose()
+
+    def read_only_tools(self) -> Set[str]:
+        """Full names (server.tool) of every read-only tool, the ones safe to coalesce and deduplicate."""
+        return {f"{server_name}.{tool_name}" for server_name, server in self.servers.items() for tool_name in server.read_only_tools}
+
+    @staticmethod
+    def canonical_args(args: Dict[str, Any]) -> str:
+        return json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+    async def call_tool(self, server_name: str, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        if server_name not in self.servers:
+            raise ValueError(f"MCP Server not found: {server_name}")
+        server = self.servers[server_name]
+        self.calls += 1
+        if tool_name not in server.read_only_tools:
+            try:
+                return await self._call(server, tool_name, args)
+            finally:
+                # Writes (actions, emails) drop cached reads for the customer they touched
+                self.result_cache.invalidate(customer_tags(args))
+
+        tool = f"{server_name}.{tool_name}"
+        key = self.canonical_args(args)
+        if self.result_cache.cacheable(tool):
+            result = self.result_cache.get(tool, key)
+            if result is not None:
+                return result
+
+        task = self._in_flight.get((tool, key))
+        if task is None:
+            task = asyncio.ensure_future(self._read(server, tool, tool_name, args, key))
+            self._in_flight[(tool, key)] = task
+            task.add_done_callback(lambda _: self._in_flight.pop((tool, key), None))
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not cancel the request the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _read(self, server, tool: str, tool_name: str, args: Dict[str, Any], key: str) -> Dict[str, Any]:
+        since = self.result_cache.generation
+        result = await self._call(server, tool_name, args)
+        if self.result_cache.cacheable(tool):
+            tags = customer_tags(args, customer_tags(tool_payload(result)))
+            self.result_cache.put(tool, key, result, tags, since)
+        return result
+
+    @staticmethod
+    async def _call(server, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        response = await server.handle_tool_call(tool_name, args)
+        if "error" in response:
+            raise Exception(f"MCP Error: {response['error']['message']}")
+        return response["result"]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight), "result_cache": self.result_cache.stats(),
+                 "email_queue": self.email_queue.stats()}
+        if self.pool is not None:
+            stats["pool"] = self.pool.stats()
+        return stats
+
+# Static tool registry, compiled once into the compact listing used in planning prompts.
+# "required" lists the arguments a tool cannot run without, when that is not all of its parameters.
+TOOL_CATALOG = {
+    "shopify-server": {
+        "find_customer": {"description": "Find customer by email address", "parameters": {"email": "string"}},
+        "get_order_status": {"description": "Get order status by order number and customer email", "parameters": {"order_number": "string", "customer_email": "string"}}
+    },
+    "stripe-server": {"get_customer_payments": {"description": "Get customer payment history and methods", "parameters": {"email": "string"}}},
+    "email-server": {"send_order_update": {"description": "Send order update notification", "parameters": {"to": "string", "customer_name": "string", "order_number": "string"}}},
+    "action-server": {
+        "process_refund": {"description": "Process immediate refund for customer", "parameters": {"charge_id": "string", "amount": "number", "reason": "string"}, "required": ["charge_id"]},
+        "retry_payment": {"description": "Retry failed payment with backup method", "parameters": {"customer_id": "string", "payment_method": "string", "amount": "number"}, "required": ["customer_id"]},
+        "upgrade_shipping": {"description": "Upgrade shipping method at no charge", "parameters": {"order_id": "string", "new_method": "string"}},
+        "ship_replacement": {"description": "Ship replacement item immediately", "parameters": {"customer_id": "string", "product": "string", "original_order": "string"}, "required": ["customer_id", "product"]},
+        "apply_credit": {"description": "Apply store credit to customer account", "parameters": {"customer_id": "string", "amount": "string", "reason": "string"}, "required": ["customer_id", "amount"]},
+        "enable_vip_status": {"description": "Upgrade customer to VIP status", "parameters": {"customer_id": "string", "tier": "string"}, "required": ["customer_id"]}
+    }
+}
+
+def compile_tool_catalog(catalog: Dict[str, Any]) -> str:
+    """One line per tool: `server.tool(param: type, ...) - description`."""
+    return "\n".join(f"{server}.{tool}({', '.join(f'{name}: {kind}' for name, kind in spec['parameters'].items())}) - {spec['description']}"
+                     for server, tools in catalog.items() for tool, spec in tools.items())
+
+TOOL_CATALOG_TEXT = compile_tool_catalog(TOOL_CATALOG)
+
+# Function names may not contain dots, so native tool calling uses "server__tool"
+TOOL_NAME_SEPARATOR = "__"
+
+def _parameter_schema(kind: str) -> Dict[str, Any]:
+    # Any argument may be a {{...}} reference to an earlier call's result, resolved before the call runs
+    if kind == "string":
+        return {"type": "string"}
+    return {"type": [kind, "string"], "description": f"A {kind}, or a {{{{...}}}} reference to an earlier call's result"}
+
+def compile_tool_schemas(catalog: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The catalogue as OpenAI function-calling tool definitions."""
+    return [{"type": "function", "function": {
+                "name": f"{server}{TOOL_NAME_SEPARATOR}{tool}",
+                "description": spec["description"],
+                "parameters": {"type": "object", "properties": {name: _parameter_schema(kind) for name, kind in spec["parameters"].items()},
+                               "required": list(spec.get("required", spec["parameters"]))}}}
+            for server, tools in catalog.items() for tool, spec in tools.items()]
+
+TOOL_SCHEMAS = compile_tool_schemas(TOOL_CATALOG)
+
+PLANNING_SYSTEM_PROMPT = "You are a proactive customer support AI that takes immediate action to solve problems. ALWAYS include action-server tools to resolve customer issues. ALWAYS include an email step in every plan."
+
+PLANNING_GUIDELINES = """You are EMPOWERED to take immediate action to solve customer problems. Plan a comprehensive response that includes:
+1. Information gathering (shopify-server.find_customer, get_order_status, stripe-server.get_customer_payments)
+2. PROACTIVE PROBLEM SOLVING with action-server tools based on order status:
+   - For "payment_failed": retry_payment, apply_credit  
+   - For "shipping_delayed": upgrade_shipping, apply_credit
+   - For "lost_in_transit": ship_replacement, apply_credit
+   - For "cancelled_by_customer": process_refund
+   - For "delivered" or happy customers: enable_vip_status, apply_credit
+3. Enhanced communication (email-server.send_order_update)
+
+IMPORTANT: First gather customer and order data to determine the correct order status. **After you know the order status, ONLY include the single action-server tool that matches the actual status. Do NOT include all possible actions.**
+ALWAYS include at least one action-server tool to proactively solve the customer's problem.
+ALWAYS end with email notification."""
+
+# How plan arguments refer to data earlier steps will return (see placeholders.py)
+PLAN_REFERENCES_GUIDE = """When an argument depends on an earlier step's result, reference it as {{tool_name.field}}, with [n] for list items, e.g. {{find_customer.orders[0].order_number}} or {{get_customer_payments.charges[0].id}}."""
+
+# Worked plans showing the reference syntax. Only sent to backends with prefix caching
+# (LLMBackend.supports_prompt_cache): they bring the static prefix past the 1024 tokens providers need
+# before they cache a prefix at all, and every backend without a cache would pay for them in full
+PLANNING_EXAMPLES = """Example plans (customer@example.com stands for the customer's email). Take names, products, ids and order numbers from earlier results through references, never from these examples:
+Request: "My package never arrived"
+[{"tool": "shopify-server.find_customer", "args": {"email": "customer@example.com"}, "reasoning": "Look up the customer and their orders"}, {"tool": "stripe-server.get_customer_payments", "args": {"email": "customer@example.com"}, "reasoning": "Check the payment status"}, {"tool": "shopify-server.get_order_status", "args": {"order_number": "{{find_customer.orders[0].order_number}}", "customer_email": "customer@example.com"}, "reasoning": "Confirm the order is lost in transit"}, {"tool": "action-server.ship_replacement", "args": {"customer_id": "{{find_customer.id}}", "product": "{{get_order_status.product}}", "original_order": "{{get_order_status.order_number}}"}, "reasoning": "Ship a replacement overnight instead of waiting on the carrier"}, {"tool": "email-server.send_order_update", "args": {"to": "customer@example.com", "customer_name": "{{find_customer.first_name}}", "order_number": "{{get_order_status.order_number}}"}, "reasoning": "Confirm the replacement by email"}]
+Request: "Why is my order taking so long?"
+[{"tool": "shopify-server.find_customer", "args": {"email": "customer@example.com"}, "reasoning": "Look up the customer and their orders"}, {"tool": "shopify-server.get_order_status", "args": {"order_number": "{{find_customer.orders[0].order_number}}", "customer_email": "customer@example.com"}, "reasoning": "Confirm the shipping delay"}, {"tool": "action-server.upgrade_shipping", "args": {"order_id": "{{get_order_status.id}}", "new_method": "express"}, "reasoning": "Upgrade the delayed shipment to express at no charge"}, {"tool": "email-server.send_order_update", "args": {"to": "customer@example.com", "customer_name": "{{find_customer.first_name}}", "order_number": "{{get_order_status.order_number}}"}, "reasoning": "Tell the customer about the upgrade"}]"""
+
+PLANNING_TASK = "You are a proactive customer support AI agent with the power to take immediate action. Analyze the customer request at the end of this message and plan which tools to use."
+
+PLANNING_RESPONSE_FORMAT = """Respond with a JSON array of tool plans in this exact format:
+[{"tool": "server-name.tool_name", "args": {"param1": "value1"}, "reasoning": "Why you chose this tool and what action you're taking"}]"""
+
+BATCH_PLANNING_TASK = "You are a proactive customer support AI agent with the power to take immediate action. Plan which tools to use for EACH of the customer requests listed at the end of this message, independently of one another."
+
+BATCH_PLANNING_RESPONSE_FORMAT = """Respond with a JSON object mapping every request id to its JSON array of tool plans, in this exact format:
+{"0": [{"tool": "server-name.tool_name", "args": {"param1": "value1"}, "reasoning": "Why you chose this tool and what action you're taking"}], "1": [...]}"""
+
+def compile_planning_prefix(task: str, response_format: str, examples: bool) -> str:
+    """Everything static comes first so the prefix is byte-identical across requests (provider prompt caches
+    match on prefixes); the per-request part is appended at the end."""
+    sections = [task, f"Available tools (server.tool(parameters) - description):\n{TOOL_CATALOG_TEXT}", PLANNING_GUIDELINES, PLAN_REFERENCES_GUIDE]
+    return "\n\n".join(sections + ([PLANNING_EXAMPLES] if examples else []) + [response_format]) + "\n\n"
+
+PLANNING_PROMPT_PREFIX = compile_planning_prefix(PLANNING_TASK, PLANNING_RESPONSE_FORMAT, examples=False)
+CACHED_PLANNING_PROMPT_PREFIX = compile_planning_prefix(PLANNING_TASK, PLANNING_RESPONSE_FORMAT, examples=True)
+BATCH_PLANNING_PROMPT_PREFIX = compile_planning_prefix(BATCH_PLANNING_TASK, BATCH_PLANNING_RESPONSE_FORMAT, examples=False)
+CACHED_BATCH_PLANNING_PROMPT_PREFIX = compile_planning_prefix(BATCH_PLANNING_TASK, BATCH_PLANNING_RESPONSE_FORMAT, examples=True)
+
+SYNTHESIS_SYSTEM_PROMPT = "You are a powerful, action-oriented customer support representative who takes immediate action to solve problems. Focus on what you DID for the customer, not just what you found. Be confident and decisive."
+
+RESPONSE_STYLE = """RESPONSE STYLE: Be confident, decisive, and action-oriented. Use phrases like:
+- "I've immediately taken care of..."
+- "I'm processing this right now..."
+- "I've already upgraded/applied/processed..."
+- "Consider it done..."
+- "You'll receive..."
+
+Focus on the ACTIONS you took to solve their problem, not just information. Make them feel like their issue is completely resolved. Include specific details about what you did and when they can expect results."""
+
+# Static instructions first, gathered data last, for the same prefix-caching reason as the planning prompt
+SYNTHESIS_PROMPT_PREFIX = f"""You are a proactive customer support AI with the power to take immediate action. Based on the data you gathered and actions you took (listed at the end of this message), create a confident, action-oriented response to the customer.
+
+{RESPONSE_STYLE}
+
+"""
+
+# Native tool-calling mode: one conversation that gathers data, acts and answers
+TOOL_CALLING_SYSTEM_PROMPT = f"""{SYNTHESIS_SYSTEM_PROMPT}
+
+{PLANNING_GUIDELINES}
+
+Make every tool call the request needs in ONE turn, including the action and the email. {PLAN_REFERENCES_GUIDE} Calls run in parallel, except that a call waits for the calls it references. Once their results come back, reply to the customer.
+
+{RESPONSE_STYLE}"""
+
+MAX_TOOL_ROUNDS = 6
+
+class UnifiedCustomerSupportAgent:
+    def __init__(self, llm: LLMBackend, tool_calling: Optional[bool] = None):
+        self.mcp_client = MCPClient()
+        self.plan_executor = PlanExecutor(self.mcp_client)
+        self.plan_cache = PlanCache(path=os.getenv("PLAN_CACHE_PATH"))
+        self.llm = llm
+        # Native tool calling (one conversation) instead of plan-then-synthesize, when the backend supports it
+        if tool_calling is None:
+            tool_calling = os.getenv("MCP_TOOL_CALLING", "0") != "0"
+        self.tool_calling = tool_calling and llm.supports_tools
+        # Start the customer lookups every plan begins with while the planning call is in flight
+        self.speculative_prefetch = os.getenv("MCP_PREFETCH", "1") != "0"
+        # Validate and deduplicate LLM plans before they are cached or run (see plan_optimizer.py)
+        self.plan_optimizer = PlanOptimizer(TOOL_CATALOG, self.mcp_client.read_only_tools())
+        self.optimize_plans = os.getenv("MCP_PLAN_OPTIMIZER", "1") != "0"
+        # The worked examples only pay off where the provider caches the prompt prefix
+        self.planning_prefix = CACHED_PLANNING_PROMPT_PREFIX if llm.supports_prompt_cache else PLANNING_PROMPT_PREFIX
+        self.batch_planning_prefix = CACHED_BATCH_PLANNING_PROMPT_PREFIX if llm.supports_prompt_cache else BATCH_PLANNING_PROMPT_PREFIX
+        print(f"✅ Enhanced Customer Support Agent ({llm.display_name}) initialized successfully")
+
+    async def startup(self):
+        await self.llm.start()
+        await self.mcp_client.start()
+        self.plan_optimizer.read_only = self.mcp_client.read_only_tools()
+        await tracer.start()
+
+    async def shutdown(self):
+        await self.llm.aclose()
+        await self.mcp_client.aclose()
+        await self.plan_cache.aclose()
+        await tracer.aclose()
+
+    def get_available_tools(self) -> Dict[str, Any]:
+        return TOOL_CATALOG
+
+    def _create_fallback_plan(self, customer_email: str) -> List[Dict[str, Any]]:
+        return [
+            {"tool": "shopify-server.find_customer", "args": {"email": customer_email}, "reasoning": "Look up customer information"},
+            {"tool": "stripe-server.get_customer_payments", "args": {"email": customer_email}, "reasoning": "Check payment status"},
+            {"tool": "action-server.apply_credit", "args": {"customer_id": "{{customer_id}}", "amount": "$10", "reason": "proactive_service"}, "reasoning": "Apply proactive service credit"},
+            {"tool": "email-server.send_order_update", "args": {"to": customer_email, "customer_name": "{{customer_name}}", "order_number": "{{order_number}}"}, "reasoning": "Send email confirmation"}
+        ]
+
+    def _customer_values(self, customer_email: str) -> Set[str]:
+        """Identifying values from the customer's records, which a reusable plan must not contain as literals."""
+        store = self.mcp_client.store
+        return customer_values([store.find_customer(customer_email), store.find_payment_customer(customer_email)])
+
+    def _optimize_plan(self, tool_plan: List[Dict[str, Any]],
+                       customer_email: str) -> Tuple[List[Dict[str, Any]], Optional[List[StepProgram]]]:
+        """Drop doomed and redundant steps, then add the action and email steps if the plan lacks them.
+
+        Also returns the plan's compiled programs for PlanExecutor.run(), or None if it was not compiled.
+        """
+        tool_plan, _, programs = self._check_plan(tool_plan, customer_email)
+        return tool_plan, programs
+
+    def _check_plan(self, tool_plan: List[Dict[str, Any]], customer_email: str, ensure: bool = True) -> Tuple[
+            List[Dict[str, Any]], List[Optional[Dict[str, Any]]], Optional[List[StepProgram]]]:
+        """The plan _optimize_plan() would run (without the added steps unless `ensure`), for each
+        input step the step that runs in its place (itself, the step a duplicate was merged into, or
+        None), and the plan's compiled programs, or None if it was not compiled."""
+        stand_ins: List[Optional[Dict[str, Any]]] = list(tool_plan)
+        programs = None
+        if self.optimize_plans:
+            tool_plan, removed, positions, programs = self.plan_optimizer.optimize_positions(tool_plan)
+            if VERBOSE and any(removed.values()):
+                print(f"🧹 Removed {sum(removed.values())} plan steps: {', '.join(f'{count} {reason}' for reason, count in removed.items() if count)}")
+            stand_ins = [None if position is None else tool_plan[position] for position in positions]
+            if not tool_plan and ensure:
+                if VERBOSE:
+                    print("🔄 No usable steps left, using fallback plan...")
+                return self._create_fallback_plan(customer_email), stand_ins, None
+        if ensure:
+            checked = self._ensure_action_and_email_steps(list(tool_plan), customer_email)
+            if programs is not None and len(checked) != len(tool_plan):
+                # Only the steps from the first added one on need compiling
+                added = next((index for index, (new, old) in enumerate(zip(checked, tool_plan)) if new is not old), len(tool_plan))
+                programs = compile_plan(checked, programs[:added])
+            tool_plan = checked
+        return tool_plan, stand_ins, programs
+
+    def _ensure_action_and_email_steps(self, tool_plan: List[Dict[str, Any]], customer_email: str) -> List[Dict[str, Any]]:
+        has_email = any(step["tool"].startswith("email-server") for step in tool_plan)
+        has_action = any(step["tool"].startswith("action-server") for step in tool_plan)
+        
+        # Check if we have order status information to determine appropriate action
+        order_status = None
+        for step in tool_plan:
+            if step["tool"] == "shopify-server.get_order_status":
+                # We'll get the actual status during execution, but we can prepare for it
+                order_status = "pending_lookup"
+                break
+        
+        if not has_action:
+            if VERBOSE:
+                print("⚠️ Adding proactive action based on order status...")
+            # Default to apply_credit, but this will be refined during execution
+            action_step = {"tool": "action-server.apply_credit", "args": {"customer_id": "{{customer_id}}", "amount": "$10", "reason": "excellent_service"}, "reasoning": "Auto-added: Apply proactive service credit"}
+            tool_plan.insert(-1 if has_email else len(tool_plan), action_step)
+        
+        if not has_email:
+            if VERBOSE:
+                print("⚠️ Adding email notification...")
+            email_step = {"tool": "email-server.send_order_update", "args": {"to": customer_email, "customer_name": "{{customer_name}}", "order_number": "{{order_number}}"}, "reasoning": "Auto-added: Send email notification"}
+            tool_plan.append(email_step)
+        
+        return tool_plan
+
+    @staticmethod
+    def _strip_code_fence(text: str) -> str:
+        if "```json" in text:
+            return text.split("```json")[1].split("```", 1)[0].strip()
+        if "```" in text:
+            return text.split("```", 1)[1].split("```", 1)[0].strip()
+        return text
+
+    @staticmethod
+    def _is_valid_plan(tool_plan: Any) -> bool:
+        return isinstance(tool_plan, list) and bool(tool_plan) and all(
+            isinstance(step, dict) and isinstance(step.get("tool"), str) and "." in step["tool"]
+            and isinstance(step.get("args", {}), dict) for step in tool_plan)
+
+    async def _plan_with_llm(self, customer_email: str, request: str) -> Tuple[List[Dict[str, Any]], Optional[List[StepProgram]]]:
+        """The plan for this request and its compiled programs (None for the fallback plan)."""
+        planning_prompt = f"""{self.planning_prefix}Customer request: "{request}"
+Customer email: {customer_email}"""
+
+        if VERBOSE:
+            print(f"\n🧠 Sending request to {self.llm.display_name}...")
+        response = await self.llm.complete(
+            messages=[
+                {"role": "system", "content": PLANNING_SYSTEM_PROMPT},
+                {"role": "user", "content": planning_prompt}
+            ],
+            temperature=0.1
+        )
+
+        tool_plan_response = response["choices"][0]["message"]["content"]
+        if VERBOSE:
+            print(f"\n🤖 {self.llm.display_name} Raw Response: {tool_plan_response}")
+
+        try:
+            tool_plan = json.loads(self._strip_code_fence(tool_plan_response))
+            if VERBOSE:
+                print(f"\n🔍 Parsed Tool Plan: {json.dumps(tool_plan, indent=2)}")
+            tool_plan, programs = self._optimize_plan(tool_plan, customer_email)
+            self.plan_cache.put(request, customer_email, tool_plan, self._customer_values(customer_email))
+            
+        except json.JSONDecodeError as e:
+            if VERBOSE:
+                print(f"❌ JSON Parse Error: {e}")
+                print("🔄 Using comprehensive fallback plan...")
+            tool_plan, programs = self._create_fallback_plan(customer_email), None
+
+        return tool_plan, programs
+
+    async def _plan_batch_with_llm(self, items: List[Tuple[str, str]]) -> List[Tuple[List[Dict[str, Any]], Optional[List[StepProgram]]]]:
+        """Plan several (email, request) pairs with one LLM call; each plan is validated on its own.
+
+        Returns a (plan, compiled programs or None) pair per item, as _plan_with_llm() does.
+        """
+        keyed = [{"id": str(i), "customer_email": email, "request": request} for i, (email, request) in enumerate(items)]
+        planning_prompt = f"{self.batch_planning_prefix}Requests: {json.dumps(keyed)}"
+
+        if VERBOSE:
+            print(f"\n🧠 Sending {len(items)} requests to {self.llm.display_name} in one planning call...")
+        response = await self.llm.complete(
+            messages=[
+                {"role": "system", "content": PLANNING_SYSTEM_PROMPT},
+                {"role": "user", "content": planning_prompt}
+            ],
+            temperature=0.1
+        )
+
+        try:
+            plans = json.loads(self._strip_code_fence(response["choices"][0]["message"]["content"]))
+        except json.JSONDecodeError as e:
+            if VERBOSE:
+                print(f"❌ JSON Parse Error in batch plan: {e}")
+            plans = {}
+        if not isinstance(plans, dict):
+            plans = {}
+
+        tool_plans = []
+        for item, (customer_email, request) in zip(keyed, items):
+            tool_plan = plans.get(item["id"])
+            programs = None
+            if self._is_valid_plan(tool_plan):
+                tool_plan, programs = self._optimize_plan(tool_plan, customer_email)
+                self.plan_cache.put(request, customer_email, tool_plan, self._customer_values(customer_email))
+            else:
+                if VERBOSE:
+                    print(f"🔄 No usable plan for batch item {item['id']}, using fallback plan...")
+                tool_plan = self._create_fallback_plan(customer_email)
+            tool_plans.append((tool_plan, programs))
+        return tool_plans
+
+    async def _prepare_synthesis(self, customer_email: str, request: str, timings: Optional[Dict[str, float]] = None,
+                                 tool_plan: Optional[List[Dict[str, Any]]] = None,
+                                 programs: Optional[List[StepProgram]] = None) -> List[Dict[str, str]]:
+        started = time.perf_counter()
+        prefetched = None
+        with tracer.span("plan") as span:
+            cached = False
+            if tool_plan is None:
+                tool_plan = self.plan_cache.get(request, customer_email)
+                cached = tool_plan is not None
+                if cached:
+                    if VERBOSE:
+                        print("\n⚡ Using cached plan for this request type")
+                else:
+                    if self.speculative_prefetch:
+                        prefetched = self.plan_executor.prefetcher.start(customer_email)
+                    try:
+                        tool_plan, programs = await self._plan_with_llm(customer_email, request)
+                    except BaseException:
+                        if prefetched:
+                            self.plan_executor.prefetcher.discard(prefetched)
+                        raise
+            span.set(cached=cached, steps=len(tool_plan), prefetched=prefetched is not None)
+        planned = time.perf_counter()
+
+        if VERBOSE:
+            log_summary("AGENT EXECUTION PLAN", {"execution_plan": tool_plan})
+
+        with tracer.span("tools", steps=len(tool_plan)):
+            execution_results = await self.plan_executor.execute(tool_plan, prefetched, programs)
+        if timings is not None:
+            timings["plan"] = planned - started
+            timings["tools"] = time.perf_counter() - planned
+
+        email_sent = any(key.startswith("email-server") and "error" not in result for key, result in execution_results.items())
+
+        synthesis_prompt = f"""{SYNTHESIS_PROMPT_PREFIX}Original customer request: "{request}"
+Customer email: {customer_email}
+
+Data gathered:
+Customer data: {json.dumps(execution_results.get("shopify-server.find_customer"))}
+Order data: {json.dumps(execution_results.get("shopify-server.get_order_status"))}
+Payment data: {json.dumps(execution_results.get("stripe-server.get_customer_payments"))}
+
+Actions taken:
+Refund processed: {json.dumps(execution_results.get("action-server.process_refund"))}
+Payment retried: {json.dumps(execution_results.get("action-server.retry_payment"))}
+Shipping upgraded: {json.dumps(execution_results.get("action-server.upgrade_shipping"))}
+Replacement shipped: {json.dumps(execution_results.get("action-server.ship_replacement"))}
+Credit applied: {json.dumps(execution_results.get("action-server.apply_credit"))}
+VIP status enabled: {json.dumps(execution_results.get("action-server.enable_vip_status"))}
+
+Email sent: {"Yes" if email_sent else "No"}"""
+
+        return [
+            {"role": "system", "content": SYNTHESIS_SYSTEM_PROMPT},
+            {"role": "user", "content": synthesis_prompt}
+        ]
+
+    async def handle_request(self, customer_email: str, request: str, timings: Optional[Dict[str, float]] = None,
+                             tool_plan: Optional[List[Dict[str, Any]]] = None,
+                             programs: Optional[List[StepProgram]] = None) -> str:
+        """Plan, run the tools and answer. If `timings` is given it receives per-phase seconds (plan, tools, synthesis).
+
+        Passing `tool_plan` skips the planning call (handle_requests_batch plans up front), and
+        `programs`, if the plan is already compiled, skips compiling it again.
+        In tool-calling mode the phases are llm, tools and rounds instead (see _handle_with_tools).
+        """
+        with tracer.span("request", request_chars=len(request)) as request_span:
+            try:
+                if VERBOSE:
+                    print(f"\n🚀 Processing: '{request}' for {customer_email}")
+
+                if self.tool_calling and tool_plan is None:
+                    return await self._handle_with_tools(customer_email, request, timings)
+
+                messages = await self._prepare_synthesis(customer_email, request, timings, tool_plan, programs)
+
+                started = time.perf_counter()
+                with tracer.span("synthesis", prompt_chars=len(messages[-1]["content"])) as span:
+                    response = await self.llm.complete(
+                        messages=messages,
+                        temperature=0.3
+                    )
+                    final_response = response["choices"][0]["message"]["content"]
+                    span.set(response_chars=len(final_response))
+                if timings is not None:
+                    timings["synthesis"] = time.perf_counter() - started
+
+                return final_response
+
+            except Exception as error:
+                print(f"❌ Critical error in handle_request: {error}")
+                request_span.set(error=str(error))
+                return "I apologize, but I encountered an error while processing your request. Please try again later."
+
+    async def _handle_with_tools(self, customer_email: str, request: str, timings: Optional[Dict[str, float]] = None) -> str:
+        """Answer in one tool-calling conversation: the model requests tools, we run each turn's calls
+        and send back the results, until it replies with the final answer.
+
+        The model is asked for every call in the first turn, with {{...}} references between
+        dependent calls, so a request normally takes two round-trips. A turn's calls go through the
+        plan optimizer and, on the first turn, get the action and email steps a text plan would
+        (see _run_tool_calls), then run as a plan. The customer lookups are prefetched meanwhile.
+        """
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": TOOL_CALLING_SYSTEM_PROMPT},
+            {"role": "user", "content": f'Customer request: "{request}"\nCustomer email: {customer_email}'}
+        ]
+        prefetched = self.plan_executor.prefetcher.start(customer_email) if self.speculative_prefetch else None
+        llm_seconds = tool_seconds = 0.0
+        try:
+            for round_number in range(1, MAX_TOOL_ROUNDS + 1):
+                started = time.perf_counter()
+                with tracer.span("llm_turn", round=round_number) as span:
+                    response = await self.llm.complete_with_tools(messages, TOOL_SCHEMAS, temperature=0.3)
+                    message = response["choices"][0]["message"]
+                    tool_calls = message.get("tool_calls") or []
+                    span.set(tool_calls=len(tool_calls))
+                called = time.perf_counter()
+                llm_seconds += called - started
+                if not tool_calls:
+                    break
+
+                with tracer.span("tools", steps=len(tool_calls)):
+                    tool_calls, outputs = await self._run_tool_calls(tool_calls, customer_email, prefetched, first_turn=round_number == 1)
+                messages.append({"role": "assistant", "content": message.get("content"), "tool_calls": tool_calls})
+                tool_seconds += time.perf_counter() - called
+                messages.extend({"role": "tool", "tool_call_id": call["id"], "content": output} for call, output in zip(tool_calls, outputs))
+            else:
+                if VERBOSE:
+                    print(f"⚠️ No answer after {MAX_TOOL_ROUNDS} tool rounds")
+        finally:
+            if prefetched:
+                self.plan_executor.prefetcher.discard(prefetched)
+
+        if timings is not None:
+            timings.update(llm=llm_seconds, tools=tool_seconds, rounds=round_number)
+        return message.get("content") or "I've taken care of this for you - you'll receive a confirmation email shortly."
+
+    async def _run_tool_calls(self, tool_calls: List[Dict[str, Any]], customer_email: str, prefetched=None,
+                              first_turn: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Run one turn's calls as a plan, through the same checks as a text plan, and return the calls
+        with each one's result as JSON text, in order.
+
+        On the first turn the action and email steps are added when missing, as for text plans; the
+        calls returned then include them, so the model sees what was done for it.
+        """
+        steps: List[Dict[str, Any]] = []
+        parsed: List[Any] = []
+        for call in tool_calls:
+            name = call["function"]["name"]
+            try:
+                args = json.loads(call["function"].get("arguments") or "{}")
+                if not isinstance(args, dict):
+                    raise ValueError("arguments must be a JSON object")
+            except ValueError as error:
+                if VERBOSE:
+                    print(f"❌ {name} failed: {error}")
+                parsed.append(f"Invalid arguments: {error}")
+                continue
+            parsed.append(len(steps))
+            steps.append({"tool": name.replace(TOOL_NAME_SEPARATOR, ".", 1), "args": args, "reasoning": f"Tool call: {name}"})
+
+        tool_plan, stand_ins, programs = self._check_plan(steps, customer_email, ensure=first_turn) if steps or first_turn else ([], [], None)
+        results = await self.plan_executor.run(tool_plan, prefetched, programs) if tool_plan else []
+        position = {id(step): index for index, step in enumerate(tool_plan)}
+
+        outputs = []
+        for item in parsed:
+            if isinstance(item, str):
+                outputs.append(json.dumps({"error": item}))
+            elif stand_ins[item] is None:
+                reason = self.plan_optimizer.check_step(steps[item]) or "unreachable"
+                outputs.append(json.dumps({"error": f"Not run: {reason.replace('_', ' ')}"}))
+            else:
+                outputs.append(json.dumps(results[position[id(stand_ins[item])]]))
+
+        requested = {id(step) for step in stand_ins if step is not None}
+        calls = list(tool_calls)
+        for index, step in enumerate(tool_plan):
+            if id(step) not in requested:
+                calls.append({"id": f"auto_{index}", "type": "function", "function": {
+                    "name": step["tool"].replace(".", TOOL_NAME_SEPARATOR, 1), "arguments": json.dumps(step["args"])}})
+                outputs.append(json.dumps(results[index]))
+        return calls, outputs
+
+    async def handle_requests_batch(self, items: List[Tuple[str, str]], batch_size: int = 16,
+                                    timings: Optional[List[Dict[str, float]]] = None) -> List[str]:
+        """Answer many queued (email, request) pairs, planning up to `batch_size` of them per LLM call.
+
+        Cached plans are reused; the rest of each chunk shares one planning prompt and the
+        resulting plans run concurrently. Responses come back in input order. If `timings`
+        is a list it receives one per-phase dict per item; "plan" is the shared batch call.
+        """
+        responses: List[str] = []
+        for offset in range(0, len(items), batch_size):
+            chunk = items[offset:offset + batch_size]
+            started = time.perf_counter()
+            plans = [self.plan_cache.get(request, email) for email, request in chunk]
+            programs: List[Optional[List[StepProgram]]] = [None] * len(chunk)
+            missing = [i for i, plan in enumerate(plans) if plan is None]
+            if missing:
+                with tracer.span("batch_plan", items=len(missing)):
+                    try:
+                        planned = await self._plan_batch_with_llm([chunk[i] for i in missing])
+                    except Exception as error:
+                        # Leave these to handle_request, which plans them one at a time
+                        if VERBOSE:
+                            print(f"❌ Batch planning failed, planning individually: {error}")
+                        planned = [(None, None)] * len(missing)
+                for i, (plan, compiled) in zip(missing, planned):
+                    plans[i], programs[i] = plan, compiled
+            plan_seconds = time.perf_counter() - started
+
+            chunk_timings = [{} for _ in chunk]
+            responses.extend(await asyncio.gather(*(
+                self.handle_request(email, request, chunk_timings[i], plans[i], programs[i]) for i, (email, request) in enumerate(chunk))))
+            if timings is not None:
+                for item_timings in chunk_timings:
+                    item_timings["plan"] = item_timings.get("plan", 0.0) + plan_seconds
+                timings.extend(chunk_timings)
+        return responses
+
+    async def handle_request_stream(self, customer_email: str, request: str) -> AsyncIterator[str]:
+        """Same as handle_request, but yields the synthesized answer as it is generated."""
+        with tracer.span("request", request_chars=len(request), streaming=True) as request_span:
+            try:
+                if VERBOSE:
+                    print(f"\n🚀 Processing: '{request}' for {customer_email}")
+
+                if self.tool_calling:
+                    # The final turn arrives whole from the tool-calling conversation
+                    yield await self._handle_with_tools(customer_email, request)
+                    return
+
+                messages = await self._prepare_synthesis(customer_email, request)
+
+                with tracer.span("synthesis", prompt_chars=len(messages[-1]["content"])) as span:
+                    response_chars = 0
+                    async for chunk in self.llm.stream(messages=messages, temperature=0.3):
+                        response_chars += len(chunk)
+                        yield chunk
+                    span.set(response_chars=response_chars)
+
+            except Exception as error:
+                print(f"❌ Critical error in handle_request_stream: {error}")
+                request_span.set(error=str(error))
+                yield "I apologize, but I encountered an error while processing your request. Please try again later."
+
+class ChatInterface:
+    def __init__(self, agent: UnifiedCustomerSupportAgent):
+        self.agent = agent
+
+    def _display_demo_data(self):
+        print("\n📋 DEMO CUSTOMERS & ORDERS")
+        print("=" * 60)
+        
+        demo_customers = [
+            {"email": "john@email.com", "name": "John Smith", "order": "#1001", "product": "Wireless Headphones", "status": "✅ delivered", "scenario": "Happy customer"},
+            {"email": "sarah@email.com", "name": "Sarah Johnson", "order": "#1002", "product": "Smart Watch", "status": "⚠️ shipping_delayed", "scenario": "Delayed shipment"},
+            {"email": "mike@email.com", "name": "Mike Brown", "order": "#1003", "product": "Gaming Laptop", "status": "❌ payment_failed", "scenario": "Payment issue"},
+            {"email": "lisa@email.com", "name": "Lisa Davis", "order": "#1004", "product": "Bluetooth Speaker", "status": "📦 lost_in_transit", "scenario": "Lost package"},
+            {"email": "alex@email.com", "name": "Alex Wilson", "order": "#1005", "product": "Wireless Earbuds", "status": "🔄 cancelled/refunded", "scenario": "Refund inquiry"}
+        ]
+        
+        for customer in demo_customers:
+            print(f"📧 {customer['email']}")
+            print(f"   👤 {customer['name']} | {customer['order']} - {customer['product']}")
+            print(f"   📊 Status: {customer['status']} | 🎭 {customer['scenario']}")
+            print()
+        
+        print("💡 SAMPLE QUERIES:")
+        print("   • 'Check my order status'")
+        print("   • 'Where is my [product] order?'") 
+        print("   • 'What's happening with order [number]?'")
+        print("   • 'I need help with my recent purchase'")
+        print("=" * 60)
+
+    async def start_chat(self):
+        print("🤖 Enhanced MCP Customer Support Agent")
+        print("=" * 50)
+        print("✅ Proactive actions and guaranteed email notifications!")
+        print("Type 'quit' to exit the chat")
+        print("Type 'change email' to switch customer accounts")
+        
+        self._display_demo_data()
+
+        customer_email = input("\n👤 Enter your email address: ").strip()
+        if not customer_email:
+            customer_email = "john@email.com"
+            print(f"Using demo email: {customer_email}")
+
+        print(f"\nHello! I'm your AI customer support agent for {customer_email}. How can I help you today?")
+        print("(Reference the demo data above for testing different scenarios)")
+        print("(Say 'change email' to switch to a different customer)")
+        print()
+
+        while True:
+            try:
+                print(f"💬 You ({customer_email}): ", end="", flush=True)
+                user_input = input().strip()
+                
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    print("👋 Thanks for using Enhanced MCP Customer Support! Have a great day!")
+                    break
+
+                if user_input.lower() in ['change email', 'switch email', 'new email']:
+                    new_email = input("\n👤 Enter new email address: ").strip()
+                    if new_email:
+                        customer_email = new_email
+                        print(f"✅ Switched to customer: {customer_email}")
+                        print(f"Hello! I'm your AI customer support agent for {customer_email}. How can I help you today?\n")
+                    continue
+
+                if not user_input:
+                    continue
+                
+                started = time.perf_counter()
+                first_token_at = None
+                async for chunk in self.agent.handle_request_stream(customer_email, user_input):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        print("\n💬 Agent: ", end="", flush=True)
+                    print(chunk, end="", flush=True)
+                finished = time.perf_counter()
+                print()
+                if first_token_at is not None:
+                    print(f"⏱️ First token after {first_token_at - started:.2f}s, full response after {finished - started:.2f}s")
+                print("\n" + "="*60)
+
+            except KeyboardInterrupt:
+                print("\n👋 Thanks for using Enhanced MCP Customer Support! Have a great day!")
+                break
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                print("Please try again.")
+
+async def main(default_backend: Optional[str] = None):
+    """Run the chat UI. LLM_BACKEND applies only when the entry point names no backend; --backend overrides both."""
+    env_backend = os.getenv("LLM_BACKEND")
+    parser = argparse.ArgumentParser(description="Enhanced MCP Customer Support Agent")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=default_backend or env_backend or "openai")
+    parser.add_argument("--tool-calling", action="store_true", default=None, help="Use native tool calling instead of plan-then-synthesize")
+    args = parser.parse_args()
+    if default_backend and env_backend and env_backend != default_backend and args.backend == default_backend:
+        print(f"ℹ️ Ignoring LLM_BACKEND={env_backend}: this entry point runs the {default_backend} backend (use --backend to choose)")
+
+    try:
+        llm = create_backend(args.backend)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+
+    print("🤖 Enhanced MCP Customer Support Agent")
+    print("✅ Now with proactive actions and API layer simulation!")
+
+    try:
+        chat = ChatInterface(UnifiedCustomerSupportAgent(llm, tool_calling=args.tool_calling))
+        await chat.agent.startup()
+        try:
+            await chat.start_chat()
+        finally:
+            await chat.agent.shutdown()
+    except Exception as e:
+        print(f"❌ Application error: {e}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
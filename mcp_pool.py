@@ -0,0 +1,185 @@
+"""Shard the MCP servers across a pool of worker processes.
+
+Each worker is a `python -m mcp_transport --stdio` process hosting all four
+servers, so the agent's process no longer shares a GIL with tool execution,
+result encoding and server logging. Calls are routed by customer: the email in
+the arguments when there is one, otherwise a customer, order or charge id mapped
+back to the email it was last seen with. A customer's lookups, actions and
+emails therefore land on the same worker. Email is the exception: every
+email-server call goes to worker 0, the only worker that opens the sent-email
+outbox (OUTBOX_PATH is dropped from the others' environment), so one process
+owns the SQLite history. A health-check task pings every worker
+and restarts any that crashed or stopped answering; read-only calls that hit a
+dead worker are retried once on its replacement.
+"""
+
+import asyncio
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+from caching import EMAIL_PATTERN, TTLCache, customer_tags
+from mcp_transport import PROTOCOL_VERSION, JSONRPCConnection, JSONRPCError, connect_stdio
+from tool_results import tool_payload
+
+SHARD_EMAIL_ARGS = ("email", "customer_email", "to")
+# The worker that delivers every email and owns the outbox
+EMAIL_WORKER = 0
+
+
+class MCPWorker:
+    def __init__(self, index: int, command: Optional[List[str]], env: Optional[Dict[str, str]], stderr: Any):
+        self.index = index
+        self.command = command
+        self.env = env
+        self.stderr = stderr
+        self.connection: Optional[JSONRPCConnection] = None
+        self.servers: Dict[str, Any] = {}
+        self.lock = asyncio.Lock()
+        self.calls = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return (self.connection is not None and not self.connection.closed
+                and self.connection.process is not None and self.connection.process.returncode is None)
+
+    async def start(self):
+        self.connection = await connect_stdio(self.command, env=self.env, stderr=self.stderr)
+        info = await self.connection.request("initialize", {"protocolVersion": PROTOCOL_VERSION})
+        self.servers = info["servers"]
+
+    async def stop(self, timeout: float = 2.0):
+        if self.connection is not None:
+            await self.connection.aclose(timeout)
+
+    async def kill(self):
+        if self.connection is not None:
+            if self.connection.process.returncode is None:
+                self.connection.process.kill()
+            await self.stop()
+
+
+class ShardedMCPServer:
+    """Client-side stand-in for one MCP server whose calls are spread over the pool."""
+
+    def __init__(self, pool: "MCPWorkerPool", name: str, info: Dict[str, Any]):
+        self.pool = pool
+        self.name = name
+        self.version = info.get("version")
+        self.read_only_tools = set(info.get("readOnlyTools", ()))
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.pool.call(self.name, tool_name, args, read_only=tool_name in self.read_only_tools)
+
+
+class MCPWorkerPool:
+    def __init__(self, workers: Optional[int] = None, command: Optional[List[str]] = None, env: Optional[Dict[str, str]] = None,
+                 stderr: Any = None, health_interval: float = 5.0, health_timeout: float = 2.0):
+        # Only the email worker may open the outbox file
+        shard_env = {key: value for key, value in (os.environ if env is None else env).items() if key != "OUTBOX_PATH"}
+        self.workers = [MCPWorker(i, command, env if i == EMAIL_WORKER else shard_env, stderr) for i in range(workers or os.cpu_count() or 1)]
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        # Customer/order/charge id -> owning email, learned from read results
+        self._owners = TTLCache(max_entries=100000, ttl=24 * 3600.0)
+        self._health_task = None
+
+    async def start(self):
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+        if self.health_interval > 0:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+        print(f"✅ Started {len(self.workers)} MCP worker processes")
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    def servers(self) -> Dict[str, ShardedMCPServer]:
+        return {name: ShardedMCPServer(self, name, info) for name, info in self.workers[0].servers.items()}
+
+    def _index(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self.workers)
+
+    def shard_for(self, args: Dict[str, Any]) -> int:
+        for name in SHARD_EMAIL_ARGS:
+            value = args.get(name)
+            if isinstance(value, str) and value:
+                return self._index(value.lower())
+        ids = sorted(customer_tags(args))
+        for tag in ids:
+            owner = self._owners.get(tag)
+            if owner is not None:
+                return self._index(owner)
+        return self._index(ids[0]) if ids else 0
+
+    def _learn(self, args: Dict[str, Any], response: Dict[str, Any]):
+        try:
+            payload = tool_payload(response["result"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return
+        tags = customer_tags(args, customer_tags(payload))
+        emails = {tag for tag in tags if EMAIL_PATTERN.fullmatch(tag)}
+        if len(emails) == 1:
+            owner = emails.pop()
+            for tag in tags:
+                if tag != owner:
+                    self._owners.set(tag, owner)
+
+    async def call(self, server_name: str, tool_name: str, args: Dict[str, Any], read_only: bool = False) -> Dict[str, Any]:
+        worker = self.workers[EMAIL_WORKER if server_name == "email-server" else self.shard_for(args)]
+        params = {"name": tool_name, "arguments": args, "_meta": {"server": server_name}}
+        for attempt in range(2):
+            if not worker.alive:
+                await self.restart(worker)
+            try:
+                response = await worker.connection.call("tools/call", params)
+            except ConnectionError:
+                # Reads are safe to repeat on the restarted worker; writes might already have happened
+                if read_only and attempt == 0:
+                    continue
+                raise
+            worker.calls += 1
+            if read_only:
+                self._learn(args, response)
+            return response
+
+    async def restart(self, worker: MCPWorker):
+        async with worker.lock:
+            if worker.alive:
+                return
+            print(f"⚠️ Restarting MCP worker {worker.index}")
+            await worker.kill()
+            await worker.start()
+            worker.restarts += 1
+
+    async def check_health(self):
+        """Ping every worker; restart any that are dead or do not answer within health_timeout."""
+        async def check(worker: MCPWorker):
+            if worker.alive:
+                try:
+                    await asyncio.wait_for(worker.connection.request("ping"), self.health_timeout)
+                    return
+                except (ConnectionError, JSONRPCError, asyncio.TimeoutError):
+                    await worker.kill()
+            await self.restart(worker)
+
+        await asyncio.gather(*(check(worker) for worker in self.workers))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as error:
+                print(f"❌ MCP worker health check failed: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self.workers), "alive": sum(worker.alive for worker in self.workers),
+                "restarts": sum(worker.restarts for worker in self.workers), "calls": [worker.calls for worker in self.workers]}
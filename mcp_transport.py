@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""JSON-RPC 2.0 transport for the MCP servers: newline-delimited messages over stdio or sockets.
+
+Server side, `python -m mcp_transport` hosts some or all of the MCP servers in their own process:
+
+    python -m mcp_transport --stdio                  # driven over stdin/stdout by a parent process
+    python -m mcp_transport --unix /tmp/mcp.sock --servers shopify-server,stripe-server
+    python -m mcp_transport --tcp 127.0.0.1:9100
+
+Client side, JSONRPCConnection multiplexes requests on one connection by id, so
+concurrent calls are pipelined and answered in completion order, and batch()
+sends a JSON-RPC batch array. RemoteMCPServer has the same handle_tool_call
+interface as the in-process servers, which lets MCPClient route to either.
+tools/call requests name their target server in params._meta.server.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from tool_results import materialize
+
+PROTOCOL_VERSION = "2024-11-05"
+STREAM_LIMIT = 16 * 1024 * 1024
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class JSONRPCError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"{message} ({code})" if data is None else f"{message} ({code}): {data}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+# --- Server side ---
+
+class MCPServerHost:
+    """Answers JSON-RPC messages (single or batched) for a set of in-process MCP servers."""
+
+    def __init__(self, servers: Dict[str, Any]):
+        self.servers = servers
+
+    def describe(self) -> Dict[str, Any]:
+        return {name: {"version": server.version, "readOnlyTools": sorted(server.read_only_tools)} for name, server in self.servers.items()}
+
+    async def handle_message(self, message: Any) -> Any:
+        if isinstance(message, list):
+            if not message:
+                return error_response(None, INVALID_REQUEST, "Empty batch")
+            responses = [r for r in await asyncio.gather(*(self._handle_one(m) for m in message)) if r is not None]
+            return responses or None
+        return await self._handle_one(message)
+
+    async def _handle_one(self, message: Any) -> Optional[Dict[str, Any]]:
+        try:
+            return await self._dispatch(message)
+        except Exception as error:
+            # Every request gets an answer, or the caller waits on it forever
+            if isinstance(message, dict) and "id" not in message:
+                return None
+            return error_response(message.get("id") if isinstance(message, dict) else None, INTERNAL_ERROR, f"Internal error: {error}")
+
+    async def _dispatch(self, message: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return error_response(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid Request")
+        request_id = message.get("id")
+        params = message.get("params")
+        params = {} if params is None else params
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        method = message["method"]
+        if not isinstance(params, dict) or not isinstance(meta or {}, dict) or not isinstance(params.get("arguments") or {}, dict):
+            response = error_response(request_id, INVALID_PARAMS, "Invalid params: params, params._meta and params.arguments must be objects")
+            return response if "id" in message else None
+
+        if method == "initialize":
+            response = {"jsonrpc": "2.0", "id": request_id, "result": {"protocolVersion": PROTOCOL_VERSION, "servers": self.describe()}}
+        elif method == "ping":
+            response = {"jsonrpc": "2.0", "id": request_id, "result": {}}
+        elif method == "tools/call":
+            server_name = (meta or {}).get("server")
+            if server_name is None and len(self.servers) == 1:
+                server_name = next(iter(self.servers))
+            server = self.servers.get(server_name)
+            if server is None:
+                response = error_response(request_id, INVALID_PARAMS, f"MCP Server not found: {server_name}")
+            else:
+                response = await server.handle_tool_call(params.get("name"), params.get("arguments") or {})
+                response["id"] = request_id
+                if response.get("result"):
+                    materialize(response["result"])
+        else:
+            response = error_response(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+
+        # Notifications (no id) get no reply
+        return response if "id" in message else None
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read messages until EOF, answering each as soon as it completes (possibly out of order)."""
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionResetError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message, response = None, error_response(None, PARSE_ERROR, "Parse error")
+        else:
+            response = await self.handle_message(message)
+        try:
+            payload = None if response is None else json.dumps(response).encode()
+        except (TypeError, ValueError) as error:
+            # A result that cannot be encoded still answers the call
+            request_id = message.get("id") if isinstance(message, dict) else None
+            payload = json.dumps(error_response(request_id, INTERNAL_ERROR, f"Internal error: {error}")).encode()
+        if payload is not None:
+            writer.write(payload + b"\n")
+            await writer.drain()
+
+
+async def _stdio_streams() -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    # Everything the servers print (log_summary, step lines) goes to stderr so stdout stays pure JSON-RPC
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, protocol_out)
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+
+async def serve(args):
+    if args.stdio:
+        # Set up before importing the agent module so nothing it prints can reach the protocol stream
+        reader, writer = await _stdio_streams()
+
+    from customer_store import CustomerStore
+    from mcp_agent import create_servers, mock_data
+
+    servers = create_servers(CustomerStore(mock_data))
+    if args.servers:
+        servers = {name: servers[name] for name in args.servers.split(",")}
+    host = MCPServerHost(servers)
+    if "email-server" in servers:
+        # This process delivers the email, so it opens the outbox
+        await servers["email-server"].start()
+
+    try:
+        if args.stdio:
+            await host.serve_connection(reader, writer)
+            return
+        if args.unix:
+            server = await asyncio.start_unix_server(host.serve_connection, args.unix, limit=STREAM_LIMIT)
+        else:
+            address, _, port = args.tcp.rpartition(":")
+            server = await asyncio.start_server(host.serve_connection, address or "127.0.0.1", int(port), limit=STREAM_LIMIT)
+        print(f"✅ MCP servers {', '.join(servers)} listening on {args.unix or args.tcp}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+    finally:
+        # Deliver whatever the email server still has queued
+        if "email-server" in servers:
+            await servers["email-server"].aclose()
+
+
+# --- Client side ---
+
+class JSONRPCConnection:
+    """One client connection; requests are matched to responses by id, so any number can be in flight."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, process: Optional[asyncio.subprocess.Process] = None):
+        self.reader = reader
+        self.writer = writer
+        self.process = process
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.closed = False
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    def _send(self, method: str, params: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], asyncio.Future]:
+        if self.closed:
+            raise ConnectionError("JSON-RPC connection is closed")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}, future
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one request and return the raw response message (result or error)."""
+        message, future = self._send(method, params)
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Like call(), but returns the result and raises JSONRPCError for an error response."""
+        return self.unwrap(await self.call(method, params))
+
+    async def batch(self, calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Send the calls as one JSON-RPC batch; raw responses come back in call order."""
+        sent = [self._send(method, params) for method, params in calls]
+        self.writer.write(json.dumps([message for message, _ in sent]).encode() + b"\n")
+        await self.writer.drain()
+        return list(await asyncio.gather(*(future for _, future in sent)))
+
+    @staticmethod
+    def unwrap(response: Dict[str, Any]) -> Any:
+        if "error" in response:
+            error = response["error"]
+            raise JSONRPCError(error.get("code", 0), error.get("message", ""), error.get("data"))
+        return response.get("result")
+
+    async def _read_loop(self):
+        error: Exception = ConnectionError("JSON-RPC connection closed")
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                for response in message if isinstance(message, list) else [message]:
+                    future = self._pending.pop(response.get("id"), None)
+                    if future is not None and not future.done():
+                        future.set_result(response)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as exc:
+            error = ConnectionError(f"JSON-RPC connection failed: {exc}")
+        finally:
+            self.closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def aclose(self, timeout: float = 5.0):
+        self.closed = True
+        self.writer.close()
+        if self.process is not None:
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except asyncio.CancelledError:
+            pass
+
+
+async def connect_stdio(command: Optional[List[str]] = None, env: Optional[Dict[str, str]] = None, stderr: Any = None) -> JSONRPCConnection:
+    """Spawn `python -m mcp_transport --stdio` (or `command`) and talk to it over its stdin/stdout."""
+    command = command or [sys.executable, "-m", "mcp_transport", "--stdio"]
+    process = await asyncio.create_subprocess_exec(*command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=stderr,
+                                                   cwd=os.path.dirname(os.path.abspath(__file__)), env=env, limit=STREAM_LIMIT)
+    return JSONRPCConnection(process.stdout, process.stdin, process)
+
+
+async def connect_unix(path: str) -> JSONRPCConnection:
+    return JSONRPCConnection(*await asyncio.open_unix_connection(path, limit=STREAM_LIMIT))
+
+
+async def connect_tcp(host: str, port: int) -> JSONRPCConnection:
+    return JSONRPCConnection(*await asyncio.open_connection(host, port, limit=STREAM_LIMIT))
+
+
+async def connect(spec: str) -> JSONRPCConnection:
+    """Open a connection from a spec: "stdio", "unix:/path/to.sock" or "tcp:host:port"."""
+    kind, _, target = spec.partition(":")
+    if kind == "stdio":
+        return await connect_stdio()
+    if kind == "unix" and target:
+        return await connect_unix(target)
+    if kind == "tcp" and target:
+        host, _, port = target.rpartition(":")
+        return await connect_tcp(host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown MCP transport: {spec!r} (expected stdio, unix:PATH or tcp:HOST:PORT)")
+
+
+class RemoteMCPServer:
+    """Client-side stand-in for an MCP server hosted behind a JSONRPCConnection."""
+
+    def __init__(self, connection: JSONRPCConnection, name: str, info: Dict[str, Any]):
+        self.connection = connection
+        self.name = name
+        self.version = info.get("version")
+        self.read_only_tools = set(info.get("readOnlyTools", ()))
+
+    async def handle_tool_call(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.connection.call("tools/call", {"name": tool_name, "arguments": args, "_meta": {"server": self.name}})
+
+
+async def remote_servers(connection: JSONRPCConnection) -> Dict[str, RemoteMCPServer]:
+    """Ask the host behind `connection` which servers it runs and wrap each one."""
+    info = await connection.request("initialize", {"protocolVersion": PROTOCOL_VERSION})
+    return {name: RemoteMCPServer(connection, name, server_info) for name, server_info in info["servers"].items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host MCP servers over JSON-RPC")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--stdio", action="store_true", help="Serve one client over stdin/stdout")
+    mode.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket")
+    mode.add_argument("--tcp", metavar="HOST:PORT", help="Listen on a TCP address")
+    parser.add_argument("--servers", help="Comma-separated servers to host (default: all)")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Bounded storage for sent emails.
+
+MemoryOutbox keeps the most recent `capacity` emails in a ring buffer, so a
+long-running process holds a fixed number of them however much it sends.
+SQLiteOutbox adds a durable history on disk:
+- Rows are written in batches.
+- A (recipient, id) index answers by_recipient() without a scan.
+- Rotation deletes the oldest rows once there are more than `max_history`.
+- Compaction runs an incremental vacuum, which hands the freed pages back to
+  the filesystem.
+All database work runs on one writer thread, so extend() never blocks the
+event loop: a full batch is handed over and written in the background.
+flush(), by_recipient(), history_size() and close() wait for the writer.
+
+Both stores take the `extend()` calls LocalSink makes, and create_outbox()
+chooses between them (OUTBOX_PATH in the agent).
+"""
+
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+FIELDS = ("to", "subject", "body", "message_id", "sent_at")
+
+
+class MemoryOutbox:
+    def __init__(self, capacity: int = 1000):
+        self.ring: deque = deque(maxlen=capacity)
+        self.appended = 0
+
+    def append(self, email: Dict[str, Any]):
+        self.extend((email,))
+
+    def extend(self, emails):
+        emails = list(emails)
+        self.ring.extend(emails)
+        self.appended += len(emails)
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest first."""
+        return [self.ring[-i] for i in range(1, min(limit, len(self.ring)) + 1)]
+
+    def by_recipient(self, to: str, limit: int = 20) -> List[Dict[str, Any]]:
+        to = to.lower()
+        return [email for email in reversed(self.ring) if email["to"].lower() == to][:limit]
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.ring)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self.ring[index]
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"appended": self.appended, "in_memory": len(self.ring), "capacity": self.ring.maxlen}
+
+
+class SQLiteOutbox(MemoryOutbox):
+    def __init__(self, path: str, capacity: int = 1000, max_history: int = 1_000_000, commit_every: int = 500):
+        super().__init__(capacity)
+        self.path = path
+        self.max_history = max_history
+        self.commit_every = commit_every
+        # Rotating costs a DELETE and a vacuum, so only do it after another tenth of the history has been written
+        self.rotate_every = max(commit_every, max_history // 10)
+        self.written = 0
+        self.rotations = 0
+        self._since_rotation = 0
+        self._pending: List[tuple] = []
+        self.write_errors = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox-writer")
+        self.db = self._writer.submit(self._open).result()
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30.0)
+        # auto_vacuum only takes effect before the first table is created
+        db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS emails (id INTEGER PRIMARY KEY, recipient TEXT NOT NULL, subject TEXT, body TEXT, message_id TEXT, sent_at TEXT)")
+        db.execute("CREATE INDEX IF NOT EXISTS emails_recipient ON emails (recipient, id)")
+        db.commit()
+        return db
+
+    def extend(self, emails):
+        emails = list(emails)
+        super().extend(emails)
+        self._pending.extend((email["to"].lower(), email.get("subject"), email.get("body"), email.get("message_id"), email.get("sent_at"))
+                             for email in emails)
+        if len(self._pending) >= self.commit_every:
+            self._submit()
+
+    def _submit(self):
+        """Hand the pending rows to the writer thread without waiting for them."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._writer.submit(self._write, batch)
+
+    def _write(self, batch: List[tuple]):
+        try:
+            with self.db:
+                self.db.executemany("INSERT INTO emails (recipient, subject, body, message_id, sent_at) VALUES (?, ?, ?, ?, ?)", batch)
+            self.written += len(batch)
+            self._since_rotation += len(batch)
+            if self._since_rotation >= self.rotate_every:
+                self.rotate()
+        except sqlite3.Error as error:
+            self.write_errors += 1
+            print(f"❌ Outbox write of {len(batch)} emails failed: {error}")
+
+    def flush(self):
+        """Write everything pending and wait until the writer has finished."""
+        self._submit()
+        self._writer.submit(lambda: None).result()
+
+    def rotate(self):
+        """Drop rows beyond the newest `max_history`, then compact the file. Runs on the writer thread."""
+        self._since_rotation = 0
+        with self.db:
+            self.db.execute("DELETE FROM emails WHERE id <= (SELECT MAX(id) FROM emails) - ?", (self.max_history,))
+        self.db.execute("PRAGMA incremental_vacuum")
+        self.rotations += 1
+
+    def by_recipient(self, to: str, limit: int = 20) -> List[Dict[str, Any]]:
+        self._submit()
+        return self._writer.submit(self._by_recipient, to.lower(), limit).result()
+
+    def _by_recipient(self, to: str, limit: int) -> List[Dict[str, Any]]:
+        rows = self.db.execute("SELECT recipient, subject, body, message_id, sent_at FROM emails WHERE recipient = ? ORDER BY id DESC LIMIT ?",
+                               (to, limit))
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def history_size(self) -> int:
+        self._submit()
+        return self._writer.submit(lambda: self.db.execute("SELECT COUNT(*) FROM emails").fetchone()[0]).result()
+
+    def close(self):
+        self._submit()
+        self._writer.submit(self.db.close).result()
+        self._writer.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "written": self.written, "pending": len(self._pending), "rotations": self.rotations, "max_history": self.max_history,
+                "write_errors": self.write_errors}
+
+
+def create_outbox(path: Optional[str] = None, capacity: int = 1000) -> MemoryOutbox:
+    return SQLiteOutbox(path, capacity) if path else MemoryOutbox(capacity)
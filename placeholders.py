@@ -0,0 +1,216 @@
+"""Plan arguments with {{...}} references to earlier results, compiled once per plan.
+
+A reference names an earlier step, followed by a path into its result:
+- {{find_customer.orders[0].order_number}}: the latest earlier step running
+  find_customer. The full tool name works too, as does a step's "id" or its
+  1-based position (step2).
+- {{customer_name}}, {{customer_id}}, {{order_number}}, {{order_id}} and
+  {{charge_id}} are legacy aliases. Each tries a list of paths, then a default.
+- order_number, order_id and customer_id arguments set to "unknown" or
+  "ORDER_NUMBER_PLACEHOLDER" are treated as their alias.
+
+compile_plan() parses every step once and binds each reference to a step
+index. Those indices are the step's dependencies, which the executor schedules
+on. References that cannot be bound are reported as errors before anything
+runs. StepProgram.resolve() then copies the literal arguments and fills in the
+rest, indexing the results list directly and walking precompiled paths.
+"""
+
+import functools
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+REFERENCE_PATTERN = re.compile(r"([\w-]+)((?:\.\w+|\[\d+\])*)")
+ACCESSOR_PATTERN = re.compile(r"\.(\w+)|\[(\d+)\]")
+
+# Legacy placeholder names: the paths tried in order, then the default
+LEGACY_ALIASES = {
+    "customer_name": (("find_customer.first_name",), "Valued Customer"),
+    "customer_id": (("find_customer.id",), "unknown"),
+    "order_number": (("get_order_status.order_number", "find_customer.orders[0].order_number"), "General Inquiry"),
+    "order_id": (("get_order_status.id", "find_customer.orders[0].id"), "unknown"),
+    "charge_id": (("get_customer_payments.charges[0].id",), "unknown"),
+}
+
+# Literal values also treated as "fill me in" for these argument names
+SENTINEL_VALUES = ("unknown", "ORDER_NUMBER_PLACEHOLDER")
+SENTINEL_KEYS = ("order_number", "order_id", "customer_id")
+
+MISSING = object()
+
+
+class PlaceholderError(ValueError):
+    pass
+
+
+# Compiled operations are plain tuples, which keeps large plans cheap for the garbage collector:
+#   (REQUIRED, index, path, text)           results[index] walked along path; an error if it is missing
+#   (ALIAS, ((index, path), ...), default)  the first candidate that is present, else default
+#   (TEXT, pieces)                          literal strings and operations, joined as text
+REQUIRED, ALIAS, TEXT = range(3)
+
+
+def _walk(value: Any, path: Tuple[Any, ...]) -> Any:
+    try:
+        for key in path:
+            value = value[key]
+    except (KeyError, IndexError, TypeError):
+        return MISSING
+    return MISSING if value is None else value
+
+
+def evaluate(operation: Tuple[Any, ...], results: Sequence[Any]) -> Any:
+    kind = operation[0]
+    if kind == REQUIRED:
+        value = _walk(results[operation[1]], operation[2])
+        if value is MISSING:
+            raise PlaceholderError(f"{{{{{operation[3]}}}}} is not in the result of step {operation[1] + 1}")
+        return value
+    if kind == ALIAS:
+        for index, path in operation[1]:
+            value = _walk(results[index], path)
+            if value is not MISSING:
+                return value
+        return operation[2]
+    return "".join(piece if isinstance(piece, str) else str(evaluate(piece, results)) for piece in operation[1])
+
+
+class StepProgram:
+    """How to build one step's arguments from the results of the steps before it."""
+
+    __slots__ = ("literal", "dynamic", "dependencies", "errors")
+
+    def __init__(self):
+        self.literal: Dict[str, Any] = {}
+        self.dynamic: List[Tuple[str, Tuple[Any, ...]]] = []
+        self.dependencies: Set[int] = set()
+        self.errors: Sequence[str] = ()
+
+    def resolve(self, results: Sequence[Any]) -> Dict[str, Any]:
+        args = self.literal.copy()
+        for key, operation in self.dynamic:
+            args[key] = evaluate(operation, results)
+        return args
+
+
+class Reference:
+    """A parsed, not yet bound placeholder: candidate (step name, path) pairs tried in order."""
+
+    __slots__ = ("text", "candidates", "default", "required")
+
+    def __init__(self, text: str, candidates: Tuple[Tuple[str, Tuple[Any, ...]], ...], default: Any = None, required: bool = True):
+        self.text = text
+        self.candidates = candidates
+        self.default = default
+        self.required = required
+
+
+def _candidates(reference: str) -> Tuple[Tuple[str, Tuple[Any, ...]], ...]:
+    match = REFERENCE_PATTERN.fullmatch(reference)
+    if not match:
+        return ()
+    head, path = match.groups()
+    accessors = tuple(field if field else int(index) for field, index in ACCESSOR_PATTERN.findall(path))
+    candidates = [(head, accessors)]
+    # Full tool names contain a dot: shopify-server.find_customer.id
+    if accessors and isinstance(accessors[0], str):
+        candidates.append((f"{head}.{accessors[0]}", accessors[1:]))
+    return tuple(candidates)
+
+
+def _parse_reference(reference: str) -> Reference:
+    if reference in LEGACY_ALIASES:
+        paths, default = LEGACY_ALIASES[reference]
+        return Reference(reference, tuple(candidate for path in paths for candidate in _candidates(path)[:1]), default, required=False)
+    return Reference(reference, _candidates(reference))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_argument(key: str, value: str) -> Optional[Tuple[Any, ...]]:
+    """None for a literal argument, else its pieces: literal text and References.
+
+    Plans repeat the same few argument strings, so each is parsed only once.
+    """
+    if key in SENTINEL_KEYS and value in SENTINEL_VALUES:
+        return (_parse_reference(key),)
+    if "{{" not in value:
+        return None
+    pieces: List[Any] = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(value):
+        if match.start() > position:
+            pieces.append(value[position:match.start()])
+        pieces.append(_parse_reference(match.group(1)))
+        position = match.end()
+    if not position:
+        return None
+    if position < len(value):
+        pieces.append(value[position:])
+    return tuple(pieces)
+
+
+def _bind(reference: Reference, names: Dict[str, int], program: StepProgram) -> Optional[Tuple[Any, ...]]:
+    if reference.required:
+        for head, path in reference.candidates:
+            index = names.get(head)
+            if index is not None:
+                program.dependencies.add(index)
+                return REQUIRED, index, path, reference.text
+        program.errors = [*program.errors, f"{{{{{reference.text}}}}} does not name an earlier step"]
+        return None
+    candidates = []
+    for head, path in reference.candidates:
+        index = names.get(head)
+        if index is not None:
+            candidates.append((index, path))
+            program.dependencies.add(index)
+    return ALIAS, tuple(candidates), reference.default
+
+
+def _bind_argument(pieces: Tuple[Any, ...], names: Dict[str, int], program: StepProgram) -> Optional[Tuple[Any, ...]]:
+    if len(pieces) == 1 and isinstance(pieces[0], Reference):
+        # The whole argument is one reference: keep the referenced value's type
+        return _bind(pieces[0], names, program)
+    bound = tuple(piece if isinstance(piece, str) else _bind(piece, names, program) for piece in pieces)
+    if any(piece is None for piece in bound):
+        return None
+    return TEXT, bound
+
+
+def _compile_step(step: Dict[str, Any], names: Dict[str, int]) -> StepProgram:
+    program = StepProgram()
+    for key, value in (step.get("args") or {}).items():
+        pieces = _parse_argument(key, value) if isinstance(value, str) else None
+        operation = _bind_argument(pieces, names, program) if pieces else None
+        if operation is None:
+            program.literal[key] = value
+        else:
+            program.dynamic.append((key, operation))
+    return program
+
+
+def compile_plan(tool_plan: List[Dict[str, Any]], compiled: Sequence[StepProgram] = ()) -> List[StepProgram]:
+    """One StepProgram per step. A name always refers to the latest earlier step that has it.
+
+    `compiled` holds programs already compiled for the first steps of this plan; they are
+    reused as they are, since a step only binds to the steps before it.
+    """
+    names: Dict[str, int] = {}
+    programs = []
+    for index, step in enumerate(tool_plan):
+        if index < len(compiled):
+            program = compiled[index]
+        else:
+            program = _compile_step(step, names)
+        programs.append(program)
+        tool = step.get("tool", "")
+        names[f"step{index + 1}"] = names[tool] = names[tool.rpartition(".")[2]] = index
+        if isinstance(step.get("id"), str):
+            names[step["id"]] = index
+    return programs
+
+
+def infer_dependencies(tool_plan: List[Dict[str, Any]]) -> List[Set[int]]:
+    """Return, for every step, the indices of the earlier steps whose results it consumes."""
+    return [program.dependencies for program in compile_plan(tool_plan)]
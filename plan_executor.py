@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+from placeholders import StepProgram, compile_plan
+from tool_results import tool_payload
+from tracing import tracer
+
+# Per-step progress prints, switched together with mcp_agent's request dumps by mcp_agent.set_verbose()
+VERBOSE = os.getenv("MCP_VERBOSE", "1") != "0"
+
+# Read-only lookups every plan (and the fallback plan) starts with, keyed only by the customer's email
+PREFETCH_TOOLS = ("shopify-server.find_customer", "stripe-server.get_customer_payments")
+
+
+def _prefetch_key(tool: str, args: Dict[str, Any]) -> Tuple[str, str]:
+    return tool, json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class Prefetcher:
+    """Start PREFETCH_TOOLS for a customer while the plan is still being written.
+
+    start() returns the in-flight lookups; PlanExecutor.execute() takes the ones a step
+    asks for with identical arguments and discards the rest. Stats count launched,
+    used (hits) and discarded (wasted) lookups, and the tool latency hidden behind planning.
+    """
+
+    def __init__(self, mcp_client, tools: Tuple[str, ...] = PREFETCH_TOOLS):
+        self.mcp_client = mcp_client
+        self.tools = tools
+        self.launched = 0
+        self.hits = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+
+    def start(self, customer_email: str) -> Dict[Tuple[str, str], Tuple[asyncio.Future, float, List[float]]]:
+        prefetched = {}
+        for tool in self.tools:
+            server_name, tool_name = tool.split(".")
+            args = {"email": customer_email}
+            finished: List[float] = []
+            task = asyncio.ensure_future(self.mcp_client.call_tool(server_name, tool_name, args))
+            task.add_done_callback(lambda _, finished=finished: finished.append(time.perf_counter()))
+            prefetched[_prefetch_key(tool, args)] = (task, time.perf_counter(), finished)
+            self.launched += 1
+        return prefetched
+
+    async def take(self, prefetched, tool: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The prefetched result for this call, or None if it was not prefetched (or the prefetch failed)."""
+        entry = prefetched.pop(_prefetch_key(tool, args), None)
+        if entry is None:
+            return None
+        task, started, finished = entry
+        waiting = time.perf_counter()
+        try:
+            result = await task
+        except Exception:
+            self.wasted += 1
+            return None
+        self.hits += 1
+        # The lookup's full duration, minus whatever part of it the step still had to wait for
+        ended = finished[0] if finished else time.perf_counter()
+        self.saved_seconds += max(0.0, (ended - started) - (time.perf_counter() - waiting))
+        return result
+
+    def discard(self, prefetched):
+        for task, _, _ in prefetched.values():
+            self.wasted += 1
+            if task.done() and not task.cancelled():
+                task.exception()
+            else:
+                task.cancel()
+        prefetched.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"launched": self.launched, "hits": self.hits, "wasted": self.wasted,
+                "hit_ratio": self.hits / self.launched if self.launched else 0.0, "saved_seconds": round(self.saved_seconds, 3)}
+
+
+class PlanExecutor:
+    def __init__(self, mcp_client):
+        self.mcp_client = mcp_client
+        self.prefetcher = Prefetcher(mcp_client)
+
+    async def execute(self, tool_plan: List[Dict[str, Any]], prefetched=None,
+                      programs: Optional[List[StepProgram]] = None) -> Dict[str, Any]:
+        """Run the plan and key each result by tool; later steps win, exactly as with sequential execution."""
+        results = await self.run(tool_plan, prefetched, programs)
+        execution_results = {}
+        for step, result in zip(tool_plan, results):
+            execution_results[step["tool"]] = result
+        return execution_results
+
+    async def run(self, tool_plan: List[Dict[str, Any]], prefetched=None,
+                  programs: Optional[List[StepProgram]] = None) -> List[Any]:
+        """Run the plan as a DAG: each step starts as soon as the results it references are in.
+
+        Returns one result per step, in plan order. `prefetched` comes from prefetcher.start();
+        lookups the plan does not ask for are discarded. `programs` is the plan already compiled
+        by placeholders.compile_plan(); without it the plan is compiled here.
+        """
+        if programs is None:
+            programs = compile_plan(tool_plan)
+        results: List[Any] = [None] * len(tool_plan)
+        tasks: List[Awaitable] = []
+
+        try:
+            for index, step in enumerate(tool_plan):
+                upstream = [tasks[d] for d in sorted(programs[index].dependencies)]
+                tasks.append(asyncio.ensure_future(self._run_step(index, step, programs[index], upstream, results, prefetched)))
+            await asyncio.gather(*tasks)
+        finally:
+            if prefetched:
+                self.prefetcher.discard(prefetched)
+        return results
+
+    async def _run_step(self, index: int, step: Dict[str, Any], program: StepProgram, upstream: List[Awaitable],
+                        results: List[Any], prefetched=None):
+        if upstream:
+            await asyncio.gather(*upstream)
+
+        if VERBOSE:
+            print(f"\n🔧 Step {index + 1}: {step['reasoning']}")
+        with tracer.span("tool", tool=step["tool"], step=index + 1) as span:
+            try:
+                if program.errors:
+                    # Caught before any backend call: the plan references something that never ran
+                    raise ValueError("; ".join(program.errors))
+                server_name, tool_name = step["tool"].split(".")
+                resolved_args = program.resolve(results)
+                result = await self.prefetcher.take(prefetched, step["tool"], resolved_args) if prefetched else None
+                if result is None:
+                    result = await self.mcp_client.call_tool(server_name, tool_name, resolved_args)
+                else:
+                    span.set(prefetched=True)
+                results[index] = tool_payload(result)
+                if span.recording:
+                    span.set(result_chars=len(json.dumps(results[index])))
+                if VERBOSE:
+                    print(f"✅ Step {index + 1} completed successfully")
+
+            except Exception as error:
+                if VERBOSE:
+                    print(f"❌ Step {index + 1} failed: {error}")
+                span.set(error=str(error))
+                results[index] = {"error": str(error)}
@@ -0,0 +1,217 @@
+"""Static checks and clean-up for LLM tool plans, run once before a plan is cached or executed.
+
+PlanOptimizer.optimize() removes the steps that could only waste a backend call:
+- unknown_tool: the server or tool is not in the catalogue (get_available_tools()).
+- invalid_args: a required argument is missing, or an argument is a list or
+  object where the catalogue expects a string or number.
+- unreachable: a {{...}} reference names no earlier step, or needs the result
+  of a step that was removed.
+- duplicate: a read-only step with the same tool and the same arguments as an
+  earlier one, bound to the same upstream steps. Later references to it are
+  pointed at the step that stays.
+
+The remaining steps keep their order; PlanExecutor already runs them as a
+DAG. A plan with nothing to remove is returned as it is. Otherwise the
+rewritten plan is compiled again, and placeholders.compile_plan must bind
+every kept reference to the same step as before. If it would not, the plan is
+returned unchanged. optimize_positions() also returns the compiled programs of
+the plan it returns, so the executor does not compile it a third time.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from placeholders import ALIAS, PLACEHOLDER_PATTERN, REFERENCE_PATTERN, REQUIRED, StepProgram, compile_plan
+
+REASONS = ("unknown_tool", "invalid_args", "unreachable", "duplicate")
+
+
+def _remap(operation: Tuple[Any, ...], mapping: Dict[int, int]) -> Optional[Tuple[Any, ...]]:
+    """The operation with its step indices translated through `mapping`, without reference text.
+
+    None if a required step is not in `mapping`. Alias candidates that are not in it become
+    (None, path): the alias may bind to another step there, whose value it would have fallen back to.
+    """
+    kind = operation[0]
+    if kind == REQUIRED:
+        index = mapping.get(operation[1])
+        return None if index is None else (REQUIRED, index, operation[2])
+    if kind == ALIAS:
+        return ALIAS, tuple((mapping.get(index), path) for index, path in operation[1]), operation[2]
+    pieces = tuple(piece if isinstance(piece, str) else _remap(piece, mapping) for piece in operation[1])
+    return None if any(piece is None for piece in pieces) else (kind, pieces)
+
+
+def _same_binding(expected: Tuple[Any, ...], actual: Tuple[Any, ...]) -> bool:
+    """True if `actual` binds like `expected`, where an alias candidate (None, path) may have found another step or none."""
+    kind = expected[0]
+    if kind != actual[0]:
+        return False
+    if kind == REQUIRED:
+        return expected == actual
+    if kind == ALIAS:
+        remaining = list(actual[1])
+        for index, path in expected[1]:
+            if remaining and remaining[0][1] == path and index in (None, remaining[0][0]):
+                remaining.pop(0)
+            elif index is not None:
+                return False
+        return not remaining and expected[2] == actual[2]
+    return len(expected[1]) == len(actual[1]) and all(
+        e == a if isinstance(e, str) else not isinstance(a, str) and _same_binding(e, a) for e, a in zip(expected[1], actual[1]))
+
+
+def _bindings(program: StepProgram, mapping: Dict[int, int]) -> Optional[Tuple[Any, ...]]:
+    """The step's arguments as bound operations, sorted by argument name; None if one cannot bind."""
+    bound = []
+    for key, operation in sorted(program.dynamic, key=lambda item: item[0]):
+        operation = _remap(operation, mapping)
+        if operation is None:
+            return None
+        bound.append((key, operation))
+    return tuple(bound)
+
+
+def _has_wildcard(value: Any) -> bool:
+    return value is None or isinstance(value, tuple) and any(_has_wildcard(item) for item in value)
+
+
+def _compilable(step: Any) -> Dict[str, Any]:
+    if isinstance(step, dict) and isinstance(step.get("tool"), str) and isinstance(step.get("args") or {}, dict):
+        return step
+    return {}
+
+
+class PlanOptimizer:
+    """Validates plans against a tool catalogue ({server: {tool: {"parameters": {...}, "required": [...]}}}).
+
+    `read_only` holds the full names (server.tool) of the tools safe to deduplicate.
+    stats() totals plans seen, steps in and out, removals by reason, and plans left
+    unchanged because a rewrite would not bind the same way.
+    """
+
+    def __init__(self, catalog: Dict[str, Any], read_only: Iterable[str] = ()):
+        self.catalog = catalog
+        self.read_only = set(read_only)
+        self.plans = 0
+        self.steps_in = 0
+        self.steps_out = 0
+        self.removed = dict.fromkeys(REASONS, 0)
+        self.unchanged = 0
+
+    def check_step(self, step: Any) -> Optional[str]:
+        """None if the step names a catalogue tool with well-formed arguments, else the reason it is not."""
+        if not isinstance(step, dict) or not isinstance(step.get("tool"), str):
+            return "unknown_tool"
+        server, _, tool = step["tool"].partition(".")
+        spec = self.catalog.get(server, {}).get(tool)
+        if spec is None:
+            return "unknown_tool"
+        args = step.get("args") or {}
+        if not isinstance(args, dict):
+            return "invalid_args"
+        if any(args.get(name) is None for name in spec.get("required", spec["parameters"])):
+            return "invalid_args"
+        if any(isinstance(args.get(name), (dict, list)) for name in spec["parameters"]):
+            return "invalid_args"
+        return None
+
+    def optimize(self, tool_plan: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Return the optimized plan and the steps removed from it, by reason."""
+        optimized, removed, _, _ = self.optimize_positions(tool_plan)
+        return optimized, removed
+
+    def optimize_positions(self, tool_plan: List[Dict[str, Any]]) -> Tuple[
+            List[Dict[str, Any]], Dict[str, int], List[Optional[int]], List[StepProgram]]:
+        """Like optimize(), plus the position in the optimized plan of the step that stands for each input
+        step, and the optimized plan's compiled programs (for PlanExecutor.run()).
+
+        A duplicate maps to the step it was merged into; a removed step maps to None.
+        """
+        removed = dict.fromkeys(REASONS, 0)
+        programs = compile_plan([_compilable(step) for step in tool_plan])
+        # Every step that stays or is stood in for, mapped to the original index of the step that runs
+        canonical: Dict[int, int] = {}
+        seen: Dict[Tuple[Any, ...], int] = {}
+
+        for index, step in enumerate(tool_plan):
+            reason = self.check_step(step)
+            bindings = None
+            if reason is None:
+                bindings = _bindings(programs[index], canonical)
+                if programs[index].errors or bindings is None:
+                    reason = "unreachable"
+            if reason is None and step["tool"] in self.read_only and not _has_wildcard(bindings):
+                key = (step["tool"], json.dumps(programs[index].literal, sort_keys=True, default=str), bindings)
+                if key in seen:
+                    canonical[index] = seen[key]
+                    removed["duplicate"] += 1
+                    continue
+                seen[key] = index
+            if reason is not None:
+                removed[reason] += 1
+                continue
+            canonical[index] = index
+
+        optimized = tool_plan
+        positions: List[Optional[int]] = list(range(len(tool_plan)))
+        if any(removed.values()):
+            rewritten = self._rewrite(tool_plan, programs, canonical)
+            if rewritten is None:
+                # Removing steps would change how a remaining reference binds: run the plan as written
+                self.unchanged += 1
+                removed = dict.fromkeys(REASONS, 0)
+            else:
+                optimized, programs = rewritten
+                kept = {index: new for new, index in enumerate(index for index in canonical if canonical[index] == index)}
+                positions = [kept[canonical[index]] if index in canonical else None for index in range(len(tool_plan))]
+
+        self.plans += 1
+        self.steps_in += len(tool_plan)
+        self.steps_out += len(optimized)
+        for reason, count in removed.items():
+            self.removed[reason] += count
+        return optimized, removed, positions, programs
+
+    @staticmethod
+    def _rewrite(tool_plan: List[Dict[str, Any]], programs: List[StepProgram],
+                 canonical: Dict[int, int]) -> Optional[Tuple[List[Dict[str, Any]], List[StepProgram]]]:
+        """The kept steps, with position and id references renumbered, and their programs;
+        None if anything would bind differently."""
+        order = [index for index in canonical if canonical[index] == index]
+        position = {index: new for new, index in enumerate(order)}
+        mapping = {index: position[target] for index, target in canonical.items()}
+        # Heads that must be renamed: step positions, and the ids of removed duplicates
+        renames = {f"step{index + 1}": f"step{new + 1}" for index, new in mapping.items()}
+        for index, target in canonical.items():
+            step_id = tool_plan[index].get("id")
+            if index != target and isinstance(step_id, str):
+                renames[step_id] = f"step{mapping[index] + 1}"
+
+        def rename(match):
+            reference = REFERENCE_PATTERN.fullmatch(match.group(1))
+            if reference is None or reference.group(1) not in renames:
+                return match.group(0)
+            return "{{" + renames[reference.group(1)] + reference.group(2) + "}}"
+
+        optimized = []
+        for index in order:
+            step = dict(tool_plan[index])
+            step["args"] = {key: PLACEHOLDER_PATTERN.sub(rename, value) if isinstance(value, str) and "{{" in value else value
+                            for key, value in (step.get("args") or {}).items()}
+            optimized.append(step)
+
+        identity = {index: index for index in range(len(order))}
+        compiled = compile_plan(optimized)
+        for new, program in enumerate(compiled):
+            expected = _bindings(programs[order[new]], mapping)
+            actual = _bindings(program, identity)
+            if program.errors or expected is None or len(expected) != len(actual) or not all(
+                    e[0] == a[0] and _same_binding(e[1], a[1]) for e, a in zip(expected, actual)):
+                return None
+        return optimized, compiled
+
+    def stats(self) -> Dict[str, Any]:
+        return {"plans": self.plans, "steps_in": self.steps_in, "steps_out": self.steps_out, "removed": dict(self.removed),
+                "removed_per_plan": (self.steps_in - self.steps_out) / self.plans if self.plans else 0.0,
+                "unchanged": self.unchanged}
@@ -0,0 +1,116 @@
+"""Email templates compiled once into render functions.
+
+Registry templates look like {"subject": "Order Update for {{customer_name}}", "body": "..."}.
+When a template is registered, each part is scanned once and split into its
+literal pieces and {{name}} fields. A render looks each name up once and joins
+each part's pieces, so it does no regex work, parses no format string and runs
+no generated code: braces and quotes in the literal text are copied as they are.
+TemplateRegistry compiles everything at load, renders one recipient or many, and
+recompiles when reload() or register() changes the source.
+"""
+
+import operator
+import re
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def compile_text(text: str, literals: List[str], fields: Dict[str, int]) -> Tuple[int, ...]:
+    """`text` as a sequence of pieces: literal text, appended to `literals`, and fields.
+
+    A literal is its index in `literals`; a field is ~its index in `fields`, which
+    collects new names in order.
+    """
+    pieces = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        if match.start() > position:
+            pieces.append(len(literals))
+            literals.append(text[position:match.start()])
+        pieces.append(~fields.setdefault(match.group(1), len(fields)))
+        position = match.end()
+    if position < len(text) or not pieces:
+        pieces.append(len(literals))
+        literals.append(text[position:])
+    return tuple(pieces)
+
+
+def compile_renderer(parts: Mapping[str, str]) -> Tuple[Callable[[Mapping[str, Any]], Dict[str, str]], Tuple[str, ...]]:
+    """One function rendering every part of a template, and the placeholder names it reads.
+
+    A render builds one list of the literal pieces followed by the values as strings,
+    and each part is joined from the items an itemgetter picks out of it.
+    """
+    literals: List[str] = []
+    fields: Dict[str, int] = {}
+    pieces = {part: compile_text(text, literals, fields) for part, text in parts.items()}
+    names = tuple(fields)
+    getters = []
+    for part, part_pieces in pieces.items():
+        # Field ~i lands right after the literals
+        indices = [piece if piece >= 0 else len(literals) + ~piece for piece in part_pieces]
+        # A one-item itemgetter returns the item itself, a slice keeps it in a list
+        getters.append((part, operator.itemgetter(*indices) if len(indices) > 1 else operator.itemgetter(slice(indices[0], indices[0] + 1))))
+
+    def render(values: Mapping[str, Any]) -> Dict[str, str]:
+        strings = literals + [str(values[name]) for name in names]
+        rendered = {}
+        for part, get in getters:
+            rendered[part] = "".join(get(strings))
+        return rendered
+
+    return render, names
+
+
+class CompiledTemplate:
+    __slots__ = ("name", "fields", "_render")
+
+    def __init__(self, name: str, source: Mapping[str, str]):
+        self.name = name
+        self._render, self.fields = compile_renderer(source)
+
+    def render(self, values: Mapping[str, Any]) -> Dict[str, str]:
+        try:
+            return self._render(values)
+        except KeyError as error:
+            raise ValueError(f"Template {self.name} needs a value for {error.args[0]}") from None
+
+    def render_many(self, rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, str]]:
+        """Render for many recipients in one call."""
+        try:
+            return list(map(self._render, rows))
+        except KeyError as error:
+            raise ValueError(f"Template {self.name} needs a value for {error.args[0]}") from None
+
+
+class TemplateRegistry:
+    def __init__(self, source: Optional[Dict[str, Mapping[str, str]]] = None):
+        self.source: Dict[str, Mapping[str, str]] = {}
+        self.compiled: Dict[str, CompiledTemplate] = {}
+        self.version = 0
+        self.reload(source or {})
+
+    def reload(self, source: Optional[Dict[str, Mapping[str, str]]] = None):
+        """Recompile every template, from `source` if given, else from the current source dict (edited in place)."""
+        if source is not None:
+            self.source = source
+        self.compiled = {name: CompiledTemplate(name, template) for name, template in self.source.items()}
+        self.version += 1
+
+    def register(self, name: str, template: Mapping[str, str]):
+        self.source[name] = template
+        self.compiled[name] = CompiledTemplate(name, template)
+        self.version += 1
+
+    def get(self, name: str) -> CompiledTemplate:
+        try:
+            return self.compiled[name]
+        except KeyError:
+            raise ValueError(f"Unknown email template: {name}") from None
+
+    def render(self, name: str, values: Mapping[str, Any]) -> Dict[str, str]:
+        return self.get(name).render(values)
+
+    def render_many(self, name: str, rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, str]]:
+        return self.get(name).render_many(rows)
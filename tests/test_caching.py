@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from caching import PlanCache, ToolResultCache, customer_values
+from llm_backends import StubBackend
+
+
+def lost_package_plan(email, customer_name, product):
+    return [
+        {"tool": "shopify-server.find_customer", "args": {"email": email}, "reasoning": "Look up customer"},
+        {"tool": "action-server.ship_replacement", "args": {"customer_id": "{{customer_id}}", "product": product}, "reasoning": "Replace"},
+        {"tool": "email-server.send_order_update", "args": {"to": email, "customer_name": customer_name, "order_number": "{{order_number}}"},
+         "reasoning": "Email"},
+    ]
+
+
+def test_plan_with_customer_literals_is_not_served_to_another_customer():
+    cache = PlanCache()
+    cache.put("My package is lost", "lisa@email.com", lost_package_plan("lisa@email.com", "Lisa", "Bluetooth Speaker"))
+
+    assert cache.get("My package is lost", "john@email.com") is None
+
+
+def test_plan_with_references_is_served_to_two_customers():
+    cache = PlanCache()
+    cache.put("My package is lost", "lisa@email.com", lost_package_plan("lisa@email.com", "{{customer_name}}", "{{find_customer.orders[0].product}}"))
+
+    for email in ("lisa@email.com", "john@email.com"):
+        plan = cache.get("My package is lost", email)
+        assert plan == lost_package_plan(email, "{{customer_name}}", "{{find_customer.orders[0].product}}")
+
+
+def test_stub_plan_is_stored_and_served_to_a_second_customer():
+    cache = PlanCache()
+    cache.put("My package is lost", "lisa@email.com", StubBackend._plan_steps("lisa@email.com", "My package is lost"))
+
+    assert cache.get("My package is lost", "john@email.com") == StubBackend._plan_steps("john@email.com", "My package is lost")
+    assert cache.stats()["hits"] == 1
+
+
+def test_values_copied_from_the_customers_records_are_not_reusable():
+    records = {"id": "customer_004", "email": "lisa@email.com", "orders": [{"order_number": "1004", "product": "Bluetooth Speaker"}]}
+    plan = lost_package_plan("lisa@email.com", "{{customer_name}}", "Bluetooth Speaker")
+
+    assert PlanCache.is_reusable("My package is lost", "lisa@email.com", plan)
+    assert not PlanCache.is_reusable("My package is lost", "lisa@email.com", plan, customer_values(records))
+
+
+def test_policy_literals_are_reusable_but_other_emails_are_not():
+    plan = [{"tool": "action-server.upgrade_shipping", "args": {"order_id": "{{order_id}}", "new_method": "express"}, "reasoning": "Upgrade"},
+            {"tool": "action-server.apply_credit", "args": {"customer_id": "{{customer_id}}", "amount": "$10", "reason": "excellent_service"},
+             "reasoning": "Credit"}]
+
+    assert PlanCache.is_reusable("My order is late", "lisa@email.com", plan)
+    plan[1]["args"]["reason"] = "as promised to john@email.com"
+    assert not PlanCache.is_reusable("My order is late", "lisa@email.com", plan)
+
+
+def test_saves_are_debounced_and_flushed_on_close(tmp_path):
+    path = tmp_path / "plans.json"
+
+    async def run():
+        cache = PlanCache(path=str(path), save_delay=60.0)
+        for request in ("My package is lost", "My order is late"):
+            cache.put(request, "lisa@email.com", StubBackend._plan_steps("lisa@email.com", request))
+        assert not path.exists()
+        await cache.aclose()
+
+    asyncio.run(run())
+    assert len(json.loads(path.read_text())) == 2
+    assert PlanCache(path=str(path)).get("My order is late", "john@email.com") is not None
+
+
+def test_values_quoted_in_the_request_are_reusable():
+    plan = [{"tool": "shopify-server.get_order_status", "args": {"order_number": "1004", "customer_email": "lisa@email.com"}, "reasoning": "Status"}]
+
+    assert PlanCache.is_reusable("Where is order 1004?", "lisa@email.com", plan)
+    assert not PlanCache.is_reusable("Where is my order?", "lisa@email.com", plan)
+
+
+def test_reads_after_a_write_are_cached_again():
+    cache = ToolResultCache({"shopify-server.find_customer": 300.0})
+    tags = {"john@email.com", "customer_001"}
+    cache.put("shopify-server.find_customer", "john", {"id": "customer_001"}, tags, cache.generation)
+    cache.invalidate({"customer_001"})
+
+    assert cache.get("shopify-server.find_customer", "john") is None
+    cache.put("shopify-server.find_customer", "john", {"id": "customer_001"}, tags, cache.generation)
+    for _ in range(3):
+        assert cache.get("shopify-server.find_customer", "john") == {"id": "customer_001"}
+
+
+def test_read_in_flight_during_a_write_is_not_cached():
+    cache = ToolResultCache({"shopify-server.find_customer": 300.0})
+    since = cache.generation
+    cache.invalidate({"customer_001"})
+    cache.put("shopify-server.find_customer", "john", {"id": "customer_001"}, {"john@email.com", "customer_001"}, since)
+
+    assert cache.get("shopify-server.find_customer", "john") is None
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from chat_server import ChatServer, HTTPError
+
+
+def test_idle_sessions_expire_and_free_their_slot():
+    server = ChatServer(agent=None, max_sessions=2, session_ttl=60.0)
+    for email in ("john@email.com", "sarah@email.com"):
+        server._create_session({"email": email})
+    for session in server.sessions.values():
+        session.last_active -= 61.0
+
+    status, payload = server._create_session({"email": "lisa@email.com"})
+
+    assert status == 201
+    assert list(server.sessions) == [payload["session_id"]]
+    assert server.expired == 2
+
+
+def test_full_server_still_rejects_active_sessions():
+    server = ChatServer(agent=None, max_sessions=1, session_ttl=60.0)
+    server._create_session({"email": "john@email.com"})
+
+    with pytest.raises(HTTPError) as error:
+        server._create_session({"email": "sarah@email.com"})
+    assert error.value.status == 503
+
+
+async def read(request):
+    reader = asyncio.StreamReader()
+    reader.feed_data(request)
+    reader.feed_eof()
+    return await ChatServer(agent=None)._read_request(reader)
+
+
+def test_non_numeric_content_length_is_a_bad_request():
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(read(b"POST /sessions HTTP/1.1\r\nContent-Length: abc\r\n\r\n"))
+    assert error.value.status == 400
+
+
+def test_body_shorter_than_content_length_is_a_bad_request():
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(read(b'POST /sessions HTTP/1.1\r\nContent-Length: 40\r\n\r\n{"email": "john'))
+    assert error.value.status == 400
@@ -0,0 +1,29 @@
+from customer_store import CustomerStore
+
+
+def store_with_shared_order_number():
+    data = {
+        "shopify": {"customers": [
+            {"id": "customer_001", "email": "john@email.com", "orders": [{"order_number": "1001", "id": "order_001", "status": "delivered"}]},
+            {"id": "customer_002", "email": "sarah@email.com", "orders": [{"order_number": "1001", "id": "order_002", "status": "shipping_delayed"}]},
+        ]},
+        "stripe": {"customers": []},
+    }
+    return CustomerStore(data)
+
+
+def test_duplicate_order_numbers_resolve_per_customer():
+    store = store_with_shared_order_number()
+
+    assert store.find_order("1001", customer_email="john@email.com")["id"] == "order_001"
+    assert store.find_order("1001", customer_email="sarah@email.com")["id"] == "order_002"
+    assert store.find_order("1001", customer_email="mike@email.com") is None
+    assert store.find_order("1001")["id"] == "order_001"
+
+
+def test_added_orders_are_only_unique_per_customer():
+    store = store_with_shared_order_number()
+    store.add_order("customer_001", {"order_number": "1002", "id": "order_003"})
+    store.add_order("customer_002", {"order_number": "1002", "id": "order_004"})
+
+    assert store.find_order("1002", customer_email="sarah@email.com")["id"] == "order_004"
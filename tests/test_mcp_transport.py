@@ -0,0 +1,37 @@
+import asyncio
+
+from mcp_transport import INTERNAL_ERROR, INVALID_PARAMS, MCPServerHost
+
+
+class FailingServer:
+    version = "1.0"
+    read_only_tools = set()
+
+    async def handle_tool_call(self, tool_name, args):
+        raise RuntimeError("backend exploded")
+
+
+def handle(message):
+    return asyncio.run(MCPServerHost({"action-server": FailingServer()}).handle_message(message))
+
+
+def test_params_that_are_not_objects_get_invalid_params():
+    for params in ([1, 2], {"name": "x", "_meta": "x"}, {"name": "x", "arguments": [1]}):
+        response = handle({"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": params})
+        assert response["id"] == 7
+        assert response["error"]["code"] == INVALID_PARAMS
+
+
+def test_server_exceptions_become_error_responses():
+    response = handle({"jsonrpc": "2.0", "id": 8, "method": "tools/call", "params": {"name": "apply_credit", "arguments": {}}})
+
+    assert response["id"] == 8
+    assert response["error"]["code"] == INTERNAL_ERROR
+
+
+def test_failing_batch_item_is_answered_alongside_the_others():
+    responses = handle([{"jsonrpc": "2.0", "id": 1, "method": "ping"},
+                        {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": [1, 2]}])
+
+    assert [response["id"] for response in responses] == [1, 2]
+    assert "error" in responses[1]
@@ -0,0 +1,88 @@
+import pytest
+
+from placeholders import PlaceholderError, compile_plan
+
+CUSTOMER = {"id": "customer_001", "first_name": "John", "orders": [{"order_number": "1001", "id": "order_001"}]}
+PAYMENTS = {"charges": [{"id": "ch_001"}]}
+
+
+def step(tool, **args):
+    return {"tool": tool, "args": args}
+
+
+def test_path_references_keep_the_value_type_or_join_as_text():
+    plan = [
+        step("shopify-server.find_customer", email="john@email.com"),
+        step("action-server.apply_credit", customer_id="{{find_customer.id}}", amount="{{step1.orders[0].order_number}}",
+             reason="order {{shopify-server.find_customer.orders[0].id}} for {{ find_customer.first_name }}"),
+    ]
+    programs = compile_plan(plan)
+
+    assert programs[1].dependencies == {0}
+    assert programs[1].errors == ()
+    args = programs[1].resolve([CUSTOMER, None])
+    assert args == {"customer_id": "customer_001", "amount": "1001", "reason": "order order_001 for John"}
+    assert compile_plan([step("a.x"), step("b.y", value="{{x.orders}}")])[1].resolve([CUSTOMER, None]) == {"value": CUSTOMER["orders"]}
+
+
+def test_references_bind_to_the_latest_earlier_step_or_its_id():
+    plan = [
+        {"tool": "shopify-server.find_customer", "args": {}, "id": "first"},
+        step("shopify-server.find_customer"),
+        step("action-server.apply_credit", latest="{{find_customer.id}}", named="{{first.id}}"),
+    ]
+    program = compile_plan(plan)[2]
+
+    assert program.dependencies == {0, 1}
+    assert program.resolve([{"id": "a"}, {"id": "b"}, None]) == {"latest": "b", "named": "a"}
+
+
+def test_legacy_aliases_try_each_path_then_fall_back():
+    plan = [
+        step("shopify-server.find_customer", email="john@email.com"),
+        step("stripe-server.get_customer_payments", email="john@email.com"),
+        step("email-server.send_order_update", customer_name="{{customer_name}}", order_number="{{order_number}}",
+             order_id="unknown", charge="{{charge_id}}"),
+    ]
+    program = compile_plan(plan)[2]
+
+    assert program.dependencies == {0, 1}
+    assert program.resolve([CUSTOMER, PAYMENTS, None]) == {
+        "customer_name": "John", "order_number": "1001", "order_id": "order_001", "charge": "ch_001"}
+    assert program.resolve([{}, {}, None]) == {
+        "customer_name": "Valued Customer", "order_number": "General Inquiry", "order_id": "unknown", "charge": "unknown"}
+
+
+def test_legacy_aliases_without_their_steps_use_the_default():
+    program = compile_plan([step("email-server.send_order_update", customer_name="{{customer_name}}")])[0]
+
+    assert program.errors == ()
+    assert program.resolve([None]) == {"customer_name": "Valued Customer"}
+
+
+def test_references_to_missing_steps_are_compile_errors():
+    plan = [
+        step("action-server.apply_credit", customer_id="{{find_customer.id}}"),
+        step("shopify-server.find_customer", email="john@email.com"),
+        step("email-server.send_order_update", order_number="{{step9.order_number}}"),
+    ]
+    programs = compile_plan(plan)
+
+    assert programs[0].errors == ["{{find_customer.id}} does not name an earlier step"]
+    assert programs[2].errors == ["{{step9.order_number}} does not name an earlier step"]
+
+
+def test_missing_paths_fail_at_resolve_time():
+    program = compile_plan([step("shopify-server.find_customer"), step("action-server.apply_credit", customer_id="{{find_customer.vip}}")])[1]
+
+    with pytest.raises(PlaceholderError, match="not in the result of step 1"):
+        program.resolve([CUSTOMER, None])
+
+
+def test_compiled_prefix_is_reused():
+    plan = [step("shopify-server.find_customer"), step("action-server.apply_credit", customer_id="{{customer_id}}")]
+    programs = compile_plan(plan)
+    extended = compile_plan(plan + [step("email-server.send_order_update", to="{{step2.credit_id}}")], programs)
+
+    assert extended[:2] == programs
+    assert extended[2].dependencies == {1}
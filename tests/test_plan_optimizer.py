@@ -0,0 +1,73 @@
+from plan_optimizer import PlanOptimizer
+
+CATALOG = {
+    "shopify-server": {
+        "find_customer": {"parameters": {"email": "string"}},
+        "get_order_status": {"parameters": {"order_number": "string", "customer_email": "string"}},
+    },
+    "action-server": {
+        "apply_credit": {"parameters": {"customer_id": "string", "amount": "string", "reason": "string"}, "required": ["customer_id"]},
+    },
+}
+READ_ONLY = ("shopify-server.find_customer", "shopify-server.get_order_status")
+
+
+def optimizer():
+    return PlanOptimizer(CATALOG, READ_ONLY)
+
+
+def lookup(email="john@email.com", **extra):
+    return {"tool": "shopify-server.find_customer", "args": {"email": email}, **extra}
+
+
+def credit(customer_id):
+    return {"tool": "action-server.apply_credit", "args": {"customer_id": customer_id, "amount": "$10"}}
+
+
+def test_identical_reads_are_merged_and_references_rebound():
+    plan = [lookup(), lookup(id="again"), credit("{{step2.id}}"), credit("{{again.id}}")]
+    optimized, removed, positions, programs = optimizer().optimize_positions(plan)
+
+    assert removed["duplicate"] == 1
+    assert optimized == [lookup(), credit("{{step1.id}}"), credit("{{step1.id}}")]
+    assert positions == [0, 0, 1, 2]
+    assert [program.dependencies for program in programs] == [set(), {0}, {0}]
+
+
+def test_reads_with_different_arguments_and_writes_are_kept():
+    plan = [lookup(), lookup("sarah@email.com"), credit("customer_001"), credit("customer_001")]
+    optimized, removed = optimizer().optimize(plan)
+
+    assert optimized is plan
+    assert not any(removed.values())
+
+
+def test_removed_steps_renumber_later_references():
+    plan = [{"tool": "shopify-server.no_such_tool", "args": {}}, credit("customer_001"), lookup(), credit("{{step3.id}}")]
+    optimized, removed = optimizer().optimize(plan)
+
+    assert removed["unknown_tool"] == 1
+    assert optimized == [credit("customer_001"), lookup(), credit("{{step2.id}}")]
+
+
+def test_steps_depending_on_removed_steps_are_unreachable():
+    plan = [{"tool": "shopify-server.find_customer", "args": {}}, credit("{{step1.id}}"), credit("{{step9.id}}"), lookup()]
+    optimized, removed = optimizer().optimize(plan)
+
+    assert removed == {"unknown_tool": 0, "invalid_args": 1, "unreachable": 2, "duplicate": 0}
+    assert optimized == [lookup()]
+
+
+def test_plan_is_kept_when_removing_a_step_would_rebind_a_reference():
+    # {{find_customer.id}} means the latest lookup: the removed duplicate, which stands for step 1.
+    # Without it the name would bind to sarah's lookup instead.
+    plan = [lookup(), lookup("sarah@email.com"), lookup(), credit("{{find_customer.id}}")]
+    plan_optimizer = optimizer()
+    optimized, removed, positions, programs = plan_optimizer.optimize_positions(plan)
+
+    assert optimized is plan
+    assert not any(removed.values())
+    assert positions == [0, 1, 2, 3]
+    assert programs[3].dependencies == {2}
+    assert plan_optimizer.stats()["unchanged"] == 1
+    assert plan_optimizer.stats()["steps_out"] == 4
@@ -0,0 +1,33 @@
+import pytest
+
+from templates import TemplateRegistry
+
+
+def test_literal_text_is_copied_as_written():
+    registry = TemplateRegistry({"odd": {
+        "subject": 'It\'s "{{name}}" \\n {single} {{{name}}} %s {0}',
+        "body": "{{ name }} owes {{amount}}; {{name}} again. No fields {here}.",
+        "footer": "Thanks!",
+        "empty": "",
+    }})
+
+    assert registry.render("odd", {"name": "Ann", "amount": 5}) == {
+        "subject": 'It\'s "Ann" \\n {single} {Ann} %s {0}',
+        "body": "Ann owes 5; Ann again. No fields {here}.",
+        "footer": "Thanks!",
+        "empty": "",
+    }
+    assert registry.get("odd").fields == ("name", "amount")
+
+
+def test_values_are_not_interpreted():
+    registry = TemplateRegistry({"t": {"body": "Hi {{name}}"}})
+
+    assert registry.render_many("t", [{"name": "{{other}}"}, {"name": "{0!r}"}]) == [{"body": "Hi {{other}}"}, {"body": "Hi {0!r}"}]
+
+
+def test_missing_values_name_the_template_and_field():
+    registry = TemplateRegistry({"t": {"subject": "{{a}}", "body": "{{b}}"}})
+
+    with pytest.raises(ValueError, match="Template t needs a value for b"):
+        registry.render("t", {"a": 1})
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from llm_backends import create_backend
+from mcp_agent import TOOL_SCHEMAS, UnifiedCustomerSupportAgent, set_verbose
+
+
+def run_tool_calling(plan_steps):
+    set_verbose(False)
+    llm = create_backend("stub")
+    llm._plan_steps = plan_steps
+    conversations = []
+    complete_with_tools = llm.complete_with_tools
+
+    async def recorded(messages, tools, temperature=0.1):
+        conversations.append(json.loads(json.dumps(messages)))
+        return await complete_with_tools(messages, tools, temperature)
+
+    llm.complete_with_tools = recorded
+
+    async def run():
+        agent = UnifiedCustomerSupportAgent(llm, tool_calling=True)
+        await agent.startup()
+        try:
+            await agent.handle_request("lisa@email.com", "My package is lost")
+        finally:
+            await agent.shutdown()
+        return agent
+
+    agent = asyncio.run(run())
+    messages = conversations[-1]
+    calls = next(m["tool_calls"] for m in messages if m.get("tool_calls"))
+    outputs = {m["tool_call_id"]: json.loads(m["content"]) for m in messages if m["role"] == "tool"}
+    return agent, calls, outputs
+
+
+def test_tool_calls_are_checked_and_completed_like_text_plans():
+    stub_steps = create_backend("stub")._plan_steps
+
+    def faulty(email, request):
+        steps = stub_steps(email, request)[:-1]
+        return [steps[0], dict(steps[0]), {"tool": "shopify-server.nope", "args": {}, "reasoning": "Unknown"}] + steps[1:]
+
+    agent, calls, outputs = run_tool_calling(faulty)
+
+    assert outputs["call_1"] == outputs["call_0"]
+    assert outputs["call_2"] == {"error": "Not run: unknown tool"}
+    assert calls[-1]["function"]["name"] == "email-server__send_order_update"
+    assert outputs[calls[-1]["id"]]["success"] is True
+    assert agent.plan_optimizer.stats()["removed"]["duplicate"] == 1
+    assert len(outputs) == len(calls)
+
+
+def test_number_arguments_accept_references():
+    refund = next(tool for tool in TOOL_SCHEMAS if tool["function"]["name"] == "action-server__process_refund")
+
+    assert refund["function"]["parameters"]["properties"]["amount"]["type"] == ["number", "string"]
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from tool_results import LazyTextContent, materialize, tool_payload, tool_result
+
+
+def test_lazy_text_item_has_one_shape_for_every_view():
+    item = tool_result({"id": "customer_001"})["content"][0]
+
+    assert "text" in item
+    assert list(item.keys()) == ["type", "text"]
+    assert item.get("text") == '{"id": "customer_001"}'
+    assert dict(item) == {"type": "text", "text": '{"id": "customer_001"}'}
+    assert item == {"type": "text", "text": '{"id": "customer_001"}'}
+
+
+def test_unmaterialized_results_cannot_be_serialized():
+    with pytest.raises(TypeError):
+        json.dumps(tool_result({"id": "customer_001"}))
+
+
+def test_materialize_makes_the_wire_form():
+    result = materialize(tool_result({"id": "customer_001"}))
+
+    assert not isinstance(result["content"][0], LazyTextContent)
+    wire = json.loads(json.dumps(result))
+    assert wire["content"] == [{"type": "text", "text": '{"id": "customer_001"}'}]
+    assert tool_payload({"content": wire["content"]}) == {"id": "customer_001"}
+
+
+def test_results_do_not_follow_later_writes_to_the_record():
+    record = {"id": "customer_001", "orders": [{"order_number": "1001", "status": "processing"}]}
+    result = tool_result(record)
+
+    record["email"] = "new@email.com"
+    record["orders"][0]["status"] = "delivered"
+    record["orders"].append({"order_number": "1002"})
+
+    expected = {"id": "customer_001", "orders": [{"order_number": "1001", "status": "processing"}]}
+    assert tool_payload(result) == expected
+    assert json.loads(result["content"][0]["text"]) == expected
@@ -0,0 +1,83 @@
+"""Tool results that carry their structured payload and serialize it to text only on demand.
+
+MCP results have the shape {"content": [{"type": "text", "text": "<json>"}], ...}.
+tool_result() adds the payload itself as "structuredContent" (as the MCP spec
+allows), and the text item is a LazyTextContent that runs json.dumps the first
+time "text" is read. In-process callers use tool_payload() and never pay for
+an encode/decode round-trip. LazyTextContent is a read-only mapping, not a
+dict, so json.dumps refuses it rather than writing an item without "text":
+call materialize() on every result that leaves the process.
+
+Servers hand tool_result() live store records, and results outlive the call in
+the result cache and the prefetcher, so the payload is snapshotted first: a
+later write to the store must not change a result that was already returned,
+or make its lazy text disagree with its structuredContent.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class LazyTextContent(Mapping):
+    """A {"type": "text", "text": ...} content item whose "text" is the JSON of `payload`, encoded on first access.
+
+    Every mapping view (`in`, keys(), items(), get(), len(), ==) sees both keys.
+    """
+
+    __slots__ = ("payload", "_text")
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.payload)
+        return self._text
+
+    def __getitem__(self, key):
+        if key == "type":
+            return "text"
+        if key == "text":
+            return self.text
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("type", "text"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"LazyTextContent({self.payload!r})"
+
+
+def snapshot(value: Any) -> Any:
+    """Copy the dicts and lists of a JSON-shaped value; scalars are immutable and shared."""
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [snapshot(item) for item in value]
+    return value
+
+
+def tool_result(payload: Any) -> Dict[str, Any]:
+    payload = snapshot(payload)
+    return {"content": [LazyTextContent(payload)], "structuredContent": payload}
+
+
+def tool_payload(result: Dict[str, Any]) -> Any:
+    """The structured result: structuredContent when present, else the first text item parsed as JSON."""
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    return json.loads(result["content"][0]["text"])
+
+
+def materialize(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace any lazy text items with plain dicts, in place, so the result can be sent with json.dumps."""
+    content = result.get("content")
+    if isinstance(content, list):
+        result["content"] = [dict(item) if isinstance(item, LazyTextContent) else item for item in content]
+    return result
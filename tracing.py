@@ -0,0 +1,192 @@
+"""Low-overhead tracing for the agent's hot path.
+
+Spans cover a whole request and its plan, tool and synthesis phases. Finished
+spans go into an in-memory ring buffer and, optionally, to a batched JSON-lines
+exporter that writes from a background task. Sampling is decided once per
+request and inherited by child spans; with a sample rate of 0 (the default)
+tracer.span() hands back a shared no-op span and nothing is recorded.
+
+Configured from the environment:
+    MCP_TRACE_SAMPLE   fraction of requests to trace (0 disables tracing)
+    MCP_TRACE_FILE     append finished spans as JSON lines to this file
+    MCP_TRACE_BUFFER   size of the in-memory ring buffer (default 10000)
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    recording = False
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Async generators can finish in a different context than they started in
+            pass
+        if exc is not None:
+            self.attrs.setdefault("error", repr(exc))
+        self.tracer._finish({"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id, "name": self.name,
+                             "start": self.started_at, "duration_ms": duration * 1000, **self.attrs})
+        return False
+
+
+class _NotSampled(_NoopSpan):
+    """Marks a request that lost the sampling draw so its children skip recording too."""
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass
+        return False
+
+
+class JSONLinesExporter:
+    """Buffers finished spans and appends them to a file in batches off the event loop."""
+
+    def __init__(self, path: str, batch_size: int = 512, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Dict[str, Any]] = []
+        self._task = None
+        self._wakeup = None
+
+    def export(self, span: Dict[str, Any]):
+        self._pending.append(span)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in batch)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+
+    def _write(self, lines: str):
+        with open(self.path, "a") as f:
+            f.write(lines)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 10000, exporter: Optional[JSONLinesExporter] = None):
+        self.sample_rate = sample_rate
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        path = os.getenv("MCP_TRACE_FILE")
+        return cls(sample_rate=float(os.getenv("MCP_TRACE_SAMPLE", "0")),
+                   buffer_size=int(os.getenv("MCP_TRACE_BUFFER", "10000")),
+                   exporter=JSONLinesExporter(path) if path else None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def span(self, name: str, **attrs):
+        if self.sample_rate <= 0:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return _NotSampled()
+            return Span(self, name, f"{random.getrandbits(128):032x}", None, attrs)
+        if not parent.recording:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attrs)
+
+    def _finish(self, span: Dict[str, Any]):
+        self.buffer.append(span)
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        spans = list(self.buffer)
+        return spans if limit is None else spans[-limit:]
+
+    async def start(self):
+        if self.exporter is not None:
+            await self.exporter.start()
+
+    async def aclose(self):
+        if self.exporter is not None:
+            await self.exporter.aclose()
+
+
+tracer = Tracer.from_env()